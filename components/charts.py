@@ -5,21 +5,23 @@ import psutil
 import pandas as pd
 import datetime
 import time
+from utils.metrics_collector import metrics_collector
+from utils.metrics_history import metrics_history, HISTORY_RANGES
 
-@st.cache_data(ttl=30)
 def get_system_metrics():
     """Get current system metrics"""
+    sample = metrics_collector.latest()
     return {
-        'cpu_percent': psutil.cpu_percent(interval=1),
-        'memory_percent': psutil.virtual_memory().percent,
-        'disk_percent': (psutil.disk_usage('/').used / psutil.disk_usage('/').total) * 100,
-        'timestamp': datetime.datetime.now()
+        'cpu_percent': sample['cpu_percent'],
+        'memory_percent': sample['memory_percent'],
+        'disk_percent': sample['disk_percent'],
+        'timestamp': datetime.datetime.fromtimestamp(sample['timestamp'])
     }
 
 def create_cpu_chart():
     """Create CPU usage chart"""
     # Get CPU usage per core
-    cpu_percents = psutil.cpu_percent(percpu=True, interval=1)
+    cpu_percents = metrics_collector.latest()['cpu_per_core']
     
     # Create bar chart
     fig = go.Figure(data=go.Bar(
@@ -45,7 +47,7 @@ def create_cpu_chart():
 
 def create_memory_chart():
     """Create memory usage pie chart"""
-    memory = psutil.virtual_memory()
+    memory = metrics_collector.latest()['memory']
     
     # Memory breakdown
     labels = ['Usado', 'Buffers', 'Cache', 'Livre']
@@ -343,6 +345,24 @@ def create_time_series_chart(data, title="Sistema ao Longo do Tempo", height=400
     
     st.plotly_chart(fig, use_container_width=True)
 
+def create_metrics_history_chart(range_label="24h", height=400):
+    """Create a time series chart from the persistent metrics history"""
+    seconds = HISTORY_RANGES.get(range_label, HISTORY_RANGES['24h'])
+    history = metrics_history.query(seconds, ['cpu_percent', 'memory_percent', 'disk_percent'])
+    
+    data = {
+        'timestamp': history['timestamps'],
+        'cpu_percent': history['cpu_percent'],
+        'memory_percent': history['memory_percent'],
+        'disk_percent': history['disk_percent']
+    }
+    
+    if not data['timestamp']:
+        st.info("Histórico ainda sendo coletado para este período")
+        return
+    
+    create_time_series_chart(data, title=f"Histórico do Sistema ({range_label})", height=height)
+
 def create_custom_metric_chart(data, chart_type="bar", title="Métricas Customizadas"):
     """Create a custom chart based on provided data"""
     if not data:
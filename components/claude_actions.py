@@ -9,7 +9,8 @@ import logging
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple
 import signal
-import time
+
+from utils.log_reader import tail_lines
 
 # Tentar importar psutil, se não conseguir, usar mock
 try:
@@ -32,6 +33,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Espera compartilhada após cada rodada de sinais (SIGTERM, depois SIGKILL só nos sobreviventes)
+KILL_GRACE_SECONDS = 3.0
+
 class ClaudeActions:
     """Classe para executar ações sobre processos Claude"""
     
@@ -72,93 +76,135 @@ class ClaudeActions:
         Returns:
             Tuple[bool, str]: (sucesso, mensagem)
         """
-        try:
-            if not self._process_exists(pid):
-                message = f"Processo {pid} não encontrado"
-                self._log_action("KILL_PROCESS", f"PID {pid} - FALHOU: {message}", False)
-                return False, message
+        result = self.kill_processes([pid], force=force)[pid]
+        return result['success'], result['message']
+    
+    def kill_processes(self, pids: List[int], force: bool = False,
+                       timeout: float = KILL_GRACE_SECONDS) -> Dict[int, Dict]:
+        """
+        Mata vários processos de uma vez: sinaliza todos, espera juntos e escala só os sobreviventes
+        
+        Args:
+            pids: IDs dos processos
+            force: Se True, envia SIGKILL direto
+            timeout: Espera compartilhada (segundos) após cada rodada de sinais
             
+        Returns:
+            Dict[int, Dict]: resultado por PID (success, signal, sudo, message, name, username, memory_mb)
+        """
+        results = {}
+        handles = {}
+        
+        for pid in dict.fromkeys(pids):
             # Obter informações do processo antes de matar
             try:
                 proc = psutil.Process(pid)
-                proc_info = {
-                    'name': proc.name(),
-                    'username': proc.username(),
-                    'memory_mb': round(proc.memory_info().rss / (1024 * 1024), 2)
-                }
-            except:
-                proc_info = {'name': 'unknown', 'username': 'unknown', 'memory_mb': 0}
-            
-            # Tentar matar o processo
-            signal_type = signal.SIGKILL if force else signal.SIGTERM
-            signal_name = "SIGKILL" if force else "SIGTERM"
-            
+            except psutil.NoSuchProcess:
+                results[pid] = self._kill_result(pid, None, False, None, False, f"Processo {pid} não encontrado")
+                continue
             try:
-                # Usando psutil para maior controle
-                process = psutil.Process(pid)
-                process.send_signal(signal_type)
-                
-                # Aguardar um pouco para verificar se o processo morreu
-                time.sleep(0.5)
-                
-                if not self._process_exists(pid):
-                    message = f"Processo {pid} ({proc_info['name']}) morto com {signal_name}"
-                    self._log_action("KILL_PROCESS", 
-                                   f"PID {pid} - User: {proc_info['username']} - "
-                                   f"Memory: {proc_info['memory_mb']}MB - Signal: {signal_name}", True)
-                    return True, message
-                else:
-                    # Se SIGTERM não funcionou, tentar SIGKILL
-                    if not force:
-                        return self.kill_process(pid, force=True)
-                    else:
-                        message = f"Falha ao matar processo {pid} mesmo com SIGKILL"
-                        self._log_action("KILL_PROCESS", f"PID {pid} - FALHOU: {message}", False)
-                        return False, message
-                        
-            except PermissionError:
-                # Tentar com sudo
-                return self._kill_with_sudo(pid, force, proc_info)
-                
-        except Exception as e:
-            message = f"Erro ao matar processo {pid}: {str(e)}"
-            self._log_action("KILL_PROCESS", f"PID {pid} - ERRO: {message}", False)
-            return False, message
+                with proc.oneshot():
+                    info = {
+                        'name': proc.name(),
+                        'username': proc.username(),
+                        'memory_mb': round(proc.memory_info().rss / (1024 * 1024), 2)
+                    }
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                info = None
+            handles[pid] = proc
+            results[pid] = self._kill_result(pid, info, False, None, False, "")
+        
+        # Cada rodada sinaliza todos os pendentes de uma vez; só os sobreviventes seguem para SIGKILL
+        rounds = [signal.SIGKILL] if force else [signal.SIGTERM, signal.SIGKILL]
+        pending = list(handles.values())
+        
+        for signal_type in rounds:
+            if not pending:
+                break
+            signal_name = signal.Signals(signal_type).name
+            
+            denied = []
+            for proc in pending:
+                results[proc.pid]['signal'] = signal_name
+                try:
+                    proc.send_signal(signal_type)
+                except psutil.NoSuchProcess:
+                    continue
+                except (psutil.AccessDenied, PermissionError):
+                    denied.append(proc.pid)
+            
+            # Todos os PIDs sem permissão vão numa única chamada ao sudo
+            if denied:
+                sudo_error = self._signal_with_sudo(denied, signal_type)
+                for pid in denied:
+                    results[pid]['sudo'] = True
+                    if sudo_error:
+                        results[pid]['message'] = sudo_error
+            
+            _, pending = psutil.wait_procs(pending, timeout=timeout)
+        
+        survivors = {proc.pid for proc in pending}
+        for pid, result in results.items():
+            if pid not in handles:
+                self._log_action("KILL_PROCESS", f"PID {pid} - FALHOU: {result['message']}", False)
+                continue
+            
+            action = "KILL_PROCESS_SUDO" if result['sudo'] else "KILL_PROCESS"
+            via = "sudo " if result['sudo'] else ""
+            if pid in survivors:
+                result['message'] = result['message'] or f"Falha ao matar processo {pid} mesmo com {via}SIGKILL"
+                self._log_action(action, f"PID {pid} - FALHOU: {result['message']}", False)
+            else:
+                result['success'] = True
+                result['message'] = f"Processo {pid} ({result['name']}) morto com {via}{result['signal']}"
+                self._log_action(action,
+                                 f"PID {pid} - User: {result['username']} - "
+                                 f"Memory: {result['memory_mb']}MB - Signal: {result['signal']}", True)
+        
+        if handles:
+            self._invalidate_snapshot()
+        
+        return results
     
-    def _kill_with_sudo(self, pid: int, force: bool, proc_info: Dict) -> Tuple[bool, str]:
-        """Mata processo usando sudo"""
+    def _kill_result(self, pid: int, info: Optional[Dict], success: bool, signal_name: Optional[str],
+                     sudo: bool, message: str) -> Dict:
+        """Resultado estruturado de um PID em kill_processes"""
+        info = info or {'name': 'unknown', 'username': 'unknown', 'memory_mb': 0}
+        return {
+            'pid': pid,
+            'name': info['name'],
+            'username': info['username'],
+            'memory_mb': info['memory_mb'],
+            'success': success,
+            'signal': signal_name,
+            'sudo': sudo,
+            'message': message
+        }
+    
+    def _signal_with_sudo(self, pids: List[int], signal_type: int) -> Optional[str]:
+        """Envia um sinal a vários PIDs com um único sudo kill; retorna a mensagem de erro, se houver"""
         try:
-            signal_arg = "-9" if force else "-15"
-            signal_name = "SIGKILL" if force else "SIGTERM"
-            
             result = subprocess.run(
-                ['sudo', 'kill', signal_arg, str(pid)],
+                ['sudo', '-n', 'kill', f"-{int(signal_type)}"] + [str(pid) for pid in pids],
                 capture_output=True,
                 text=True,
                 timeout=10
             )
-            
-            time.sleep(0.5)
-            
-            if result.returncode == 0 and not self._process_exists(pid):
-                message = f"Processo {pid} ({proc_info['name']}) morto com sudo {signal_name}"
-                self._log_action("KILL_PROCESS_SUDO", 
-                               f"PID {pid} - User: {proc_info['username']} - "
-                               f"Memory: {proc_info['memory_mb']}MB - Signal: {signal_name}", True)
-                return True, message
-            else:
-                message = f"Falha ao matar processo {pid} com sudo: {result.stderr}"
-                self._log_action("KILL_PROCESS_SUDO", f"PID {pid} - FALHOU: {message}", False)
-                return False, message
-                
+            # kill retorna erro se algum PID já tinha saído; o wait_procs decide o resultado real
+            if result.returncode != 0 and result.stderr and 'No such process' not in result.stderr:
+                return f"Falha ao sinalizar com sudo: {result.stderr.strip()}"
+            return None
         except subprocess.TimeoutExpired:
-            message = f"Timeout ao matar processo {pid} com sudo"
-            self._log_action("KILL_PROCESS_SUDO", f"PID {pid} - TIMEOUT: {message}", False)
-            return False, message
+            return "Timeout ao sinalizar processos com sudo"
         except Exception as e:
-            message = f"Erro ao matar processo {pid} com sudo: {str(e)}"
-            self._log_action("KILL_PROCESS_SUDO", f"PID {pid} - ERRO: {message}", False)
-            return False, message
+            return f"Erro ao sinalizar processos com sudo: {str(e)}"
+    
+    def _kill_many(self, pids: List[int]) -> Tuple[List[int], List[int], Dict[int, Dict]]:
+        """Atalho para os métodos em lote: (mortos, falhas, resultados por PID)"""
+        results = self.kill_processes(pids)
+        killed_pids = [pid for pid, result in results.items() if result['success']]
+        failed_pids = [pid for pid, result in results.items() if not result['success']]
+        return killed_pids, failed_pids, results
     
     def kill_user_processes(self, username: str) -> Tuple[bool, str, List[int]]:
         """
@@ -181,15 +227,7 @@ class ClaudeActions:
                 self._log_action("KILL_USER_PROCESSES", f"User: {username} - Nenhum processo encontrado", True)
                 return True, message, []
             
-            killed_pids = []
-            failed_pids = []
-            
-            for proc in user_processes:
-                success, _ = self.kill_process(proc['pid'])
-                if success:
-                    killed_pids.append(proc['pid'])
-                else:
-                    failed_pids.append(proc['pid'])
+            killed_pids, failed_pids, _ = self._kill_many([proc['pid'] for proc in user_processes])
             
             total = len(user_processes)
             killed = len(killed_pids)
@@ -227,15 +265,7 @@ class ClaudeActions:
                 self._log_action("KILL_ALL_PROCESSES", "Nenhum processo encontrado", True)
                 return True, message, []
             
-            killed_pids = []
-            failed_pids = []
-            
-            for proc in processes:
-                success, _ = self.kill_process(proc['pid'])
-                if success:
-                    killed_pids.append(proc['pid'])
-                else:
-                    failed_pids.append(proc['pid'])
+            killed_pids, failed_pids, _ = self._kill_many([proc['pid'] for proc in processes])
             
             total = len(processes)
             killed = len(killed_pids)
@@ -276,15 +306,7 @@ class ClaudeActions:
                 self._log_action("CLEAN_OLD_PROCESSES", f"Limite: {hours}h - Nenhum processo antigo", True)
                 return True, message, []
             
-            killed_pids = []
-            failed_pids = []
-            
-            for proc in old_processes:
-                success, _ = self.kill_process(proc['pid'])
-                if success:
-                    killed_pids.append(proc['pid'])
-                else:
-                    failed_pids.append(proc['pid'])
+            killed_pids, failed_pids, _ = self._kill_many([proc['pid'] for proc in old_processes])
             
             total = len(old_processes)
             killed = len(killed_pids)
@@ -322,15 +344,7 @@ class ClaudeActions:
                 self._log_action("CLEAN_ORPHAN_PROCESSES", "Nenhum processo órfão", True)
                 return True, message, []
             
-            killed_pids = []
-            failed_pids = []
-            
-            for proc in orphan_processes:
-                success, _ = self.kill_process(proc['pid'])
-                if success:
-                    killed_pids.append(proc['pid'])
-                else:
-                    failed_pids.append(proc['pid'])
+            killed_pids, failed_pids, _ = self._kill_many([proc['pid'] for proc in orphan_processes])
             
             total = len(orphan_processes)
             killed = len(killed_pids)
@@ -351,6 +365,53 @@ class ClaudeActions:
             self._log_action("CLEAN_ORPHAN_PROCESSES", f"ERRO: {message}", False)
             return False, message, []
     
+    def send_alert(self, username: str, message: str, severity: str = "warning") -> Tuple[bool, str]:
+        """
+        Envia um alerta aos terminais abertos de um usuário (como o claude-notifier)
+
+        Args:
+            username: Nome do usuário
+            message: Texto do alerta
+            severity: info, warning ou critical
+
+        Returns:
+            Tuple[bool, str]: (sucesso, mensagem)
+        """
+        try:
+            result = subprocess.run(['who'], capture_output=True, text=True, timeout=5)
+            terminals = [line.split()[1] for line in result.stdout.splitlines()
+                         if line.split() and line.split()[0] == username and len(line.split()) > 1]
+
+            header = {
+                'critical': "CLAUDE ALERT - CRITICAL",
+                'warning': "CLAUDE ALERT - WARNING"
+            }.get(severity, "CLAUDE NOTICE")
+
+            delivered = 0
+            for terminal in terminals:
+                try:
+                    write = subprocess.run(['write', username, terminal], input=f"\n{header}\n{message}\n",
+                                           capture_output=True, text=True, timeout=5)
+                    if write.returncode == 0:
+                        delivered += 1
+                except (OSError, subprocess.TimeoutExpired):
+                    continue
+
+            # O alerta fica registrado mesmo que o usuário não tenha terminal aberto
+            self._log_action("ALERT", f"User: {username} - Severity: {severity} - "
+                                      f"Terminais: {delivered}/{len(terminals)} - {message}", True)
+            return True, f"Alerta enviado para {delivered} terminal(is) de {username}"
+
+        except Exception as e:
+            message = f"Erro ao enviar alerta para {username}: {str(e)}"
+            self._log_action("ALERT", f"User: {username} - ERRO: {message}", False)
+            return False, message
+
+    def _invalidate_snapshot(self):
+        """Força o monitor a reler a tabela de processos na próxima consulta"""
+        from .claude_monitor import claude_monitor
+        claude_monitor.invalidate()
+    
     def _process_exists(self, pid: int) -> bool:
         """Verifica se um processo existe"""
         try:
@@ -372,11 +433,8 @@ class ClaudeActions:
             if not os.path.exists(self.log_file):
                 return []
             
-            with open(self.log_file, 'r') as f:
-                lines = f.readlines()
-            
-            # Retornar as últimas N linhas
-            return [line.strip() for line in lines[-limit:]]
+            # Retornar as últimas N linhas (lidas a partir do fim do arquivo)
+            return [line.strip() for line in tail_lines(self.log_file, limit)]
             
         except Exception as e:
             logger.error(f"Erro ao ler logs: {e}")
@@ -46,7 +46,8 @@ class ClaudeConfig:
                 "enable_notifications": True,
                 "log_retention_days": 7,
                 "alert_instead_of_kill": True,
-                "send_terminal_alerts": True
+                "send_terminal_alerts": True,
+                "enforcement_interval_seconds": 30
             },
             "user_limits": {
                 "default": {
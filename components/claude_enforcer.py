@@ -0,0 +1,263 @@
+"""
+Claude Policy Enforcer Component
+Aplica as políticas de claude_limits.json fora do Streamlit, como um daemon.
+
+Uso: python -m components.claude_enforcer [--once] [--dry-run] [--interval N]
+"""
+
+import argparse
+import logging
+import os
+import signal
+import threading
+import time
+from typing import Dict, List
+
+from .claude_monitor import claude_monitor
+from .claude_actions import claude_actions
+from .claude_config import claude_config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL_SECONDS = 30
+ALERT_COOLDOWN_SECONDS = 3600   # Não repetir o mesmo alerta para o mesmo processo antes disso
+MAX_CPU_FRACTION = 0.05         # Fração máxima de um núcleo que o daemon pode consumir
+ENFORCER_NICENESS = 10
+
+class ClaudeEnforcer:
+    """Avalia as políticas contra snapshots do monitor e alerta ou mata via ClaudeActions"""
+
+    def __init__(self, dry_run: bool = False, interval: int = None):
+        self.dry_run = dry_run
+        self.fixed_interval = interval
+        self._stop = threading.Event()
+        self._config_mtime = None
+        self._next_cleanup = 0.0
+        self._alerted = {}
+        self.ticks = 0
+
+    # Configuração
+
+    def _reload_config(self):
+        """Relê claude_limits.json quando o arquivo muda (edições feitas pela UI)"""
+        try:
+            mtime = os.path.getmtime(claude_config.config_file)
+        except OSError:
+            return
+        if mtime != self._config_mtime:
+            self._config_mtime = mtime
+            claude_config.config = claude_config.load_config()
+
+    def _setting(self, name: str, default):
+        value = claude_config.get_global_setting(name)
+        return default if value is None else value
+
+    def _interval(self) -> float:
+        if self.fixed_interval:
+            return self.fixed_interval
+        return max(5, self._setting('enforcement_interval_seconds', DEFAULT_INTERVAL_SECONDS))
+
+    # Avaliação
+
+    def evaluate(self, snapshot, cleanup_due: bool) -> List[Dict]:
+        """Lista as violações de política presentes no snapshot"""
+        violations = []
+        auto_cleanup = bool(self._setting('auto_cleanup_enabled', False))
+
+        def violation(policy, proc, detail, severity='warning', alert_only=False):
+            violations.append({
+                'policy': policy,
+                'pid': proc['pid'],
+                'create_time': proc['create_time'],
+                'username': proc['username'],
+                'memory_mb': proc['memory_mb'],
+                'detail': detail,
+                'severity': severity,
+                'alert_only': alert_only
+            })
+
+        for username, processes in snapshot.by_user.items():
+            limits = claude_config.get_user_limit(username)
+
+            memory_limit = limits.get('memory_limit_mb') or self._setting('default_memory_limit_mb', 8192)
+            for proc in processes:
+                if proc['memory_mb'] > memory_limit:
+                    violation('memory_limit', proc,
+                              f"{proc['memory_mb']:.0f}MB acima do limite de {memory_limit}MB", 'critical')
+
+            # Excedentes: os processos mais novos, preservando as sessões mais antigas
+            max_processes = limits.get('max_processes') or self._setting('max_processes_per_user', 10)
+            if len(processes) > max_processes:
+                newest = sorted(processes, key=lambda p: p['create_time'])[max_processes:]
+                for proc in newest:
+                    violation('max_processes', proc,
+                              f"{len(processes)} processos, limite de {max_processes} por usuário")
+
+            # Tempo de execução faz parte da limpeza periódica
+            if cleanup_due:
+                max_runtime = limits.get('max_runtime_hours') or self._setting('max_process_age_hours', 24)
+                for proc in processes:
+                    if proc['runtime_minutes'] > max_runtime * 60:
+                        violation('max_runtime', proc,
+                                  f"rodando há {proc['runtime_minutes'] // 60}h, limite de {max_runtime}h",
+                                  alert_only=not auto_cleanup)
+
+        if cleanup_due and self._setting('orphan_cleanup_enabled', False):
+            for proc in snapshot.processes:
+                if proc['is_orphan']:
+                    violation('orphan', proc, "processo órfão", 'info', alert_only=not auto_cleanup)
+
+        # Vazamentos só geram alerta: o processo ainda não atingiu limite nenhum
+        for leak in claude_monitor.detect_memory_leaks():
+            proc = snapshot.by_pid.get(leak['pid'])
+            if proc:
+                violation('memory_leak', proc,
+                          f"memória crescendo {leak['growth_mb_per_hour']}MB/h, "
+                          f"limite de alerta em ~{leak['hours_to_threshold']}h", alert_only=True)
+
+        return violations
+
+    # Ações
+
+    def enforce(self, violations: List[Dict]) -> Dict:
+        """Mata ou alerta conforme alert_instead_of_kill; retorna um resumo do tick"""
+        alert_instead_of_kill = bool(self._setting('alert_instead_of_kill', True))
+
+        to_kill = {}
+        to_alert = []
+        for item in violations:
+            if alert_instead_of_kill or item['alert_only']:
+                to_alert.append(item)
+            else:
+                to_kill.setdefault(item['pid'], item)
+
+        # Um processo que será morto não precisa de alerta separado
+        to_alert = [item for item in to_alert if item['pid'] not in to_kill]
+        summary = {'violations': len(violations), 'killed': [], 'failed': [], 'alerts': 0}
+
+        if self.dry_run:
+            for item in violations:
+                action = "KILL" if item['pid'] in to_kill else "ALERT"
+                logger.info(f"[dry-run] {action} PID {item['pid']} ({item['username']}) "
+                            f"{item['policy']}: {item['detail']}")
+            return summary
+
+        killed_by_user = {}
+        results = claude_actions.kill_processes(list(to_kill)) if to_kill else {}
+        for pid, result in results.items():
+            item = to_kill[pid]
+            if result['success']:
+                summary['killed'].append(pid)
+                killed_by_user.setdefault(item['username'], []).append(item)
+            else:
+                summary['failed'].append(pid)
+                logger.error(f"Política {item['policy']}: {result['message']}")
+
+        alerts_by_user = {}
+        for item in self._due_alerts(to_alert):
+            alerts_by_user.setdefault(item['username'], []).append(item)
+
+        if self._setting('send_terminal_alerts', True):
+            for username, items in killed_by_user.items():
+                lines = [f"PID {item['pid']} encerrado: {item['detail']}" for item in items]
+                claude_actions.send_alert(username, "\n".join(lines), 'critical')
+            for username, items in alerts_by_user.items():
+                lines = [f"PID {item['pid']}: {item['detail']}" for item in items]
+                severity = 'critical' if any(item['severity'] == 'critical' for item in items) else 'warning'
+                claude_actions.send_alert(username, "\n".join(lines), severity)
+                summary['alerts'] += len(items)
+        else:
+            for items in alerts_by_user.values():
+                for item in items:
+                    logger.warning(f"Política {item['policy']}: PID {item['pid']} ({item['username']}) "
+                                   f"{item['detail']}")
+                summary['alerts'] += len(items)
+
+        return summary
+
+    def _due_alerts(self, items: List[Dict]) -> List[Dict]:
+        """Filtra alertas já enviados dentro do cooldown"""
+        now = time.time()
+        due = []
+        for item in items:
+            key = (item['policy'], item['pid'], item['create_time'])
+            if now - self._alerted.get(key, 0) >= ALERT_COOLDOWN_SECONDS:
+                self._alerted[key] = now
+                due.append(item)
+
+        # Esquecer alertas de processos que já saíram do cooldown
+        self._alerted = {key: sent for key, sent in self._alerted.items()
+                         if now - sent < ALERT_COOLDOWN_SECONDS}
+        return due
+
+    # Loop
+
+    def run_once(self) -> Dict:
+        """Um tick: relê a configuração, tira um snapshot e aplica as políticas"""
+        self._reload_config()
+
+        cleanup_due = time.monotonic() >= self._next_cleanup
+        if cleanup_due:
+            cleanup_minutes = self._setting('auto_cleanup_interval_minutes', 60)
+            self._next_cleanup = time.monotonic() + max(1, cleanup_minutes) * 60
+
+        snapshot = claude_monitor.snapshot(force=True)
+        summary = self.enforce(self.evaluate(snapshot, cleanup_due))
+        summary['processes'] = len(snapshot.processes)
+        self.ticks += 1
+        return summary
+
+    def run(self):
+        """Loop do daemon com CPU limitada"""
+        try:
+            os.nice(ENFORCER_NICENESS)
+        except (AttributeError, OSError):
+            pass
+
+        # O próprio loop alimenta o histórico; não é preciso a thread de amostragem
+        claude_monitor.sampler_enabled = False
+        logger.info(f"Claude enforcer iniciado (intervalo {self._interval()}s, dry-run={self.dry_run})")
+
+        while not self._stop.is_set():
+            started = time.monotonic()
+            cpu_started = time.process_time()
+
+            try:
+                summary = self.run_once()
+                if summary['violations']:
+                    logger.info(f"Tick {self.ticks}: {summary['processes']} processos, "
+                                f"{summary['violations']} violações, mortos {summary['killed']}, "
+                                f"falhas {summary['failed']}, alertas {summary['alerts']}")
+            except Exception as e:
+                logger.error(f"Erro no ciclo de enforcement: {e}")
+
+            # Um tick caro alonga a pausa para manter o uso médio abaixo de MAX_CPU_FRACTION
+            cpu_used = time.process_time() - cpu_started
+            delay = max(self._interval(), cpu_used / MAX_CPU_FRACTION)
+            self._stop.wait(max(0.0, delay - (time.monotonic() - started)))
+
+        logger.info("Claude enforcer finalizado")
+
+    def stop(self, *args):
+        self._stop.set()
+
+def main():
+    parser = argparse.ArgumentParser(description="Aplica as políticas de claude_limits.json")
+    parser.add_argument('--once', action='store_true', help="executa um único ciclo e sai")
+    parser.add_argument('--dry-run', action='store_true', help="apenas registra o que seria feito")
+    parser.add_argument('--interval', type=int, help="intervalo entre ciclos em segundos")
+    args = parser.parse_args()
+
+    enforcer = ClaudeEnforcer(dry_run=args.dry_run, interval=args.interval)
+
+    if args.once:
+        claude_monitor.sampler_enabled = False
+        print(enforcer.run_once())
+        return
+
+    signal.signal(signal.SIGTERM, enforcer.stop)
+    signal.signal(signal.SIGINT, enforcer.stop)
+    enforcer.run()
+
+if __name__ == '__main__':
+    main()
@@ -9,6 +9,8 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 import logging
 import os
+import threading
+import time
 
 # Tentar importar psutil, se não conseguir, usar mock
 try:
@@ -17,54 +19,156 @@ except ImportError:
     print("psutil não encontrado, usando mock para demonstração")
     from . import psutil_mock as psutil
 
+# Handles persistentes e histórico por processo (requerem o psutil verdadeiro)
+try:
+    from utils.process_tracker import process_tracker
+    from utils.process_history import process_history
+except ImportError:
+    process_tracker = None
+    process_history = None
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Idade máxima de um snapshot antes de percorrer /proc novamente
+SNAPSHOT_TTL_SECONDS = 2.0
+
+class ProcessSnapshot:
+    """Tabela de processos capturada em uma única passada por /proc"""
+    
+    def __init__(self, processes: List[Dict], parents: Dict[int, int]):
+        self.taken_at = time.time()
+        self.processes = sorted(processes, key=lambda x: x['memory_mb'], reverse=True)
+        self.parents = parents
+        
+        # Índices usados pelas consultas do monitor
+        self.by_pid = {proc['pid']: proc for proc in self.processes}
+        self.by_user = {}
+        for proc in self.processes:
+            self.by_user.setdefault(proc['username'], []).append(proc)
+        self.children = {}
+        for pid, ppid in parents.items():
+            self.children.setdefault(ppid, []).append(pid)
+    
+    def age(self) -> float:
+        return time.time() - self.taken_at
+
 class ClaudeMonitor:
     """Monitor para processos Claude"""
     
-    def __init__(self):
+    def __init__(self, snapshot_ttl: float = SNAPSHOT_TTL_SECONDS):
         self.claude_keywords = ['claude', 'anthropic', 'claude-api', 'claude-cli']
+        self.snapshot_ttl = snapshot_ttl
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._sampler = None
+        self.sampler_enabled = True
+        self._flagged_leaks = set()
     
-    def get_claude_processes(self) -> List[Dict]:
-        """Retorna lista de processos Claude em execução"""
+    def snapshot(self, force: bool = False) -> ProcessSnapshot:
+        """Retorna o snapshot atual, percorrendo /proc apenas quando expirou"""
+        self.start_sampler()
+        with self._lock:
+            if force or self._snapshot is None or self._snapshot.age() >= self.snapshot_ttl:
+                self._snapshot = self._take_snapshot()
+                if process_history is not None:
+                    process_history.record(self._snapshot.processes, self._snapshot.taken_at)
+            return self._snapshot
+    
+    def start_sampler(self):
+        """Inicia a thread que alimenta o histórico mesmo sem a página aberta (idempotente)"""
+        if not self.sampler_enabled or process_history is None or (self._sampler and self._sampler.is_alive()):
+            return
+        
+        from .claude_config import claude_config
+        if not claude_config.get_monitoring_config().get('enable_metrics_collection', True):
+            return
+        
+        with self._lock:
+            if self._sampler and self._sampler.is_alive():
+                return
+            self._sampler = threading.Thread(target=self._run_sampler, name='claude-history', daemon=True)
+            self._sampler.start()
+    
+    def _run_sampler(self):
+        while True:
+            try:
+                self.snapshot()
+                self.detect_memory_leaks()
+            except Exception as e:
+                logger.error(f"Erro ao amostrar histórico de processos: {e}")
+            time.sleep(process_history.interval)
+    
+    def invalidate(self):
+        """Descarta o snapshot atual (ex.: após matar processos)"""
+        with self._lock:
+            self._snapshot = None
+    
+    def _take_snapshot(self) -> ProcessSnapshot:
+        """Percorre a tabela de processos uma única vez"""
+        processes = []
+        parents = {}
+        
         try:
-            processes = []
+            now = datetime.now()
             
-            for proc in psutil.process_iter(['pid', 'name', 'username', 'memory_info', 
-                                           'cpu_percent', 'create_time', 'status', 'cmdline']):
+            for proc in psutil.process_iter(['pid', 'ppid', 'name', 'username', 'memory_info',
+                                           'create_time', 'status', 'cmdline']):
                 try:
                     proc_info = proc.info
+                    parents[proc_info['pid']] = proc_info.get('ppid') or 0
                     
                     # Verificar se é um processo Claude
                     if self._is_claude_process(proc_info):
                         memory_mb = proc_info['memory_info'].rss / (1024 * 1024)
                         create_time = datetime.fromtimestamp(proc_info['create_time'])
-                        runtime = datetime.now() - create_time
+                        runtime = now - create_time
                         
                         processes.append({
                             'pid': proc_info['pid'],
+                            'ppid': parents[proc_info['pid']],
                             'name': proc_info['name'],
                             'username': proc_info['username'] or 'unknown',
                             'memory_mb': round(memory_mb, 2),
-                            'cpu_percent': proc_info['cpu_percent'] or 0,
+                            'cpu_percent': self._cpu_percent(proc, proc_info['create_time']),
                             'create_time': create_time,
                             'runtime_minutes': int(runtime.total_seconds() / 60),
                             'status': proc_info['status'],
                             'cmdline': ' '.join(proc_info['cmdline']) if proc_info['cmdline'] else '',
-                            'is_orphan': self._is_orphan(proc_info),
-                            'is_old': runtime > timedelta(hours=2)
+                            'is_old': runtime > timedelta(hours=2),
+                            'num_threads': self._read_counter(proc, 'num_threads'),
+                            'num_fds': self._read_counter(proc, 'num_fds')
                         })
                         
                 except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
                     continue
             
-            return sorted(processes, key=lambda x: x['memory_mb'], reverse=True)
+            # A orfandade depende da tabela completa, então é marcada ao final
+            for proc in processes:
+                proc['is_orphan'] = self._is_orphan(proc, parents)
             
         except Exception as e:
             logger.error(f"Erro ao obter processos Claude: {e}")
-            return []
+        
+        return ProcessSnapshot(processes, parents)
+    
+    def _cpu_percent(self, proc, create_time: float) -> float:
+        """CPU% desde o último snapshot, usando handles persistentes do processo"""
+        if process_tracker is None:
+            return proc.cpu_percent() or 0
+        return process_tracker.cpu_percent(proc, create_time)
+    
+    def _read_counter(self, proc, name: str) -> int:
+        """Lê num_threads/num_fds; sem permissão (ou no mock) retorna 0"""
+        try:
+            return getattr(proc, name)()
+        except Exception:
+            return 0
+    
+    def get_claude_processes(self) -> List[Dict]:
+        """Retorna lista de processos Claude em execução"""
+        return list(self.snapshot().processes)
     
     def _is_claude_process(self, proc_info: Dict) -> bool:
         """Verifica se um processo é relacionado ao Claude"""
@@ -95,28 +199,18 @@ class ClaudeMonitor:
         except Exception:
             return False
     
-    def _is_orphan(self, proc_info: Dict) -> bool:
-        """Verifica se um processo é órfão"""
-        try:
-            proc = psutil.Process(proc_info['pid'])
-            parent = proc.parent()
-            
-            if parent is None:
-                return True
-            
-            # Se o pai for init (PID 1) pode ser órfão
-            if parent.pid == 1:
-                return True
-                
-            return False
-            
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            return True
+    def _is_orphan(self, proc: Dict, parents: Dict[int, int]) -> bool:
+        """Verifica se um processo é órfão usando a tabela de pais do snapshot"""
+        ppid = proc.get('ppid') or 0
+        
+        # Sem pai, pai init (PID 1) ou pai que já saiu da tabela
+        return ppid <= 1 or ppid not in parents
     
     def get_memory_stats(self) -> Dict:
         """Retorna estatísticas de uso de memória dos processos Claude"""
         try:
-            processes = self.get_claude_processes()
+            snapshot = self.snapshot()
+            processes = snapshot.processes
             
             if not processes:
                 return {
@@ -130,7 +224,7 @@ class ClaudeMonitor:
             total_memory = sum(p['memory_mb'] for p in processes)
             avg_memory = total_memory / len(processes)
             max_memory = max(p['memory_mb'] for p in processes)
-            active_users = len(set(p['username'] for p in processes))
+            active_users = len(snapshot.by_user)
             
             return {
                 'total_processes': len(processes),
@@ -147,34 +241,18 @@ class ClaudeMonitor:
     def get_user_ranking(self) -> List[Dict]:
         """Retorna ranking de usuários por consumo de recursos"""
         try:
-            processes = self.get_claude_processes()
-            
             user_stats = {}
-            for proc in processes:
-                username = proc['username']
-                
-                if username not in user_stats:
-                    user_stats[username] = {
-                        'username': username,
-                        'process_count': 0,
-                        'total_memory_mb': 0,
-                        'avg_memory_mb': 0,
-                        'max_memory_mb': 0,
-                        'oldest_runtime_minutes': 0
-                    }
+            for username, user_processes in self.snapshot().by_user.items():
+                total_memory = sum(p['memory_mb'] for p in user_processes)
                 
-                stats = user_stats[username]
-                stats['process_count'] += 1
-                stats['total_memory_mb'] += proc['memory_mb']
-                stats['max_memory_mb'] = max(stats['max_memory_mb'], proc['memory_mb'])
-                stats['oldest_runtime_minutes'] = max(stats['oldest_runtime_minutes'], 
-                                                     proc['runtime_minutes'])
-            
-            # Calcular médias
-            for username, stats in user_stats.items():
-                stats['avg_memory_mb'] = round(stats['total_memory_mb'] / stats['process_count'], 2)
-                stats['total_memory_mb'] = round(stats['total_memory_mb'], 2)
-                stats['max_memory_mb'] = round(stats['max_memory_mb'], 2)
+                user_stats[username] = {
+                    'username': username,
+                    'process_count': len(user_processes),
+                    'total_memory_mb': round(total_memory, 2),
+                    'avg_memory_mb': round(total_memory / len(user_processes), 2),
+                    'max_memory_mb': round(max(p['memory_mb'] for p in user_processes), 2),
+                    'oldest_runtime_minutes': max(p['runtime_minutes'] for p in user_processes)
+                }
             
             # Ordenar por consumo total de memória
             ranking = sorted(user_stats.values(), 
@@ -189,8 +267,7 @@ class ClaudeMonitor:
     def identify_orphans(self) -> List[Dict]:
         """Identifica processos órfãos Claude"""
         try:
-            processes = self.get_claude_processes()
-            orphans = [p for p in processes if p['is_orphan']]
+            orphans = [p for p in self.snapshot().processes if p['is_orphan']]
             
             return orphans
             
@@ -201,10 +278,9 @@ class ClaudeMonitor:
     def get_old_processes(self, hours: int = 2) -> List[Dict]:
         """Identifica processos antigos (rodando há mais de X horas)"""
         try:
-            processes = self.get_claude_processes()
             old_processes = []
             
-            for proc in processes:
+            for proc in self.snapshot().processes:
                 if proc['runtime_minutes'] > (hours * 60):
                     old_processes.append(proc)
             
@@ -217,21 +293,59 @@ class ClaudeMonitor:
     def get_process_by_pid(self, pid: int) -> Optional[Dict]:
         """Retorna informações de um processo específico por PID"""
         try:
-            processes = self.get_claude_processes()
-            for proc in processes:
-                if proc['pid'] == pid:
-                    return proc
-            return None
+            return self.snapshot().by_pid.get(pid)
             
         except Exception as e:
             logger.error(f"Erro ao obter processo {pid}: {e}")
             return None
     
+    def get_history_sessions(self) -> List[Dict]:
+        """Processos com histórico registrado (inclusive os já encerrados)"""
+        if process_history is None:
+            return []
+        return process_history.sessions()
+    
+    def get_process_history(self, pid: int, create_time, seconds: Optional[int] = None) -> Dict:
+        """Série temporal de RSS, CPU, threads e FDs de um processo, sem nova amostragem"""
+        if process_history is None:
+            return {}
+        return process_history.history(pid, create_time, seconds)
+    
+    def detect_memory_leaks(self) -> List[Dict]:
+        """Processos cujo RSS cresce de forma sustentada rumo a alert_memory_threshold_mb"""
+        try:
+            if process_history is None:
+                return []
+            
+            from .claude_config import claude_config
+            if not claude_config.get_monitoring_config().get('alert_on_memory_spike', True):
+                return []
+            
+            threshold = claude_config.get_global_setting('alert_memory_threshold_mb') or 6144
+            leaks = process_history.detect_leaks(threshold)
+            
+            # Registrar cada processo suspeito apenas uma vez
+            for leak in leaks:
+                key = (leak['pid'], leak['create_time'])
+                if key not in self._flagged_leaks:
+                    self._flagged_leaks.add(key)
+                    logger.warning(f"Possível vazamento de memória: PID {leak['pid']} ({leak['username']}) "
+                                   f"{leak['rss_mb']}MB, +{leak['growth_mb_per_hour']}MB/h, "
+                                   f"limite de {threshold}MB em ~{leak['hours_to_threshold']}h")
+            
+            return leaks
+            
+        except Exception as e:
+            logger.error(f"Erro ao detectar vazamentos de memória: {e}")
+            return []
+    
     def get_system_resources(self) -> Dict:
         """Retorna informações sobre recursos do sistema"""
         try:
+            from utils.metrics_collector import metrics_collector
+            
             memory = psutil.virtual_memory()
-            cpu = psutil.cpu_percent(interval=1)
+            cpu = metrics_collector.latest()['cpu_percent']
             
             return {
                 'total_memory_gb': round(memory.total / (1024**3), 2),
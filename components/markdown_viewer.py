@@ -7,6 +7,7 @@ from pygments.lexers import get_lexer_by_name, guess_lexer
 from pygments.formatters import HtmlFormatter
 from pygments.util import ClassNotFound
 from components.metrics import create_metric_card
+from utils.log_reader import tail_lines
 
 def render_markdown_file(file_path):
     """Render a markdown file with syntax highlighting"""
@@ -271,13 +272,10 @@ def apply_markdown_styling(html):
 def render_log_content(log_path, max_lines=100):
     """Render log file content with syntax highlighting"""
     try:
-        with open(log_path, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = f.readlines()
-        
-        # Get last N lines if file is too long
-        if len(lines) > max_lines:
-            lines = lines[-max_lines:]
-            st.info(f"Mostrando as últimas {max_lines} linhas de {len(lines)} total")
+        # Only the tail is read, seeking back from the end of the file
+        lines = tail_lines(log_path, max_lines)
+        if len(lines) >= max_lines:
+            st.info(f"Mostrando as últimas {max_lines} linhas")
         
         # Join lines and apply log highlighting
         content = ''.join(lines)
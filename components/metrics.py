@@ -1,6 +1,7 @@
 import streamlit as st
 import psutil
 import datetime
+from utils.metrics_collector import metrics_collector
 
 def create_metric_card(title, value, icon="analytics", icon_color=None):
     """Create a styled metric card with optional icon color"""
@@ -22,20 +23,17 @@ def create_metric_card(title, value, icon="analytics", icon_color=None):
 
 def create_system_metrics():
     """Create a set of system metrics cards"""
+    sample = metrics_collector.latest()
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        cpu_percent = psutil.cpu_percent(interval=1)
-        create_metric_card("Uso CPU", f"{cpu_percent}%", "desktop_windows")
+        create_metric_card("Uso CPU", f"{sample['cpu_percent']}%", "desktop_windows")
     
     with col2:
-        memory = psutil.virtual_memory()
-        create_metric_card("Memória", f"{memory.percent}%", "memory")
+        create_metric_card("Memória", f"{sample['memory_percent']}%", "memory")
     
     with col3:
-        disk = psutil.disk_usage('/')
-        disk_percent = (disk.used / disk.total) * 100
-        create_metric_card("Disco", f"{disk_percent:.1f}%", "storage")
+        create_metric_card("Disco", f"{sample['disk_percent']:.1f}%", "storage")
     
     with col4:
         boot_time = datetime.datetime.fromtimestamp(psutil.boot_time())
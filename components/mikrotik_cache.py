@@ -0,0 +1,91 @@
+import time
+import threading
+import logging
+from typing import Callable, Dict, Optional
+
+# Validade das leituras por tipo; escritas feitas pelo dashboard invalidam na hora
+READ_CACHE_TTL_SECONDS = {
+    'users': 30,
+    'sessions': 10,
+    'nat_rules': 30,
+    'nat_ports': 30
+}
+DEFAULT_TTL_SECONDS = 15
+
+class MikroTikReadCache:
+    """Cache de leituras RouterOS por dispositivo, compartilhado por todas as sessões do Streamlit
+
+    Cada entrada é identificada por (host, port, tipo) e expira após o TTL do
+    tipo. Leituras simultâneas da mesma entrada fazem uma única consulta ao
+    roteador; resultados None (falha) não são guardados.
+    """
+
+    def __init__(self, ttls: Dict[str, float] = None):
+        self.ttls = dict(READ_CACHE_TTL_SECONDS if ttls is None else ttls)
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._load_locks = {}
+        self.hits = 0
+        self.misses = 0
+        self.logger = logging.getLogger(__name__)
+
+    def get(self, host: str, port: int, kind: str, loader: Callable, ttl: Optional[float] = None):
+        """Retorna o valor em cache ou o carrega com loader()"""
+        key = (host, int(port), kind)
+        ttl = self.ttls.get(kind, DEFAULT_TTL_SECONDS) if ttl is None else ttl
+
+        value = self._fresh(key, ttl)
+        if value is not None:
+            return value
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            # Outra sessão pode ter carregado enquanto esperávamos
+            value = self._fresh(key, ttl)
+            if value is not None:
+                return value
+
+            with self._lock:
+                self.misses += 1
+                generation = self._entries.get(key, (None, None, 0))[2]
+            value = loader()
+            if value is not None:
+                with self._lock:
+                    # Uma invalidação durante a carga torna o resultado suspeito: não guardar
+                    if self._entries.get(key, (None, None, 0))[2] == generation:
+                        self._entries[key] = (time.monotonic(), value, generation)
+            return value
+
+    def _fresh(self, key, ttl: float):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] is not None and time.monotonic() - entry[0] < ttl:
+                self.hits += 1
+                return entry[1]
+        return None
+
+    def invalidate(self, host: str, port: int, *kinds: str):
+        """Descarta as leituras de um dispositivo (todas, se nenhum tipo for informado)"""
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if key[0] == host and key[1] == int(port) and (not kinds or key[2] in kinds):
+                    self._entries[key] = (None, None, entry[2] + 1)
+            # Invalidação antes de qualquer leitura ainda precisa barrar cargas em andamento
+            for kind in kinds:
+                self._entries.setdefault((host, int(port), kind), (None, None, 1))
+
+    def clear(self):
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                self._entries[key] = (None, None, entry[2] + 1)
+
+    def stats(self) -> Dict:
+        """Contadores de acertos/consultas e entradas válidas"""
+        with self._lock:
+            cached = sum(1 for entry in self._entries.values() if entry[0] is not None)
+        return {'hits': self.hits, 'misses': self.misses, 'entries': cached}
+
+# Cache global compartilhado pelos componentes MikroTik
+mikrotik_cache = MikroTikReadCache()
@@ -1,8 +1,13 @@
+import re
 import json
+import ipaddress
+import time
 import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
 try:
     import paramiko
@@ -11,6 +16,14 @@ except ImportError:
     PARAMIKO_AVAILABLE = False
     print("Aviso: paramiko não está instalado. Funcionalidade SSH limitada.")
 
+from .mikrotik_ssh import mikrotik_pool
+
+SYNC_DEADLINE_SECONDS = 90   # Prazo de cada dispositivo, contado de quando a sincronização dele começa
+SYNC_MAX_WORKERS = 16
+VPN_GATEWAY = "10.0.10.7"
+ROUTE_COMMENT_PREFIX = "vpn-gateway"
+ROUTE_FIELD_RE = re.compile(r'([\w.-]+)=("[^"]*"|\S*)')
+
 class MikroTikConfig:
     """Configurador SSH para dispositivos MikroTik"""
     
@@ -18,6 +31,7 @@ class MikroTikConfig:
         self.config_file = Path("/srv/projects/shared/dashboard/config/mikrotik_devices.json")
         self.config_file.parent.mkdir(exist_ok=True)
         self.devices = {}
+        self._save_lock = threading.Lock()
         self.load_config()
         
     def load_config(self):
@@ -56,8 +70,10 @@ class MikroTikConfig:
     def save_config(self):
         """Salva configurações no arquivo"""
         try:
-            with open(self.config_file, 'w') as f:
-                json.dump(self.devices, f, indent=2, ensure_ascii=False)
+            # sync_routes sincroniza vários dispositivos em paralelo
+            with self._save_lock:
+                with open(self.config_file, 'w') as f:
+                    json.dump(self.devices, f, indent=2, ensure_ascii=False)
         except Exception as e:
             print(f"Erro ao salvar configuração MikroTik: {e}")
             
@@ -95,6 +111,18 @@ class MikroTikConfig:
             return True
         return False
     
+    def _run(self, config: Dict, command: str, timeout: int = 10,
+             connect_timeout: int = 10) -> Tuple[str, str, int]:
+        """Executa comando na sessão SSH compartilhada do dispositivo"""
+        return mikrotik_pool.run(config['ip'], config['port'], config['user'], config['password'],
+                                 command, timeout=timeout, connect_timeout=connect_timeout)
+    
+    def _run_batch(self, config: Dict, commands: List[str], timeout: int = 60,
+                   connect_timeout: int = 10) -> List[Tuple[str, str, int]]:
+        """Executa vários comandos num único script RouterOS na sessão do dispositivo"""
+        return mikrotik_pool.run_batch(config['ip'], config['port'], config['user'], config['password'],
+                                       commands, timeout=timeout, connect_timeout=connect_timeout)
+    
     def test_connection(self, config: Dict) -> Tuple[bool, str]:
         """Testa conexão SSH com dispositivo"""
         if not PARAMIKO_AVAILABLE:
@@ -104,33 +132,18 @@ class MikroTikConfig:
             return False, "Dispositivo desabilitado"
         
         try:
-            # Primeiro teste básico de conectividade
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(3)
-            result = sock.connect_ex((config['ip'], config['port']))
-            sock.close()
-            
-            if result != 0:
-                return False, "Porta SSH não acessível"
-            
-            # Teste SSH
-            ssh = paramiko.SSHClient()
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            ssh.connect(
-                config['ip'],
-                port=config['port'],
-                username=config['user'],
-                password=config['password'],
-                timeout=5,
-                allow_agent=False,
-                look_for_keys=False
-            )
+            # Primeiro teste básico de conectividade (dispensável se já há sessão aberta)
+            if not mikrotik_pool.has_session(config['ip'], config['port'], config['user']):
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                sock.settimeout(3)
+                result = sock.connect_ex((config['ip'], config['port']))
+                sock.close()
+                
+                if result != 0:
+                    return False, "Porta SSH não acessível"
             
             # Teste comando simples
-            stdin, stdout, stderr = ssh.exec_command(":put \"test\"", timeout=5)
-            output = stdout.read().decode().strip()
-            
-            ssh.close()
+            output, _, _ = self._run(config, ":put \"test\"", timeout=5, connect_timeout=5)
             
             if "test" in output:
                 return True, "Conexão estabelecida"
@@ -159,23 +172,7 @@ class MikroTikConfig:
             return False, "Dispositivo desabilitado"
         
         try:
-            ssh = paramiko.SSHClient()
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            ssh.connect(
-                config['ip'],
-                port=config['port'],
-                username=config['user'],
-                password=config['password'],
-                timeout=10,
-                allow_agent=False,
-                look_for_keys=False
-            )
-            
-            stdin, stdout, stderr = ssh.exec_command(command, timeout=30)
-            output = stdout.read().decode().strip()
-            error = stderr.read().decode().strip()
-            
-            ssh.close()
+            output, error, _ = self._run(config, command, timeout=30)
             
             if error:
                 return False, f"Erro: {error}"
@@ -185,8 +182,14 @@ class MikroTikConfig:
         except Exception as e:
             return False, f"Erro ao executar comando: {str(e)}"
     
-    def sync_device(self, name: str, routes: List[Dict]) -> Tuple[bool, str]:
-        """Sincroniza rotas com dispositivo MikroTik específico"""
+    def sync_device(self, name: str, routes: List[Dict],
+                    cancel: Optional[threading.Event] = None) -> Tuple[bool, str]:
+        """Sincroniza rotas com dispositivo MikroTik específico
+        
+        Com `cancel` (usado por iter_sync_routes quando o prazo estoura), o
+        evento é verificado entre consulta, alteração e gravação: um dispositivo
+        cancelado para antes de escrever no roteador ou na configuração.
+        """
         if not PARAMIKO_AVAILABLE:
             return False, "Paramiko não disponível"
             
@@ -197,83 +200,172 @@ class MikroTikConfig:
         if not config.get('enabled', True):
             return False, "Dispositivo desabilitado"
         
+        cancel = cancel or threading.Event()
+        cancelled_result = (False, "Sincronização cancelada: tempo limite excedido")
+        
         try:
-            ssh = paramiko.SSHClient()
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            ssh.connect(
-                config['ip'],
-                port=config['port'],
-                username=config['user'],
-                password=config['password'],
-                timeout=15,
-                allow_agent=False,
-                look_for_keys=False
-            )
+            # Estado atual do roteador numa única consulta
+            current = self._fetch_routes(config)
+            to_remove, to_add = self.diff_routes(current, routes)
+            
+            if cancel.is_set():
+                return cancelled_result
             
-            # Verificar se rota padrão para 10.0.10.7 já existe
-            gateway_ip = "10.0.10.7"
+            if not to_remove and not to_add:
+                self.devices[name]['last_sync'] = datetime.now().isoformat()
+                self.save_config()
+                return True, f"Rotas já sincronizadas ({len(current)} rotas)"
             
-            # Primeiro, verificar conectividade com o gateway
-            test_cmd = f"/ping {gateway_ip} count=2"
-            stdin, stdout, stderr = ssh.exec_command(test_cmd, timeout=10)
-            ping_result = stdout.read().decode().strip()
+            # Verificar conectividade com o gateway antes de alterar rotas
+            test_cmd = f"/ping {VPN_GATEWAY} count=2"
+            ping_result, _, _ = self._run(config, test_cmd, timeout=10, connect_timeout=15)
             
             if "timeout" in ping_result.lower():
-                ssh.close()
-                return False, f"Gateway {gateway_ip} não acessível do dispositivo"
+                return False, f"Gateway {VPN_GATEWAY} não acessível do dispositivo"
             
-            # Remover rotas VPN antigas
-            remove_cmd = '/ip route remove [find comment="vpn-gateway"]'
-            stdin, stdout, stderr = ssh.exec_command(remove_cmd, timeout=10)
-            stdout.read()  # Aguardar conclusão
+            if cancel.is_set():
+                return cancelled_result
             
-            # Adicionar novas rotas
-            success_count = 0
-            error_messages = []
+            # Só as diferenças, num único script: remoções primeiro, depois adições
+            commands = [f'/ip route remove [find comment="{comment}"]' for comment in to_remove]
+            for network in to_add:  # já normalizadas por diff_routes
+                commands.append(f'/ip route add dst-address={network} gateway={VPN_GATEWAY} '
+                                f'comment="{self._route_comment(network)}" distance=1')
             
-            for route in routes:
-                network = route['network']
-                comment = f"vpn-gateway-{network.replace('/', '_')}"
-                
-                # Comando para adicionar rota
-                add_cmd = f'/ip route add dst-address={network} gateway={gateway_ip} comment="{comment}" distance=1'
-                
-                stdin, stdout, stderr = ssh.exec_command(add_cmd, timeout=10)
-                error_output = stderr.read().decode().strip()
-                
-                if error_output:
-                    if "already have" not in error_output.lower():  # Ignorar se rota já existe
-                        error_messages.append(f"Rota {network}: {error_output}")
-                else:
-                    success_count += 1
+            results = self._run_batch(config, commands, timeout=60)
+            
+            error_messages = []
+            for command, (_, error_output, exit_code) in zip(commands, results):
+                if exit_code != 0:
+                    error_messages.append(f"{command}: {error_output}")
             
-            ssh.close()
+            # As alterações já foram aplicadas, mas quem estourou o prazo não grava mais a configuração
+            if cancel.is_set():
+                return False, "Tempo limite excedido após aplicar as alterações no roteador"
             
             # Atualizar timestamp de sincronização
             self.devices[name]['last_sync'] = datetime.now().isoformat()
             self.save_config()
             
-            if success_count > 0:
-                return True, f"Sincronizado: {success_count} rotas. Erros: {len(error_messages)}"
+            if not error_messages:
+                return True, f"Sincronizado: {len(to_add)} rotas adicionadas, {len(to_remove)} removidas"
             else:
                 error_summary = "; ".join(error_messages[:3])  # Primeiros 3 erros
-                return False, f"Nenhuma rota sincronizada. Erros: {error_summary}"
+                return False, (f"Sincronização parcial: {len(commands) - len(error_messages)} de "
+                               f"{len(commands)} alterações aplicadas. Erros: {error_summary}")
                 
         except Exception as e:
             return False, f"Erro ao sincronizar {name}: {str(e)}"
     
-    def sync_routes(self, routes: List[Dict]) -> Dict[str, Tuple[bool, str]]:
+    @staticmethod
+    def _normalize_network(network: str) -> str:
+        """Forma canônica da rede, como o RouterOS a reporta (192.168.5.5/24 -> 192.168.5.0/24)"""
+        try:
+            return str(ipaddress.ip_network(network.strip(), strict=False))
+        except ValueError:
+            return network
+    
+    @staticmethod
+    def _route_comment(network: str) -> str:
+        return f"{ROUTE_COMMENT_PREFIX}-{network.replace('/', '_')}"
+    
+    def diff_routes(self, current: List[Dict], routes: List[Dict]) -> Tuple[List[str], List[str]]:
+        """Compara as rotas VPN do roteador com as desejadas
+        
+        Retorna (comentários a remover, redes a adicionar). Uma rota é mantida
+        quando destino, gateway e comentário conferem e ela não está desabilitada;
+        qualquer divergência (inclusive duplicatas) vira remoção + adição.
+        """
+        desired = {}
+        for route in routes:
+            network = self._normalize_network(route['network'])
+            desired[self._route_comment(network)] = network
+        
+        by_comment = {}
+        for route in current:
+            by_comment.setdefault(route.get('comment', ''), []).append(route)
+        
+        to_remove = []
+        to_add = []
+        for comment, entries in by_comment.items():
+            network = desired.get(comment)
+            intact = (
+                network is not None and len(entries) == 1
+                and self._normalize_network(entries[0].get('dst-address', '')) == network
+                and entries[0].get('gateway', '').split('%')[0] == VPN_GATEWAY
+                and not entries[0].get('disabled')
+            )
+            if not intact:
+                to_remove.append(comment)
+                if network is not None:
+                    to_add.append(network)
+        
+        for comment, network in desired.items():
+            if comment not in by_comment:
+                to_add.append(network)
+        
+        return to_remove, to_add
+    
+    def sync_routes(self, routes: List[Dict], deadline: float = SYNC_DEADLINE_SECONDS) -> Dict[str, Tuple[bool, str]]:
         """Sincroniza rotas com todos os dispositivos habilitados"""
-        results = {}
+        return dict(self.iter_sync_routes(routes, deadline))
+    
+    def iter_sync_routes(self, routes: List[Dict],
+                         deadline: float = SYNC_DEADLINE_SECONDS) -> Iterator[Tuple[str, Tuple[bool, str]]]:
+        """Sincroniza todos os dispositivos em paralelo, entregando cada resultado assim que fica pronto
         
-        for name, config in self.devices.items():
+        Cada dispositivo tem `deadline` segundos a partir do início da sua própria
+        sincronização (o tempo na fila não conta); quem estoura o prazo é
+        reportado como falha sem que os demais esperem por ele, e sua
+        sincronização é cancelada antes da próxima escrita (ver sync_device).
+        """
+        enabled = []
+        for name, config in list(self.devices.items()):
             if config.get('enabled', True):
-                success, message = self.sync_device(name, routes)
-                results[name] = (success, message)
+                enabled.append(name)
             else:
-                results[name] = (False, "Dispositivo desabilitado")
+                yield name, (False, "Dispositivo desabilitado")
+        
+        if not enabled:
+            return
         
-        return results
+        started = {}
+        cancels = {name: threading.Event() for name in enabled}
+        
+        def sync(name):
+            started[name] = time.monotonic()
+            return self.sync_device(name, routes, cancels[name])
+        
+        executor = ThreadPoolExecutor(max_workers=min(SYNC_MAX_WORKERS, len(enabled)))
+        pending = {executor.submit(sync, name): name for name in enabled}
+        
+        try:
+            while pending:
+                # Dispositivos ainda na fila não consomem prazo; reavaliar pelo menos a cada segundo
+                now = time.monotonic()
+                deadlines = [started[name] + deadline for name in pending.values() if name in started]
+                timeout = min([1.0] + [max(0.0, at - now) for at in deadlines])
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                
+                for future in done:
+                    name = pending.pop(future)
+                    try:
+                        yield name, future.result()
+                    except Exception as e:
+                        yield name, (False, f"Erro ao sincronizar {name}: {str(e)}")
+                
+                now = time.monotonic()
+                for future, name in list(pending.items()):
+                    if name in started and now - started[name] >= deadline:
+                        del pending[future]
+                        cancels[name].set()
+                        yield name, (False, f"Tempo limite de sincronização excedido ({int(now - started[name])}s)")
+        finally:
+            # Não esperar dispositivos travados; as threads terminam pelos timeouts do SSH,
+            # e as que ainda não entregaram resultado não escrevem mais nada
+            for name in pending.values():
+                cancels[name].set()
+            executor.shutdown(wait=False, cancel_futures=True)
     
     def get_device_info(self, name: str) -> Optional[Dict]:
         """Obtém informações detalhadas de um dispositivo"""
@@ -304,24 +396,9 @@ class MikroTikConfig:
         
         config = self.devices[name]
         try:
-            ssh = paramiko.SSHClient()
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            ssh.connect(
-                config['ip'],
-                port=config['port'],
-                username=config['user'],
-                password=config['password'],
-                timeout=10
-            )
-            
             # Obter informações básicas
-            stdin, stdout, stderr = ssh.exec_command('/system resource print', timeout=10)
-            resource_output = stdout.read().decode().strip()
-            
-            stdin, stdout, stderr = ssh.exec_command('/system identity print', timeout=5)
-            identity_output = stdout.read().decode().strip()
-            
-            ssh.close()
+            resource_output, _, _ = self._run(config, '/system resource print', timeout=10)
+            identity_output, _, _ = self._run(config, '/system identity print', timeout=5)
             
             # Parse das informações
             info = {}
@@ -355,28 +432,12 @@ class MikroTikConfig:
         
         config = self.devices[name]
         try:
-            ssh = paramiko.SSHClient()
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            ssh.connect(
-                config['ip'],
-                port=config['port'],
-                username=config['user'],
-                password=config['password'],
-                timeout=10
-            )
-            
             # Criar backup
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_name = f"vpn_gateway_backup_{timestamp}"
             
             backup_cmd = f'/system backup save name={backup_name}'
-            stdin, stdout, stderr = ssh.exec_command(backup_cmd, timeout=30)
-            
-            # Aguardar conclusão
-            stdout.read()
-            error_output = stderr.read().decode().strip()
-            
-            ssh.close()
+            _, error_output, _ = self._run(config, backup_cmd, timeout=30)  # Aguardar conclusão
             
             if error_output:
                 return False, f"Erro no backup: {error_output}"
@@ -386,6 +447,25 @@ class MikroTikConfig:
         except Exception as e:
             return False, f"Erro ao criar backup: {str(e)}"
     
+    def _fetch_routes(self, config: Dict) -> List[Dict]:
+        """Lê as rotas VPN do dispositivo (formato terse, uma rota por linha)"""
+        routes_cmd = f'/ip route print terse where comment~"^{ROUTE_COMMENT_PREFIX}"'
+        routes_output, error, exit_code = self._run(config, routes_cmd, timeout=10)
+        if exit_code != 0:
+            raise RuntimeError(error or "falha ao listar rotas")
+        
+        routes = []
+        for line in routes_output.split('\n'):
+            fields = dict((key, value.strip('"')) for key, value in ROUTE_FIELD_RE.findall(line))
+            if 'dst-address' not in fields:
+                continue
+            # Flags vêm antes do primeiro campo chave=valor (X = desabilitada)
+            flags = line.split('=', 1)[0].rsplit(' ', 1)[0].split()[1:]
+            fields['disabled'] = fields.get('disabled') == 'yes' or any('X' in flag for flag in flags)
+            fields['raw'] = line.strip()
+            routes.append(fields)
+        return routes
+    
     def get_route_table(self, name: str) -> Tuple[bool, List[Dict]]:
         """Obtém tabela de rotas do dispositivo"""
         if not PARAMIKO_AVAILABLE or name not in self.devices:
@@ -393,34 +473,7 @@ class MikroTikConfig:
         
         config = self.devices[name]
         try:
-            ssh = paramiko.SSHClient()
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            ssh.connect(
-                config['ip'],
-                port=config['port'],
-                username=config['user'],
-                password=config['password'],
-                timeout=10
-            )
-            
-            # Obter rotas VPN
-            routes_cmd = '/ip route print where comment~"vpn-gateway"'
-            stdin, stdout, stderr = ssh.exec_command(routes_cmd, timeout=10)
-            routes_output = stdout.read().decode().strip()
-            
-            ssh.close()
-            
-            # Parse das rotas
-            routes = []
-            if routes_output:
-                lines = routes_output.split('\n')
-                for line in lines:
-                    if 'dst-address' in line and 'gateway' in line:
-                        # Parse básico da linha de rota
-                        route_info = {'raw': line.strip()}
-                        routes.append(route_info)
-            
-            return True, routes
+            return True, self._fetch_routes(config)
             
         except Exception as e:
             print(f"Erro ao obter rotas de {name}: {e}")
@@ -1,4 +1,3 @@
-import paramiko
 import json
 import socket
 import ipaddress
@@ -7,6 +6,9 @@ from typing import List, Dict, Optional, Tuple
 import logging
 import re
 
+from .mikrotik_ssh import mikrotik_pool
+from .mikrotik_cache import mikrotik_cache
+
 class MikroTikNAT:
     """Classe para gerenciamento de NAT/Port Forwarding no MikroTik via SSH"""
     
@@ -69,24 +71,12 @@ class MikroTikNAT:
     def _execute_command(self, command: str) -> Tuple[str, str, int]:
         """Executa comando SSH no MikroTik e retorna output, error e exit_code"""
         try:
-            ssh = paramiko.SSHClient()
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            ssh.connect(
-                hostname=self.host,
-                username=self.user,
-                password=self.password,
-                port=self.port,
-                timeout=self.timeout
+            # Sessão SSH reaproveitada do pool compartilhado (um handshake por roteador)
+            output, error, exit_code = mikrotik_pool.run(
+                self.host, self.port, self.user, self.password, command,
+                timeout=30, connect_timeout=self.timeout
             )
             
-            stdin, stdout, stderr = ssh.exec_command(command, timeout=30)
-            
-            output = stdout.read().decode('utf-8').strip()
-            error = stderr.read().decode('utf-8').strip()
-            exit_code = stdout.channel.recv_exit_status()
-            
-            ssh.close()
-            
             self.logger.info(f"Comando executado: {command}")
             self.logger.debug(f"Output: {output}")
             
@@ -96,25 +86,65 @@ class MikroTikNAT:
             self.logger.error(f"Erro na conexão SSH: {str(e)}")
             return "", str(e), 1
     
-    def _backup_config(self) -> bool:
-        """Cria backup da configuração antes de alterações"""
+    def _execute_batch(self, commands: List[str]) -> List[Tuple[str, str, int]]:
+        """Executa vários comandos num único script (uma ida e volta ao roteador)
+        
+        Em RouterOS sem :onerror os comandos rodam um a um, para que as mensagens
+        de erro do roteador continuem chegando ao usuário.
+        """
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_name = f"nat_backup_{timestamp}"
+            results = mikrotik_pool.run_batch(
+                self.host, self.port, self.user, self.password, commands,
+                timeout=30, connect_timeout=self.timeout, sequential_fallback=True
+            )
             
-            command = f"/system backup save name={backup_name}"
-            output, error, exit_code = self._execute_command(command)
+            self.logger.info(f"Lote executado: {len(commands)} comandos")
+            return results
             
-            if exit_code == 0:
-                self.logger.info(f"Backup criado: {backup_name}")
-                return True
-            else:
-                self.logger.error(f"Erro ao criar backup: {error}")
-                return False
-                
         except Exception as e:
-            self.logger.error(f"Erro ao criar backup: {str(e)}")
-            return False
+            self.logger.error(f"Erro na conexão SSH: {str(e)}")
+            return [("", str(e), 1) for _ in commands]
+    
+    def _backup_command(self) -> Tuple[str, str]:
+        """Nome e comando do backup feito antes de alterações"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        backup_name = f"nat_backup_{timestamp}"
+        return backup_name, f"/system backup save name={backup_name}"
+    
+    def _execute_with_backup(self, command: str) -> Tuple[str, str, int]:
+        """Cria o backup e executa a alteração no mesmo lote; retorna o resultado da alteração"""
+        backup_name, backup_command = self._backup_command()
+        (_, backup_error, backup_code), result = self._execute_batch([backup_command, command])
+        
+        if backup_code == 0:
+            self.logger.info(f"Backup criado: {backup_name}")
+        else:
+            self.logger.error(f"Erro ao criar backup: {backup_error}")
+            self.logger.warning("Falha ao criar backup, prosseguindo com a operação")
+        
+        self.logger.info(f"Comando executado: {command}")
+        return result
+    
+    def _invalidate(self):
+        """Descarta regras e índice de portas em cache após uma alteração"""
+        mikrotik_cache.invalidate(self.host, self.port, 'nat_rules', 'nat_ports')
+    
+    def _port_index(self) -> Dict[Tuple[str, str], Dict[str, str]]:
+        """Índice (porta externa, protocolo) -> regra, montado a partir das regras em cache"""
+        def build():
+            rules = mikrotik_cache.get(self.host, self.port, 'nat_rules', self._fetch_nat_rules)
+            if rules is None:
+                return None  # Leitura falhou: não guardar um índice vazio
+            index = {}
+            for rule in rules:
+                port = rule.get("dst_port")
+                if port:
+                    index.setdefault((port, rule.get("protocol", "").lower()), rule)
+            return index
+        index = mikrotik_cache.get(self.host, self.port, 'nat_ports', build)
+        if index is None:
+            raise RuntimeError("Não foi possível ler as regras NAT do roteador")
+        return index
     
     def _validate_ip(self, ip: str) -> bool:
         """Valida se o IP é válido e está na rede interna"""
@@ -152,17 +182,14 @@ class MikroTikNAT:
             if not self._validate_protocol(protocol):
                 return {"available": False, "reason": "Protocolo inválido (deve ser tcp ou udp)"}
             
-            # Listar regras NAT existentes
-            nat_rules = self.list_nat_rules()
-            
-            for rule in nat_rules:
-                if (rule.get("dst_port") == str(port) and 
-                    rule.get("protocol", "").lower() == protocol.lower()):
-                    return {
-                        "available": False, 
-                        "reason": f"Porta {port}/{protocol} já está em uso",
-                        "used_by": rule.get("comment", "Regra sem comentário")
-                    }
+            # Consultar índice de portas das regras NAT existentes
+            rule = self._port_index().get((str(port), protocol.lower()))
+            if rule:
+                return {
+                    "available": False, 
+                    "reason": f"Porta {port}/{protocol} já está em uso",
+                    "used_by": rule.get("comment", "Regra sem comentário")
+                }
             
             # Verificar se é porta reservada/sistema
             if port in self.RESERVED_PORTS:
@@ -186,6 +213,9 @@ class MikroTikNAT:
     def suggest_port(self, internal_port: int, protocol: str = "tcp") -> int:
         """Sugere uma porta externa disponível baseada na porta interna"""
         try:
+            # Sem as regras do roteador não há como sugerir (e evita repetir a leitura a cada porta)
+            self._port_index()
+            
             # Primeiro tentar a mesma porta
             check = self.check_port_available(internal_port, protocol)
             if check["available"]:
@@ -294,10 +324,6 @@ class MikroTikNAT:
             if not port_test["reachable"]:
                 self.logger.warning(f"Porta interna {internal_ip}:{internal_port} pode não estar ativa: {port_test['reason']}")
             
-            # Criar backup antes da alteração
-            if not self._backup_config():
-                self.logger.warning("Falha ao criar backup, prosseguindo com a operação")
-            
             # Gerar comentário se não fornecido
             if not comment:
                 service_name = self.KNOWN_SERVERS.get(internal_ip, "Servidor")
@@ -313,7 +339,8 @@ class MikroTikNAT:
                       f'action=dst-nat '
                       f'comment="{comment}"')
             
-            output, error, exit_code = self._execute_command(command)
+            output, error, exit_code = self._execute_with_backup(command)
+            self._invalidate()
             
             if exit_code == 0:
                 self.logger.info(f"Regra NAT criada: {external_port}->{internal_ip}:{internal_port} ({protocol})")
@@ -344,10 +371,6 @@ class MikroTikNAT:
                            protocol: Optional[str] = None, comment: Optional[str] = None) -> Dict[str, any]:
         """Remove regra de port forwarding"""
         try:
-            # Criar backup antes da alteração
-            if not self._backup_config():
-                self.logger.warning("Falha ao criar backup, prosseguindo com a operação")
-            
             # Construir comando baseado nos parâmetros fornecidos
             if rule_id:
                 # Remover por ID específico
@@ -361,7 +384,8 @@ class MikroTikNAT:
             else:
                 return {"success": False, "message": "É necessário fornecer rule_id, comment ou external_port+protocol"}
             
-            output, error, exit_code = self._execute_command(command)
+            output, error, exit_code = self._execute_with_backup(command)
+            self._invalidate()
             
             if exit_code == 0:
                 self.logger.info(f"Regra NAT removida: {rule_id or external_port or comment}")
@@ -376,13 +400,18 @@ class MikroTikNAT:
     
     def list_nat_rules(self) -> List[Dict[str, str]]:
         """Lista todas as regras NAT de port forwarding"""
+        rules = mikrotik_cache.get(self.host, self.port, 'nat_rules', self._fetch_nat_rules)
+        return [dict(rule) for rule in rules] if rules is not None else []
+    
+    def _fetch_nat_rules(self) -> Optional[List[Dict[str, str]]]:
+        """Lê as regras dstnat do roteador; None em caso de falha (não vai para o cache)"""
         try:
             command = '/ip firewall nat print detail without-paging where chain=dstnat'
             output, error, exit_code = self._execute_command(command)
             
             if exit_code != 0:
                 self.logger.error(f"Erro ao listar regras NAT: {error}")
-                return []
+                return None
             
             rules = []
             current_rule = {}
@@ -441,7 +470,7 @@ class MikroTikNAT:
             
         except Exception as e:
             self.logger.error(f"Erro ao listar regras NAT: {str(e)}")
-            return []
+            return None
     
     def get_nat_stats(self) -> Dict[str, any]:
         """Retorna estatísticas das regras NAT"""
@@ -490,6 +519,7 @@ class MikroTikNAT:
             command = f'/ip firewall nat {action} {rule_id}'
             
             output, error, exit_code = self._execute_command(command)
+            self._invalidate()
             
             if exit_code == 0:
                 status = "habilitada" if enable else "desabilitada"
@@ -0,0 +1,321 @@
+import re
+import time
+import socket
+import hashlib
+import threading
+import logging
+from typing import Dict, List, Tuple
+
+try:
+    import paramiko
+    PARAMIKO_AVAILABLE = True
+except ImportError:
+    PARAMIKO_AVAILABLE = False
+
+KEEPALIVE_SECONDS = 30          # Keepalive do transporte para o RouterOS não derrubar a sessão
+IDLE_TIMEOUT_SECONDS = 300      # Sessões sem uso há mais tempo que isso são fechadas
+MAX_CHANNELS_PER_DEVICE = 4     # Canais simultâneos por roteador (o RouterOS limita sessões)
+REAPER_INTERVAL_SECONDS = 60
+BATCH_MAX_BYTES = 32000         # Um script por exec; o pedido de exec precisa caber num pacote SSH (32KB)
+BATCH_MARKER = "#b"
+BATCH_MARKER_RE = re.compile(r'^#b:(\d+):(ok|err)$')
+ONERROR_MIN_VERSION = (7, 13)   # :onerror (com a mensagem de erro) existe a partir do RouterOS 7.13
+
+def compile_batch(commands: List[str], first_index: int = 0, capture_errors: bool = False) -> str:
+    """Monta um script RouterOS que executa os comandos em sequência
+    
+    Cada comando imprime um marcador com seu índice e resultado, de modo que
+    a saída de todos volte num único exec. Com capture_errors, usa :onerror
+    e imprime a mensagem do RouterOS antes do marcador de erro; senão usa
+    :do/on-error, que descarta a mensagem.
+    """
+    return "\n".join(_batch_line(command, index, capture_errors)
+                     for index, command in enumerate(commands, first_index))
+
+def _batch_line(command: str, index: int, capture_errors: bool = False) -> str:
+    if capture_errors:
+        return (f':onerror e in={{{command};:put "{BATCH_MARKER}:{index}:ok"}} '
+                f'do={{:put $e;:put "{BATCH_MARKER}:{index}:err"}}')
+    return f':do {{{command};:put "{BATCH_MARKER}:{index}:ok"}} on-error={{:put "{BATCH_MARKER}:{index}:err"}}'
+
+def parse_routeros_version(output: str) -> Tuple[int, int]:
+    """(major, minor) de uma versão como "7.14.2 (stable)"; (0, 0) se não reconhecida"""
+    match = re.search(r'(\d+)\.(\d+)', output or "")
+    return (int(match.group(1)), int(match.group(2))) if match else (0, 0)
+
+def parse_batch(output: str, error: str, count: int, first_index: int = 0) -> List[Tuple[str, str, int]]:
+    """Separa a saída de um script de compile_batch em (output, error, exit_code) por comando"""
+    results = {}
+    pending = []
+    for line in output.splitlines():
+        match = BATCH_MARKER_RE.match(line.strip())
+        if not match:
+            pending.append(line)
+            continue
+        index = int(match.group(1))
+        text = "\n".join(pending).strip()
+        if match.group(2) == 'ok':
+            results[index] = (text, "", 0)
+        else:
+            results[index] = (text, text or "Falha ao executar comando", 1)
+        pending = []
+
+    # Sem marcador: o script foi rejeitado (erro de sintaxe) ou interrompido antes do comando
+    leftover = error or "\n".join(pending).strip() or "Comando não executado"
+    return [results.get(index, ("", leftover, 1)) for index in range(first_index, first_index + count)]
+
+def chunk_batch(commands: List[str], max_bytes: int = BATCH_MAX_BYTES,
+                capture_errors: bool = False) -> List[List[str]]:
+    """Divide os comandos em scripts que respeitam o limite de tamanho do exec"""
+    chunks = []
+    current = []
+    size = 0
+    for index, command in enumerate(commands):
+        cost = len(_batch_line(command, index, capture_errors).encode()) + 1
+        if current and size + cost > max_bytes:
+            chunks.append(current)
+            current = []
+            size = 0
+        current.append(command)
+        size += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+class MikroTikSSHPool:
+    """Pool de conexões SSH persistentes, uma por dispositivo, compartilhado por todas as sessões"""
+
+    def __init__(self, max_channels: int = MAX_CHANNELS_PER_DEVICE,
+                 idle_timeout: float = IDLE_TIMEOUT_SECONDS):
+        self.max_channels = max_channels
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._reaper = None
+        self.logger = logging.getLogger(__name__)
+
+    def _entry(self, key: Tuple) -> Dict:
+        """Estado de um dispositivo: cliente, trava de conexão e limite de canais"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = {
+                    'client': None,
+                    'secret': None,
+                    'connect_lock': threading.Lock(),
+                    'channels': threading.BoundedSemaphore(self.max_channels),
+                    'last_used': time.monotonic(),
+                    'in_flight': 0,
+                    'onerror': None,
+                    'connects': 0,
+                    'commands': 0
+                }
+            return entry
+
+    def _client(self, entry: Dict, host: str, port: int, user: str, password: str,
+                connect_timeout: float):
+        """Retorna o cliente conectado do dispositivo, fazendo o handshake só quando necessário"""
+        secret = hashlib.sha256(password.encode()).hexdigest() if password else None
+
+        with entry['connect_lock']:
+            client = entry['client']
+            if client is not None:
+                transport = client.get_transport()
+                if transport is not None and transport.is_active() and entry['secret'] == secret:
+                    return client
+                self._close_client(entry)
+
+            client = paramiko.SSHClient()
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            client.connect(
+                host,
+                port=port,
+                username=user,
+                password=password,
+                timeout=connect_timeout,
+                banner_timeout=connect_timeout,
+                auth_timeout=connect_timeout,
+                allow_agent=False,
+                look_for_keys=False
+            )
+            client.get_transport().set_keepalive(KEEPALIVE_SECONDS)
+
+            entry['client'] = client
+            entry['secret'] = secret
+            entry['connects'] += 1
+            self.logger.info(f"Sessão SSH aberta com {host}:{port}")
+            self._start_reaper()
+            return client
+
+    def run(self, host: str, port: int, user: str, password: str, command: str,
+            timeout: float = 30, connect_timeout: float = 10) -> Tuple[str, str, int]:
+        """Executa um comando num canal da sessão do dispositivo; retorna (output, error, exit_code)
+
+        Exceções de conexão/autenticação são propagadas para o chamador. Se a
+        sessão reaproveitada tiver caído antes do envio do comando, reconecta e
+        tenta uma vez mais; depois que o exec foi enviado não há nova tentativa,
+        pois o comando pode já ter sido aplicado no roteador.
+        """
+        if not PARAMIKO_AVAILABLE:
+            raise RuntimeError("Paramiko não disponível")
+
+        entry = self._entry((host, int(port), user))
+        if not entry['channels'].acquire(timeout=timeout):
+            raise TimeoutError(f"Limite de {self.max_channels} canais simultâneos em {host} atingido")
+
+        # Contado antes de obter o cliente: evict_idle nunca fecha uma sessão com comando em andamento
+        with self._lock:
+            entry['in_flight'] += 1
+            entry['last_used'] = time.monotonic()
+
+        try:
+            for attempt in range(2):
+                client = self._client(entry, host, int(port), user, password, connect_timeout)
+                try:
+                    transport = client.get_transport()
+                    if transport is None:
+                        raise paramiko.SSHException("Sessão SSH fechada")
+                    channel = transport.open_session(timeout=timeout)
+                    break
+                except (paramiko.SSHException, EOFError, OSError) as e:
+                    # Sessão caiu entre usos (reboot, timeout do roteador): reconectar uma vez
+                    self._drop_client(entry, client)
+                    if attempt or isinstance(e, socket.timeout):
+                        raise
+                    self.logger.warning(f"Sessão SSH com {host} caiu, reconectando: {e}")
+
+            try:
+                channel.settimeout(timeout)
+                channel.exec_command(command)
+                output = channel.makefile('r').read().decode('utf-8', errors='replace').strip()
+                error = channel.makefile_stderr('r').read().decode('utf-8', errors='replace').strip()
+                exit_code = channel.recv_exit_status()
+            except (paramiko.SSHException, EOFError, OSError):
+                # O comando pode já ter rodado: descarta a sessão, mas não repete (escritas não são idempotentes)
+                self._drop_client(entry, client)
+                raise
+            finally:
+                channel.close()
+
+            entry['commands'] += 1
+            return output, error, exit_code
+        finally:
+            with self._lock:
+                entry['in_flight'] -= 1
+                entry['last_used'] = time.monotonic()
+            entry['channels'].release()
+
+    def captures_errors(self, host: str, port: int, user: str, password: str,
+                        connect_timeout: float = 10) -> bool:
+        """Indica se o RouterOS do dispositivo tem :onerror (consultado uma vez por dispositivo)"""
+        entry = self._entry((host, int(port), user))
+        if entry['onerror'] is None:
+            output, _, _ = self.run(host, port, user, password, ':put [/system resource get version]',
+                                    timeout=10, connect_timeout=connect_timeout)
+            entry['onerror'] = parse_routeros_version(output) >= ONERROR_MIN_VERSION
+        return entry['onerror']
+
+    def run_batch(self, host: str, port: int, user: str, password: str, commands: List[str],
+                  timeout: float = 60, connect_timeout: float = 10,
+                  sequential_fallback: bool = False) -> List[Tuple[str, str, int]]:
+        """Executa vários comandos num único script RouterOS; retorna um resultado por comando
+        
+        Um comando que falha não interrompe os seguintes. Listas grandes demais
+        para um exec são divididas em poucos scripts (ver BATCH_MAX_BYTES).
+        Em RouterOS sem :onerror a mensagem de erro se perde; com
+        sequential_fallback os comandos rodam um a um nesses dispositivos,
+        preservando o stderr de cada um (para lotes curtos de alterações).
+        """
+        capture_errors = self.captures_errors(host, port, user, password, connect_timeout)
+        if not capture_errors and sequential_fallback:
+            return [self.run(host, port, user, password, command, timeout=timeout,
+                             connect_timeout=connect_timeout) for command in commands]
+
+        results = []
+        for chunk in chunk_batch(commands, capture_errors=capture_errors):
+            script = compile_batch(chunk, len(results), capture_errors)
+            output, error, _ = self.run(host, port, user, password, script,
+                                        timeout=timeout, connect_timeout=connect_timeout)
+            results.extend(parse_batch(output, error, len(chunk), len(results)))
+        return results
+
+    def has_session(self, host: str, port: int, user: str) -> bool:
+        """Indica se há uma sessão ativa reaproveitável para o dispositivo"""
+        with self._lock:
+            entry = self._entries.get((host, int(port), user))
+        if not entry or entry['client'] is None:
+            return False
+        transport = entry['client'].get_transport()
+        return transport is not None and transport.is_active()
+
+    def _drop_client(self, entry: Dict, client):
+        """Fecha o cliente com falha, se outra thread ainda não o substituiu"""
+        with entry['connect_lock']:
+            if entry['client'] is client:
+                self._close_client(entry)
+
+    def _close_client(self, entry: Dict):
+        try:
+            if entry['client'] is not None:
+                entry['client'].close()
+        except Exception:
+            pass
+        entry['client'] = None
+        entry['secret'] = None
+
+    def close(self, host: str = None):
+        """Fecha as sessões de um dispositivo (ou de todos)"""
+        with self._lock:
+            entries = [entry for key, entry in self._entries.items() if host is None or key[0] == host]
+        for entry in entries:
+            with entry['connect_lock']:
+                self._close_client(entry)
+
+    def evict_idle(self) -> int:
+        """Fecha sessões sem comandos em andamento e ociosas há mais de idle_timeout segundos"""
+        with self._lock:
+            entries = list(self._entries.values())
+
+        closed = 0
+        for entry in entries:
+            # connect_lock impede que um run() obtenha o cliente enquanto decidimos
+            with entry['connect_lock']:
+                with self._lock:
+                    idle = (entry['in_flight'] == 0
+                            and time.monotonic() - entry['last_used'] >= self.idle_timeout)
+                if entry['client'] is None or not idle:
+                    continue
+                self._close_client(entry)
+                closed += 1
+        return closed
+
+    def _start_reaper(self):
+        with self._lock:
+            if self._reaper and self._reaper.is_alive():
+                return
+            self._reaper = threading.Thread(target=self._run_reaper, name='mikrotik-ssh-reaper', daemon=True)
+            self._reaper.start()
+
+    def _run_reaper(self):
+        while True:
+            time.sleep(REAPER_INTERVAL_SECONDS)
+            try:
+                self.evict_idle()
+            except Exception as e:
+                self.logger.error(f"Erro ao encerrar sessões SSH ociosas: {e}")
+
+    def stats(self) -> Dict:
+        """Contadores por dispositivo (handshakes e comandos executados)"""
+        with self._lock:
+            items = list(self._entries.items())
+        return {
+            f"{host}:{port}": {
+                'connected': self.has_session(host, port, user),
+                'connects': entry['connects'],
+                'commands': entry['commands']
+            }
+            for (host, port, user), entry in items
+        }
+
+# Pool global compartilhado pelos componentes MikroTik
+mikrotik_pool = MikroTikSSHPool()
@@ -1,4 +1,3 @@
-import paramiko
 import json
 import secrets
 import string
@@ -7,6 +6,9 @@ from datetime import datetime
 from typing import List, Dict, Optional, Tuple
 import logging
 
+from .mikrotik_ssh import mikrotik_pool
+from .mikrotik_cache import mikrotik_cache
+
 class MikroTikVPN:
     """Classe para gerenciamento de usuários VPN no MikroTik via SSH"""
     
@@ -46,24 +48,12 @@ class MikroTikVPN:
     def _execute_command(self, command: str) -> Tuple[str, str, int]:
         """Executa comando SSH no MikroTik e retorna output, error e exit_code"""
         try:
-            ssh = paramiko.SSHClient()
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            ssh.connect(
-                hostname=self.host,
-                username=self.user,
-                password=self.password,
-                port=self.port,
-                timeout=self.timeout
+            # Sessão SSH reaproveitada do pool compartilhado (um handshake por roteador)
+            output, error, exit_code = mikrotik_pool.run(
+                self.host, self.port, self.user, self.password, command,
+                timeout=30, connect_timeout=self.timeout
             )
             
-            stdin, stdout, stderr = ssh.exec_command(command, timeout=30)
-            
-            output = stdout.read().decode('utf-8').strip()
-            error = stderr.read().decode('utf-8').strip()
-            exit_code = stdout.channel.recv_exit_status()
-            
-            ssh.close()
-            
             self.logger.info(f"Comando executado: {command}")
             self.logger.debug(f"Output: {output}")
             
@@ -73,25 +63,52 @@ class MikroTikVPN:
             self.logger.error(f"Erro na conexão SSH: {str(e)}")
             return "", str(e), 1
     
-    def _backup_config(self) -> bool:
-        """Cria backup da configuração antes de alterações"""
+    def _execute_batch(self, commands: List[str]) -> List[Tuple[str, str, int]]:
+        """Executa vários comandos num único script (uma ida e volta ao roteador)
+        
+        Em RouterOS sem :onerror os comandos rodam um a um, para que as mensagens
+        de erro do roteador continuem chegando ao usuário.
+        """
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_name = f"vpn_backup_{timestamp}"
+            results = mikrotik_pool.run_batch(
+                self.host, self.port, self.user, self.password, commands,
+                timeout=30, connect_timeout=self.timeout, sequential_fallback=True
+            )
             
-            command = f"/system backup save name={backup_name}"
-            output, error, exit_code = self._execute_command(command)
+            self.logger.info(f"Lote executado: {len(commands)} comandos")
+            return results
             
-            if exit_code == 0:
-                self.logger.info(f"Backup criado: {backup_name}")
-                return True
-            else:
-                self.logger.error(f"Erro ao criar backup: {error}")
-                return False
-                
         except Exception as e:
-            self.logger.error(f"Erro ao criar backup: {str(e)}")
-            return False
+            self.logger.error(f"Erro na conexão SSH: {str(e)}")
+            return [("", str(e), 1) for _ in commands]
+    
+    def _backup_command(self) -> Tuple[str, str]:
+        """Nome e comando do backup feito antes de alterações"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        backup_name = f"vpn_backup_{timestamp}"
+        return backup_name, f"/system backup save name={backup_name}"
+    
+    def _execute_with_backup(self, command: str) -> Tuple[str, str, int]:
+        """Cria o backup e executa a alteração no mesmo lote; retorna o resultado da alteração"""
+        backup_name, backup_command = self._backup_command()
+        (_, backup_error, backup_code), result = self._execute_batch([backup_command, command])
+        
+        if backup_code == 0:
+            self.logger.info(f"Backup criado: {backup_name}")
+        else:
+            self.logger.error(f"Erro ao criar backup: {backup_error}")
+            self.logger.warning("Falha ao criar backup, prosseguindo com a operação")
+        
+        self.logger.info(f"Comando executado: {command}")
+        return result
+    
+    def _cached(self, kind: str, loader) -> List[Dict[str, str]]:
+        """Leitura via cache compartilhado; cópias para que quem chama possa alterar os dicts"""
+        items = mikrotik_cache.get(self.host, self.port, kind, loader)
+        return [dict(item) for item in items] if items is not None else []
+    
+    def _invalidate(self, *kinds: str):
+        mikrotik_cache.invalidate(self.host, self.port, *kinds)
     
     def generate_secure_password(self, length: int = 12) -> str:
         """Gera senha segura aleatória"""
@@ -161,15 +178,12 @@ class MikroTikVPN:
                 if not ipaddress.IPv4Address(ip_address) in network:
                     return {"success": False, "message": f"IP {ip_address} não está na faixa do site {site}"}
             
-            # Criar backup antes da alteração
-            if not self._backup_config():
-                self.logger.warning("Falha ao criar backup, prosseguindo com a operação")
-            
             # Construir comando para adicionar usuário
             profile = f"vpn_{site}"
             command = f'/ppp secret add name="{username}" password="{password}" profile="{profile}" remote-address="{ip_address}" comment="Adicionado via Dashboard - {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}"'
             
-            output, error, exit_code = self._execute_command(command)
+            output, error, exit_code = self._execute_with_backup(command)
+            self._invalidate('users')
             
             if exit_code == 0:
                 self.logger.info(f"Usuário VPN criado: {username} - IP: {ip_address}")
@@ -207,13 +221,10 @@ class MikroTikVPN:
             if not user_exists:
                 return {"success": False, "message": f"Usuário '{username}' não encontrado"}
             
-            # Criar backup antes da alteração
-            if not self._backup_config():
-                self.logger.warning("Falha ao criar backup, prosseguindo com a operação")
-            
             # Remover usuário
             command = f'/ppp secret remove [find name="{username}"]'
-            output, error, exit_code = self._execute_command(command)
+            output, error, exit_code = self._execute_with_backup(command)
+            self._invalidate('users', 'sessions')
             
             if exit_code == 0:
                 self.logger.info(f"Usuário VPN removido: {username}")
@@ -228,13 +239,17 @@ class MikroTikVPN:
     
     def list_users(self) -> List[Dict[str, str]]:
         """Lista todos os usuários VPN configurados"""
+        return self._cached('users', self._fetch_users)
+    
+    def _fetch_users(self) -> Optional[List[Dict[str, str]]]:
+        """Lê /ppp secret do roteador; None em caso de falha (não vai para o cache)"""
         try:
             command = '/ppp secret print detail without-paging'
             output, error, exit_code = self._execute_command(command)
             
             if exit_code != 0:
                 self.logger.error(f"Erro ao listar usuários: {error}")
-                return []
+                return None
             
             users = []
             current_user = {}
@@ -269,17 +284,21 @@ class MikroTikVPN:
             
         except Exception as e:
             self.logger.error(f"Erro ao listar usuários: {str(e)}")
-            return []
+            return None
     
     def get_active_connections(self) -> List[Dict[str, str]]:
         """Retorna conexões VPN ativas"""
+        return self._cached('sessions', self._fetch_active_connections)
+    
+    def _fetch_active_connections(self) -> Optional[List[Dict[str, str]]]:
+        """Lê /ppp active do roteador; None em caso de falha"""
         try:
             command = '/ppp active print detail without-paging'
             output, error, exit_code = self._execute_command(command)
             
             if exit_code != 0:
                 self.logger.error(f"Erro ao listar conexões ativas: {error}")
-                return []
+                return None
             
             connections = []
             current_connection = {}
@@ -314,7 +333,7 @@ class MikroTikVPN:
             
         except Exception as e:
             self.logger.error(f"Erro ao listar conexões ativas: {str(e)}")
-            return []
+            return None
     
     def get_user_stats(self, username: str) -> Dict[str, any]:
         """Retorna estatísticas de uso de um usuário específico"""
@@ -410,13 +429,10 @@ class MikroTikVPN:
             if not user_exists:
                 return {"success": False, "message": f"Usuário '{username}' não encontrado"}
             
-            # Criar backup antes da alteração
-            if not self._backup_config():
-                self.logger.warning("Falha ao criar backup, prosseguindo com a operação")
-            
             # Alterar senha
             command = f'/ppp secret set [find name="{username}"] password="{new_password}"'
-            output, error, exit_code = self._execute_command(command)
+            output, error, exit_code = self._execute_with_backup(command)
+            self._invalidate('users')
             
             if exit_code == 0:
                 self.logger.info(f"Senha alterada para usuário: {username}")
@@ -447,6 +463,7 @@ class MikroTikVPN:
             # Desconectar usuário
             command = f'/ppp active remove [find name="{username}"]'
             output, error, exit_code = self._execute_command(command)
+            self._invalidate('sessions')
             
             if exit_code == 0:
                 self.logger.info(f"Usuário desconectado: {username}")
@@ -6,6 +6,7 @@ import subprocess
 import os
 from datetime import datetime
 import time
+import contextlib
 
 class MockProcess:
     def __init__(self, pid):
@@ -40,6 +41,11 @@ class MockProcess:
     def cmdline(self):
         return ["claude-cli", "--model", "claude-3-sonnet"]
     
+    def ppid(self):
+        if self.pid == 1001:  # Simular órfão
+            return 0
+        return 1
+    
     def parent(self):
         if self.pid == 1001:  # Simular órfão
             return None
@@ -47,6 +53,12 @@ class MockProcess:
     
     def send_signal(self, signal):
         pass
+    
+    def oneshot(self):
+        return contextlib.nullcontext()
+    
+    def is_running(self):
+        return pid_exists(self.pid)
 
 class MockVirtualMemory:
     def __init__(self):
@@ -68,6 +80,8 @@ def process_iter(attrs):
             for attr in attrs:
                 if attr == 'pid':
                     proc_info['pid'] = proc.pid
+                elif attr == 'ppid':
+                    proc_info['ppid'] = proc.ppid()
                 elif attr == 'name':
                     proc_info['name'] = proc.name()
                 elif attr == 'username':
@@ -92,6 +106,14 @@ def process_iter(attrs):
 def Process(pid):
     return MockProcess(pid)
 
+def wait_procs(procs, timeout=None, callback=None):
+    """Mock wait_procs: todos os processos terminam imediatamente"""
+    procs = list(procs)
+    if callback:
+        for proc in procs:
+            callback(proc)
+    return procs, []
+
 def pid_exists(pid):
     return pid in [1001, 1002, 1003, 2001, 2002]
 
@@ -0,0 +1,304 @@
+import os
+import sqlite3
+import datetime
+import threading
+import subprocess
+
+from utils.git_reader import get_git_reader
+
+COMMIT_HISTORY_DB_PATH = "/srv/projects/shared/dashboard/data/commit_history.db"
+LOG_TIMEOUT = 600
+INSERT_BATCH = 2000
+WEEK_SECONDS = 7 * 86400
+MONDAY_OFFSET = 3 * 86400  # The epoch started on a Thursday
+
+# One record per commit, preceded by a record separator so numstat lines can follow it
+LOG_FORMAT = '%x1e%H%x1f%an%x1f%ae%x1f%at%x1f%s'
+
+def _git(repo_path, args, timeout=30):
+    """Run git and return stdout, or None on failure"""
+    try:
+        result = subprocess.run(['git'] + args, cwd=repo_path, capture_output=True, text=True, timeout=timeout)
+        return result.stdout.strip() if result.returncode == 0 else None
+    except (subprocess.TimeoutExpired, OSError):
+        return None
+
+def resolve_head(repo_path):
+    """HEAD commit sha, read from the refs when possible"""
+    try:
+        return get_git_reader(repo_path).resolve('HEAD')
+    except Exception:
+        return _git(repo_path, ['rev-parse', '--verify', '-q', 'HEAD'])
+
+class CommitHistory:
+    """Incremental per-repository commit cache with contributor and churn analytics.
+
+    The history of HEAD is stored in SQLite (one compact row per commit
+    plus per-file line counts). When HEAD moves forward only the new
+    commits are read with `git log --numstat old..new`; if history was
+    rewritten the repository is rebuilt. Builds run on a background
+    worker so callers can fall back to plain git until the cache is
+    current.
+    """
+
+    def __init__(self, db_path=COMMIT_HISTORY_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn = None
+        self._queue = []
+        self._queue_cond = threading.Condition()
+        self._thread = None
+        self._updating = set()
+
+    def _connect(self):
+        """Open the database lazily and create the schema"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS repos '
+                         '(repo_id INTEGER PRIMARY KEY, path TEXT UNIQUE, head TEXT, commits INTEGER DEFAULT 0)')
+            conn.execute('CREATE TABLE IF NOT EXISTS commits '
+                         '(repo_id INTEGER, sha TEXT, author TEXT, email TEXT, ts INTEGER, subject TEXT, '
+                         'insertions INTEGER, deletions INTEGER, files INTEGER, PRIMARY KEY (repo_id, sha))')
+            conn.execute('CREATE INDEX IF NOT EXISTS commits_by_time ON commits (repo_id, ts)')
+            conn.execute('CREATE TABLE IF NOT EXISTS file_changes '
+                         '(repo_id INTEGER, sha TEXT, path TEXT, insertions INTEGER, deletions INTEGER, '
+                         'PRIMARY KEY (repo_id, sha, path))')
+            conn.execute('CREATE INDEX IF NOT EXISTS file_changes_by_path ON file_changes (repo_id, path)')
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _repo_row(self, conn, repo_path):
+        return conn.execute('SELECT repo_id, head, commits FROM repos WHERE path = ?', (repo_path,)).fetchone()
+
+    # Updating
+
+    def is_current(self, repo_path):
+        """True when the cache already covers the current HEAD"""
+        head = resolve_head(repo_path)
+        with self._lock:
+            row = self._repo_row(self._connect(), repo_path)
+        return row is not None and head is not None and row[1] == head
+
+    def is_updating(self, repo_path):
+        with self._queue_cond:
+            return repo_path in self._updating or repo_path in self._queue
+
+    def schedule_update(self, repo_path):
+        """Queue an update on the background worker (non-blocking)"""
+        with self._queue_cond:
+            if repo_path not in self._queue and repo_path not in self._updating:
+                self._queue.append(repo_path)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='commit-history', daemon=True)
+                self._thread.start()
+            self._queue_cond.notify()
+
+    def _run(self):
+        """Worker loop updating queued repositories one at a time"""
+        while True:
+            with self._queue_cond:
+                while not self._queue:
+                    self._queue_cond.wait()
+                repo_path = self._queue.pop(0)
+                self._updating.add(repo_path)
+            try:
+                self.update(repo_path)
+            except Exception as e:
+                print(f"Error updating commit history for {repo_path}: {e}")
+            finally:
+                with self._queue_cond:
+                    self._updating.discard(repo_path)
+
+    def update(self, repo_path):
+        """Bring the cache up to the current HEAD, reading only new commits when possible"""
+        head = resolve_head(repo_path)
+
+        with self._lock:
+            conn = self._connect()
+            row = self._repo_row(conn, repo_path)
+            if row is None:
+                repo_id = conn.execute('INSERT INTO repos (path) VALUES (?)', (repo_path,)).lastrowid
+                conn.commit()
+                old_head = None
+            else:
+                repo_id, old_head, _ = row
+
+        if head is None:
+            # Empty repository (or unreadable): nothing to index
+            self._replace(repo_id, None, rebuild=True, records=[])
+            return
+        if head == old_head:
+            return
+
+        incremental = old_head is not None and subprocess.run(
+            ['git', 'merge-base', '--is-ancestor', old_head, head],
+            cwd=repo_path, capture_output=True, timeout=30
+        ).returncode == 0
+        rev_range = f'{old_head}..{head}' if incremental else head
+
+        self._replace(repo_id, head, rebuild=not incremental,
+                      records=self._read_log(repo_path, rev_range))
+
+    def _read_log(self, repo_path, rev_range):
+        """Stream `git log --numstat` and yield (commit, [(path, insertions, deletions)])"""
+        process = subprocess.Popen(
+            ['git', 'log', '--no-renames', '--numstat', f'--format={LOG_FORMAT}', rev_range, '--'],
+            cwd=repo_path, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True, encoding='utf-8', errors='replace'
+        )
+        timer = threading.Timer(LOG_TIMEOUT, process.kill)
+        timer.start()
+        try:
+            commit = None
+            changes = []
+            for line in process.stdout:
+                line = line.rstrip('\n')
+                if line.startswith('\x1e'):
+                    if commit:
+                        yield commit, changes
+                    sha, author, email, timestamp, subject = (line[1:].split('\x1f') + [''] * 5)[:5]
+                    commit = (sha, author, email, int(timestamp or 0), subject)
+                    changes = []
+                elif line and commit:
+                    parts = line.split('\t', 2)
+                    if len(parts) == 3:
+                        # Binary files report "-" for both counts
+                        insertions = int(parts[0]) if parts[0].isdigit() else 0
+                        deletions = int(parts[1]) if parts[1].isdigit() else 0
+                        changes.append((parts[2], insertions, deletions))
+            if commit:
+                yield commit, changes
+        finally:
+            timer.cancel()
+            process.stdout.close()
+            if process.wait() != 0:
+                raise RuntimeError(f"git log failed for {repo_path}")
+
+    def _replace(self, repo_id, head, rebuild, records):
+        """Write new commits in batches, then move the stored HEAD.
+
+        The log is streamed outside the lock and written a batch at a time,
+        so queries on other repositories aren't blocked by a long build.
+        Until the final step the stored HEAD doesn't match the repository,
+        so callers keep treating the cache as not current.
+        """
+        if rebuild:
+            with self._lock:
+                conn = self._connect()
+                conn.execute('UPDATE repos SET head = NULL, commits = 0 WHERE repo_id = ?', (repo_id,))
+                conn.execute('DELETE FROM commits WHERE repo_id = ?', (repo_id,))
+                conn.execute('DELETE FROM file_changes WHERE repo_id = ?', (repo_id,))
+                conn.commit()
+
+        commit_rows = []
+        change_rows = []
+
+        def flush():
+            with self._lock:
+                conn = self._connect()
+                conn.executemany('INSERT OR REPLACE INTO commits VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', commit_rows)
+                conn.executemany('INSERT OR REPLACE INTO file_changes VALUES (?, ?, ?, ?, ?)', change_rows)
+                conn.commit()
+            commit_rows.clear()
+            change_rows.clear()
+
+        for (sha, author, email, timestamp, subject), changes in records:
+            commit_rows.append((repo_id, sha, author, email, timestamp, subject,
+                                sum(c[1] for c in changes), sum(c[2] for c in changes), len(changes)))
+            change_rows.extend((repo_id, sha, path, ins, dels) for path, ins, dels in changes)
+            if len(commit_rows) >= INSERT_BATCH:
+                flush()
+        flush()
+
+        with self._lock:
+            conn = self._connect()
+            count = conn.execute('SELECT COUNT(*) FROM commits WHERE repo_id = ?', (repo_id,)).fetchone()[0]
+            conn.execute('UPDATE repos SET head = ?, commits = ? WHERE repo_id = ?', (head, count, repo_id))
+            conn.commit()
+
+    def forget(self, repo_path):
+        """Drop a repository from the cache"""
+        with self._lock:
+            conn = self._connect()
+            row = self._repo_row(conn, repo_path)
+            if row:
+                for table in ('commits', 'file_changes', 'repos'):
+                    conn.execute(f'DELETE FROM {table} WHERE repo_id = ?', (row[0],))
+                conn.commit()
+
+    # Queries (on whatever is cached; check is_current() first when freshness matters)
+
+    def _query(self, repo_path, sql, **params):
+        """Run a query with :repo_id bound to the repository, [] if it isn't cached"""
+        with self._lock:
+            conn = self._connect()
+            row = self._repo_row(conn, repo_path)
+            if row is None:
+                return []
+            return conn.execute(sql, dict(params, repo_id=row[0])).fetchall()
+
+    def commit_count(self, repo_path):
+        with self._lock:
+            row = self._repo_row(self._connect(), repo_path)
+        return row[2] if row else 0
+
+    def recent_commits(self, repo_path, limit=10):
+        """Newest commits first, as dicts"""
+        rows = self._query(repo_path, 'SELECT sha, author, ts, subject FROM commits WHERE repo_id = :repo_id '
+                                      'ORDER BY ts DESC, rowid LIMIT :limit', limit=limit)
+        return [{'sha': sha, 'author': author, 'timestamp': ts, 'subject': subject}
+                for sha, author, ts, subject in rows]
+
+    def contributors(self, repo_path):
+        """Commits per author name, like `git shortlog -sn`"""
+        rows = self._query(repo_path, 'SELECT author, COUNT(*) AS n FROM commits WHERE repo_id = :repo_id '
+                                      'GROUP BY author ORDER BY n DESC, author')
+        return [{'name': author, 'commits': commits} for author, commits in rows]
+
+    def top_authors(self, repo_path, limit=10, since=0):
+        """Authors ranked by commits, with lines added and removed"""
+        rows = self._query(repo_path,
+                           'SELECT author, COUNT(*) AS n, SUM(insertions), SUM(deletions) FROM commits '
+                           'WHERE repo_id = :repo_id AND ts >= :since GROUP BY author ORDER BY n DESC LIMIT :limit',
+                           since=since, limit=limit)
+        return [{'name': author, 'commits': commits, 'insertions': insertions or 0, 'deletions': deletions or 0}
+                for author, commits, insertions, deletions in rows]
+
+    def commits_per_week(self, repo_path, weeks=52):
+        """[{'week': Monday date, 'commits': n}] for the last `weeks` weeks, empty weeks included"""
+        current_week = (int(datetime.datetime.now().timestamp()) + MONDAY_OFFSET) // WEEK_SECONDS
+        first_week = current_week - weeks + 1
+        rows = self._query(repo_path,
+                           'SELECT (ts + :offset) / :week AS week_number, COUNT(*) FROM commits '
+                           'WHERE repo_id = :repo_id AND ts >= :since GROUP BY week_number',
+                           offset=MONDAY_OFFSET, week=WEEK_SECONDS,
+                           since=first_week * WEEK_SECONDS - MONDAY_OFFSET)
+        counts = dict(rows)
+        return [{
+            'week': datetime.datetime.utcfromtimestamp(week * WEEK_SECONDS - MONDAY_OFFSET).date(),
+            'commits': counts.get(week, 0)
+        } for week in range(first_week, current_week + 1)]
+
+    def churn_by_path(self, repo_path, limit=20, depth=None, since=0):
+        """Paths (or directories cut at `depth` components) ranked by lines changed"""
+        rows = self._query(repo_path,
+                           'SELECT f.path, COUNT(*), SUM(f.insertions), SUM(f.deletions) FROM file_changes f '
+                           'JOIN commits c ON c.repo_id = f.repo_id AND c.sha = f.sha '
+                           'WHERE f.repo_id = :repo_id AND c.ts >= :since GROUP BY f.path',
+                           since=since)
+        churn = {}
+        for path, changes, insertions, deletions in rows:
+            key = '/'.join(path.split('/')[:depth]) if depth else path
+            entry = churn.setdefault(key, {'path': key, 'commits': 0, 'insertions': 0, 'deletions': 0})
+            entry['commits'] += changes
+            entry['insertions'] += insertions or 0
+            entry['deletions'] += deletions or 0
+        ranked = sorted(churn.values(), key=lambda e: e['insertions'] + e['deletions'], reverse=True)
+        return ranked[:limit]
+
+# Shared commit history cache
+commit_history = CommitHistory()
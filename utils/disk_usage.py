@@ -0,0 +1,205 @@
+import os
+import json
+import time
+import threading
+
+DISK_USAGE_CACHE_PATH = "/srv/projects/shared/dashboard/data/disk_usage_cache.json"
+VENDORED_DIRS = {'node_modules', 'bower_components', 'vendor', 'venv', '.venv', 'env',
+                 '__pycache__', '.tox', '.mypy_cache', '.pytest_cache'}
+VENDORED_MAX_AGE = 24 * 3600  # Dependency trees are re-measured at least daily
+DEFAULT_TIME_BUDGET = 2.0
+CATEGORIES = ('worktree', 'git', 'vendored')
+
+def _empty_totals():
+    return dict.fromkeys(CATEGORIES, 0)
+
+def _add_totals(totals, other):
+    for category in CATEGORIES:
+        totals[category] += other.get(category, 0)
+
+class DiskUsage:
+    """Incremental disk usage of repositories, split into working tree, .git and vendored dirs.
+
+    Entries are grouped per repository. Every directory of the working
+    tree and of .git is cached with its mtime, the bytes of the files it
+    holds directly and the totals of its subtree; a directory is listed (and its files stat'ed) again only when
+    its mtime changed. Vendored directories (node_modules, venv, ...) are
+    cached as a single total that is reused while their top-level mtime
+    is unchanged, for up to VENDORED_MAX_AGE. When the time budget runs
+    out the remaining subtrees are filled in from the last known totals
+    and the result is flagged as partial.
+    """
+
+    def __init__(self, cache_path=DISK_USAGE_CACHE_PATH):
+        self.cache_path = cache_path
+        self._lock = threading.RLock()
+        self._entries = None
+        self._dirty = False
+
+    def _load(self):
+        with self._lock:
+            if self._entries is not None:
+                return
+            try:
+                with open(self.cache_path, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+            # Older caches were a flat {directory: entry} mapping; start over
+            if any('mtime' in entry for entry in self._entries.values()):
+                self._entries = {}
+
+    def save(self):
+        """Persist the cache atomically if it changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+                tmp_path = f"{self.cache_path}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self._entries, f)
+                os.replace(tmp_path, self.cache_path)
+                self._dirty = False
+            except OSError as e:
+                print(f"Error saving disk usage cache: {e}")
+
+    def _set_entry(self, entries, path, entry):
+        """Store an entry, marking the cache dirty only if mtime or totals changed"""
+        with self._lock:
+            if entries.get(path) == entry:
+                return
+            entries[path] = entry
+            self._dirty = True
+
+    def measure(self, repo_path, time_budget=DEFAULT_TIME_BUDGET, save=True):
+        """Return byte totals per category for a repository"""
+        self._load()
+        started = time.monotonic()
+        with self._lock:
+            entries = self._entries.setdefault(repo_path, {})
+        state = {'deadline': started + time_budget, 'partial': False, 'seen': set(), 'entries': entries}
+
+        totals = self._walk(repo_path, 'worktree', state, is_root=True)
+
+        # Forget directories that disappeared (only known after a complete walk)
+        if not state['partial']:
+            with self._lock:
+                stale = [path for path in entries if path not in state['seen']]
+                for path in stale:
+                    del entries[path]
+                if stale:
+                    self._dirty = True
+
+        if save:
+            self.save()
+
+        return {
+            'worktree_bytes': totals['worktree'],
+            'git_bytes': totals['git'],
+            'vendored_bytes': totals['vendored'],
+            'total_bytes': sum(totals.values()),
+            'partial': state['partial'],
+            'elapsed': time.monotonic() - started
+        }
+
+    def prune(self, repo_paths):
+        """Forget repositories that are no longer found by the scan"""
+        keep = set(repo_paths)
+        with self._lock:
+            self._load()
+            for path in [p for p in self._entries if p not in keep]:
+                del self._entries[path]
+                self._dirty = True
+
+    def _walk(self, path, category, state, is_root=False):
+        """Totals per category of one directory subtree, reusing cached listings"""
+        entries = state['entries']
+        entry = entries.get(path)
+
+        if time.monotonic() > state['deadline']:
+            state['partial'] = True
+            state['seen'].add(path)
+            return dict(entry['totals']) if entry else _empty_totals()
+
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return _empty_totals()
+
+        state['seen'].add(path)
+
+        if category == 'vendored':
+            if (entry and entry['mtime'] == mtime
+                    and time.time() - entry.get('time', 0) < VENDORED_MAX_AGE):
+                return dict(entry['totals'])
+            size, complete = self._vendored_size(path, state)
+            totals = _empty_totals()
+            totals['vendored'] = size
+            if complete:
+                self._set_entry(entries, path, {'mtime': mtime, 'totals': totals, 'time': time.time()})
+            elif entry:
+                # Keep the older figure if it is larger than what we managed to count
+                totals['vendored'] = max(size, entry['totals']['vendored'])
+            return totals
+
+        if entry is None or entry['mtime'] != mtime:
+            listing = self._list_dir(path)
+            if listing is None:
+                return dict(entry['totals']) if entry else _empty_totals()
+            files_bytes, subdirs = listing
+        else:
+            files_bytes, subdirs = entry['files_bytes'], entry['subdirs']
+
+        totals = _empty_totals()
+        totals[category] += files_bytes
+        for name in subdirs:
+            if is_root and name == '.git':
+                child_category = 'git'
+            elif category == 'worktree' and name in VENDORED_DIRS:
+                child_category = 'vendored'
+            else:
+                child_category = category
+            _add_totals(totals, self._walk(os.path.join(path, name), child_category, state))
+
+        self._set_entry(entries, path, {'mtime': mtime, 'files_bytes': files_bytes, 'subdirs': subdirs,
+                                        'totals': totals})
+        return totals
+
+    def _list_dir(self, path):
+        """Bytes of the files directly in a directory and its real subdirectories"""
+        files_bytes = 0
+        subdirs = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                        else:
+                            files_bytes += entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        continue
+        except OSError:
+            return None
+        return files_bytes, subdirs
+
+    def _vendored_size(self, path, state):
+        """Plain scandir walk of a dependency tree; returns (bytes, finished within budget)"""
+        total = 0
+        stack = [path]
+        while stack:
+            if time.monotonic() > state['deadline']:
+                state['partial'] = True
+                return total, False
+            current = stack.pop()
+            listing = self._list_dir(current)
+            if listing is None:
+                continue
+            files_bytes, subdirs = listing
+            total += files_bytes
+            stack.extend(os.path.join(current, name) for name in subdirs)
+        return total, True
+
+# Shared disk usage service for the repository scanner
+disk_usage = DiskUsage()
@@ -0,0 +1,221 @@
+import os
+import json
+import threading
+
+INDEX_DIR = "/srv/projects/shared/dashboard/data"
+
+class FileIndex:
+    """Persistent, incrementally refreshed index of files under a set of base paths.
+
+    Directory listings are cached together with the directory mtime, so a
+    rescan only lists directories whose entries changed. File metadata is
+    cached by path and rebuilt only when mtime, size or inode change.
+    """
+
+    VERSION = 1
+
+    def __init__(self, name, accept_file, build_info, max_depth, skip_dirs=(), skip_hidden=True,
+                 index_path=None):
+        self.name = name
+        self.accept_file = accept_file
+        self.build_info = build_info
+        self.max_depth = max_depth
+        self.skip_dirs = set(skip_dirs)
+        self.skip_hidden = skip_hidden
+        self.index_path = index_path or os.path.join(INDEX_DIR, f"{name}_index.json")
+        self._lock = threading.RLock()
+        self._dirs = {}
+        self._files = {}
+        self._loaded = False
+        self._dirty = False
+
+    def _load(self):
+        """Load the persisted index from disk"""
+        self._loaded = True
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == self.VERSION:
+                self._dirs = data.get('dirs', {})
+                self._files = data.get('files', {})
+        except (OSError, ValueError):
+            self._dirs = {}
+            self._files = {}
+
+    def save(self):
+        """Persist the index atomically if it changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+                tmp_path = f"{self.index_path}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({'version': self.VERSION, 'dirs': self._dirs, 'files': self._files}, f)
+                os.replace(tmp_path, self.index_path)
+                self._dirty = False
+            except OSError as e:
+                print(f"Error saving {self.name} index: {e}")
+
+    def _list_dir(self, path, mtime):
+        """List a directory, keeping only subdirectories to descend and accepted files"""
+        subdirs = []
+        files = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        continue
+
+                    if is_dir:
+                        # Like os.walk, never descend into symlinked directories
+                        if entry.is_symlink():
+                            continue
+                        if self.skip_hidden and entry.name.startswith('.'):
+                            continue
+                        if entry.name in self.skip_dirs:
+                            continue
+                        subdirs.append(entry.name)
+                    elif self.accept_file(entry.name):
+                        files.append(entry.name)
+        except (PermissionError, OSError):
+            return None
+
+        return {'mtime': mtime, 'subdirs': subdirs, 'files': files}
+
+    def _file_entry(self, file_path, base_path):
+        """Return cached info for a file, rebuilding it only when the file changed"""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+
+        cached = self._files.get(file_path)
+        if (cached and cached['mtime'] == stat.st_mtime and cached['size'] == stat.st_size
+                and cached['inode'] == stat.st_ino and cached['base'] == base_path):
+            return cached['info']
+
+        info = self.build_info(file_path, base_path)
+        if info is not None:
+            info['inode'] = stat.st_ino
+
+        self._files[file_path] = {
+            'mtime': stat.st_mtime,
+            'size': stat.st_size,
+            'inode': stat.st_ino,
+            'base': base_path,
+            'info': info
+        }
+        self._dirty = True
+        return info
+
+    def refresh_dir(self, path):
+        """Forget the cached listing of a directory so the next scan lists it again"""
+        with self._lock:
+            if self._dirs.pop(path, None) is not None:
+                self._dirty = True
+
+    def has_file(self, file_path):
+        """Whether a file is already part of the index"""
+        return file_path in self._files
+
+    def dir_changed(self, path):
+        """Whether a directory's entries changed since it was last listed"""
+        entry = self._dirs.get(path)
+        try:
+            return entry is None or entry['mtime'] != os.stat(path).st_mtime
+        except OSError:
+            return True
+
+    def directories(self):
+        """Directories listed by the last scan (the ones worth watching)"""
+        with self._lock:
+            return list(self._dirs)
+
+    def refresh_files(self, file_paths):
+        """Rebuild the info of known files in place, without walking the trees
+
+        Returns {path: info} for the given paths that are indexed (info is
+        None when the file no longer qualifies). The index isn't saved here;
+        the next scan persists the updated entries.
+        """
+        updated = {}
+        with self._lock:
+            for file_path in file_paths:
+                cached = self._files.get(file_path)
+                if cached is None:
+                    continue
+                info = self._file_entry(file_path, cached['base'])
+                updated[file_path] = dict(info) if info is not None else None
+        return updated
+
+    def forget_file(self, file_path):
+        """Forget cached info for a file so the next scan rebuilds it"""
+        with self._lock:
+            if self._files.pop(file_path, None) is not None:
+                self._dirty = True
+
+    def scan(self, base_paths):
+        """Walk the base paths incrementally and return the info of every indexed file"""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+
+            results = []
+            seen_dirs = set()
+            seen_files = set()
+
+            for base_path in base_paths:
+                base_path = os.path.expanduser(base_path)
+                if not os.path.isdir(base_path):
+                    continue
+
+                stack = [(base_path, 0)]
+                while stack:
+                    path, depth = stack.pop()
+                    # Same depth rule as the original os.walk scanners
+                    if path in seen_dirs or depth >= self.max_depth:
+                        continue
+
+                    try:
+                        mtime = os.stat(path).st_mtime
+                    except OSError:
+                        continue
+
+                    entry = self._dirs.get(path)
+                    if entry is None or entry['mtime'] != mtime:
+                        entry = self._list_dir(path, mtime)
+                        if entry is None:
+                            continue
+                        self._dirs[path] = entry
+                        self._dirty = True
+
+                    seen_dirs.add(path)
+
+                    for subdir in entry['subdirs']:
+                        stack.append((os.path.join(path, subdir), depth + 1))
+
+                    for file_name in entry['files']:
+                        file_path = os.path.join(path, file_name)
+                        if file_path in seen_files:
+                            continue
+                        seen_files.add(file_path)
+
+                        info = self._file_entry(file_path, base_path)
+                        if info is not None:
+                            results.append(dict(info))
+
+            # Drop entries that no longer exist under the scanned trees
+            for path in [p for p in self._dirs if p not in seen_dirs]:
+                del self._dirs[path]
+                self._dirty = True
+            for path in [p for p in self._files if p not in seen_files]:
+                del self._files[path]
+                self._dirty = True
+
+            self.save()
+
+        results.sort(key=lambda x: x['modified_timestamp'], reverse=True)
+        return results
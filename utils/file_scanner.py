@@ -3,60 +3,40 @@ import glob
 import datetime
 from pathlib import Path
 from collections import defaultdict
+from utils.file_index import FileIndex
+
+MARKDOWN_EXTENSIONS = ['.md', '.markdown', '.mdown', '.mkd', '.rst', '.txt']
+MARKDOWN_SKIP_DIRS = ['node_modules', '__pycache__', 'venv', '.env', 'dist', 'build', 'target', '.git']
+DEFAULT_MARKDOWN_PATHS = ['/srv/projects']  # Only scan /srv/projects
+
+def is_markdown_file_name(file_name):
+    """Check if a file name has a documentation extension"""
+    return os.path.splitext(file_name)[1].lower() in MARKDOWN_EXTENSIONS
+
+def build_markdown_info(file_path, base_path):
+    """Build the enriched info dict for a documentation file"""
+    info = get_file_info(file_path)
+    if info:
+        # Add project and category info
+        info = enrich_file_info(info, base_path)
+    return info
+
+# Persistent index reused across scans (and restarts)
+markdown_index = FileIndex(
+    'markdown',
+    accept_file=is_markdown_file_name,
+    build_info=build_markdown_info,
+    max_depth=8,  # Allow up to 8 levels for i9_smart structure
+    skip_dirs=MARKDOWN_SKIP_DIRS
+)
 
 def scan_markdown_files(base_paths=None):
     """Scan for markdown files in specified directories with improved depth"""
     if base_paths is None:
-        base_paths = ['/srv/projects']  # Only scan /srv/projects
+        base_paths = DEFAULT_MARKDOWN_PATHS
     
-    markdown_files = []
-    markdown_extensions = ['.md', '.markdown', '.mdown', '.mkd', '.rst', '.txt']
-    
-    for base_path in base_paths:
-        if not os.path.exists(base_path):
-            continue
-        
-        try:
-            # Walk through all directories
-            for root, dirs, files in os.walk(base_path):
-                # Skip hidden directories and common non-doc directories
-                dirs[:] = [d for d in dirs if not d.startswith('.') and 
-                          d not in ['node_modules', '__pycache__', 'venv', '.env', 
-                                   'dist', 'build', 'target', '.git']]
-                
-                # Check depth - allow up to 8 levels for i9_smart structure
-                depth = root.replace(base_path, '').count(os.sep)
-                if depth >= 8:
-                    dirs[:] = []  # Don't go deeper
-                    continue
-                
-                for file in files:
-                    # Check if file has documentation extension
-                    file_ext = os.path.splitext(file)[1].lower()
-                    if file_ext in markdown_extensions:
-                        file_path = os.path.join(root, file)
-                        info = get_file_info(file_path)
-                        if info:
-                            # Add project and category info
-                            info = enrich_file_info(info, base_path)
-                            markdown_files.append(info)
-        
-        except (PermissionError, OSError) as e:
-            print(f"Error scanning {base_path}: {e}")
-            continue
-    
-    # Remove duplicates
-    seen_paths = set()
-    unique_files = []
-    for file_info in markdown_files:
-        if file_info['path'] not in seen_paths:
-            seen_paths.add(file_info['path'])
-            unique_files.append(file_info)
-    
-    # Sort by modification time (newest first)
-    unique_files.sort(key=lambda x: x['modified_timestamp'], reverse=True)
-    
-    return unique_files
+    # Only directories whose mtime changed are listed again
+    return markdown_index.scan(base_paths)
 
 def enrich_file_info(info, base_path):
     """Add project and category information to file info"""
@@ -140,68 +120,44 @@ def determine_doc_type(filename):
     else:
         return 'Documentation'
 
+LOG_EXTENSIONS = ['.log', '.out', '.err', '.txt', '.access', '.error']
+LOG_SKIP_DIRS = ['node_modules', '__pycache__', '.git']
+DEFAULT_LOG_PATHS = [
+    '/srv/projects',  # Primary focus on projects
+    '/var/log'        # System logs if needed
+]
+
+def is_log_file_name(file_name):
+    """Check if a file name looks like a log file"""
+    return file_name.endswith(tuple(LOG_EXTENSIONS)) or 'log' in file_name.lower()
+
+def build_log_info(file_path, base_path):
+    """Build the info dict for a log file, or None if the content doesn't look like a log"""
+    try:
+        info = get_file_info(file_path)
+        if info and is_likely_log_file(file_path):
+            info['source'] = determine_log_source(file_path)
+            return info
+    except (PermissionError, OSError):
+        pass
+    return None
+
+# Persistent index reused across scans (and restarts)
+log_index = FileIndex(
+    'logs',
+    accept_file=is_log_file_name,
+    build_info=build_log_info,
+    max_depth=3,  # Limit depth to avoid too deep recursion
+    skip_dirs=LOG_SKIP_DIRS
+)
+
 def scan_log_files(base_paths=None):
     """Scan for log files in common directories"""
     if base_paths is None:
-        base_paths = [
-            '/srv/projects',  # Primary focus on projects
-            '/var/log'        # System logs if needed
-        ]
-    
-    log_files = []
-    log_patterns = ['*.log', '*.out', '*.err', '*.txt']
-    
-    for base_path in base_paths:
-        # Expand user path
-        base_path = os.path.expanduser(base_path)
-        
-        if not os.path.exists(base_path):
-            continue
-        
-        try:
-            # Search recursively but with depth limit
-            for root, dirs, files in os.walk(base_path):
-                # Limit depth to avoid too deep recursion
-                depth = root.replace(base_path, '').count(os.sep)
-                if depth >= 3:
-                    dirs[:] = []  # Don't recurse deeper
-                    continue
-                
-                # Skip certain directories
-                dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['node_modules', '__pycache__', '.git']]
-                
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    
-                    # Check if it matches log patterns or has log-like content
-                    if (any(file.endswith(ext[1:]) for ext in log_patterns) or
-                        'log' in file.lower() or
-                        file.endswith('.access') or
-                        file.endswith('.error')):
-                        
-                        try:
-                            info = get_file_info(file_path)
-                            if info and is_likely_log_file(file_path):
-                                info['source'] = determine_log_source(file_path)
-                                log_files.append(info)
-                        except (PermissionError, OSError):
-                            continue
-        
-        except (PermissionError, OSError):
-            continue
-    
-    # Remove duplicates and sort
-    seen_paths = set()
-    unique_files = []
-    for file_info in log_files:
-        if file_info['path'] not in seen_paths:
-            seen_paths.add(file_info['path'])
-            unique_files.append(file_info)
-    
-    # Sort by modification time (newest first)
-    unique_files.sort(key=lambda x: x['modified_timestamp'], reverse=True)
+        base_paths = DEFAULT_LOG_PATHS
     
-    return unique_files
+    # Content sniffing only happens for new or changed files
+    return log_index.scan(base_paths)
 
 def get_file_info(file_path):
     """Get detailed information about a file"""
@@ -385,8 +341,9 @@ def scan_directory_tree(path, max_depth=3, include_files=True):
     return scan_recursive(path)
 
 def search_files_content(search_term, file_paths, max_results=100):
-    """Search for content within files"""
+    """Search for content within files (linear scan; see utils.search_index for the indexed search)"""
     results = []
+    term = search_term.lower()
     
     for file_path in file_paths[:max_results]:  # Limit to avoid performance issues
         try:
@@ -394,8 +351,9 @@ def search_files_content(search_term, file_paths, max_results=100):
                 lines = f.readlines()
             
             # Search in lines
+            file_matches = 0
             for line_num, line in enumerate(lines, 1):
-                if search_term.lower() in line.lower():
+                if term in line.lower():
                     results.append({
                         'file': file_path,
                         'line_number': line_num,
@@ -404,7 +362,8 @@ def search_files_content(search_term, file_paths, max_results=100):
                     })
                     
                     # Limit matches per file
-                    if len([r for r in results if r['file'] == file_path]) >= 10:
+                    file_matches += 1
+                    if file_matches >= 10:
                         break
         
         except (OSError, UnicodeDecodeError):
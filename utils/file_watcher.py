@@ -0,0 +1,283 @@
+import os
+import time
+import threading
+
+from utils.file_scanner import markdown_index, log_index, DEFAULT_MARKDOWN_PATHS, DEFAULT_LOG_PATHS
+
+# watchdog is optional: without it the watcher only does periodic reconciles
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+class _IndexEventHandler(FileSystemEventHandler):
+    """Forwards filesystem events to the watcher"""
+
+    def __init__(self, watcher):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        if event.event_type in ('opened', 'closed', 'closed_no_write'):
+            return
+        self.watcher.notify(event.src_path, event.is_directory, event.event_type)
+        dest_path = getattr(event, 'dest_path', None)
+        if dest_path:
+            self.watcher.notify(dest_path, event.is_directory)
+
+class IndexWatcher:
+    """Keeps FileIndex snapshots fresh from filesystem events.
+
+    Events only mark an index as pending; the work runs on a worker
+    thread once events stop for `debounce_seconds` (or `max_delay_seconds`
+    after the first event of a burst). Content changes to files already in
+    the index only refresh those entries; anything else (files or
+    directories appearing, disappearing or moving) triggers a rescan. Every
+    `reconcile_seconds` each index is rescanned anyway, which also covers
+    trees the observer can't watch.
+
+    Only the directories the indexes actually list are watched, one
+    non-recursive watch each, so skipped trees (.git, node_modules, deeper
+    than max_depth) cost no inotify watches.
+    """
+
+    def __init__(self, debounce_seconds=2.0, max_delay_seconds=10.0, reconcile_seconds=600):
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.reconcile_seconds = reconcile_seconds
+        self._indexes = {}
+        self._snapshots = {}
+        self._versions = {}
+        self._pending = {}
+        self._last_scan = {}
+        self._scan_locks = {}
+        self._listeners = {}
+        self._cond = threading.Condition()
+        self._thread = None
+        self._observer = None
+        self._handler = None
+        self._watches = {}
+        self._watch_lock = threading.Lock()
+
+    def register(self, name, index, base_paths):
+        """Register an index and the base paths it covers"""
+        self._indexes[name] = (index, [os.path.expanduser(p) for p in base_paths])
+        self._versions[name] = 0
+        self._scan_locks[name] = threading.Lock()
+        self._listeners[name] = []
+
+    def add_listener(self, name, callback):
+        """Call `callback(files)` with every new snapshot of an index"""
+        self._listeners[name].append(callback)
+        if name in self._snapshots:
+            callback(self._snapshots[name])
+
+    def start(self):
+        """Start the observer and the rescan worker (idempotent)"""
+        with self._cond:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='index-watcher', daemon=True)
+            self._thread.start()
+        self._start_observer()
+
+    def _start_observer(self):
+        """Start the observer; watches are added as the indexes list directories"""
+        if Observer is None:
+            return
+
+        with self._watch_lock:
+            if self._observer is not None:
+                return
+            try:
+                observer = Observer()
+                observer.daemon = True
+                observer.start()
+                self._handler = _IndexEventHandler(self)
+                self._observer = observer
+            except Exception as e:
+                print(f"Error starting file watcher: {e}")
+                return
+        self._sync_watches()
+
+    def _sync_watches(self):
+        """Watch exactly the directories listed by the indexes (base paths included)"""
+        if self._observer is None:
+            return
+
+        wanted = set()
+        for index, base_paths in self._indexes.values():
+            wanted.update(p for p in base_paths if os.path.isdir(p))
+            wanted.update(index.directories())
+
+        with self._watch_lock:
+            for path in [p for p in self._watches if p not in wanted]:
+                try:
+                    self._observer.unschedule(self._watches.pop(path))
+                except Exception:
+                    pass
+
+            for path in sorted(wanted - set(self._watches)):
+                try:
+                    self._watches[path] = self._observer.schedule(self._handler, path, recursive=False)
+                except OSError as e:
+                    # e.g. inotify watch limit reached; periodic reconcile covers the rest
+                    print(f"Error watching {path}: {e}")
+                    break
+                except Exception:
+                    continue  # Directory vanished since the scan
+
+    def notify(self, path, is_directory=False, event_type=None):
+        """Mark every index covering `path` as pending a file refresh or a rescan"""
+        now = time.monotonic()
+        with self._cond:
+            for name, (index, base_paths) in self._indexes.items():
+                if not self._is_relevant(index, base_paths, path, is_directory):
+                    continue
+                # The parent directory reports "modified" on every write to a file in it
+                if event_type == 'modified' and is_directory and not index.dir_changed(path):
+                    continue
+                pending = self._pending.setdefault(name, {'first': now, 'rescan': False, 'files': set()})
+                pending['last'] = now
+                if event_type == 'modified' and not is_directory and index.has_file(path):
+                    # Appends to a known file (a growing log) only touch its own entry
+                    pending['files'].add(path)
+                else:
+                    pending['rescan'] = True
+            self._cond.notify()
+
+    def _is_relevant(self, index, base_paths, path, is_directory):
+        """Ignore events outside the index or inside skipped directories"""
+        for base_path in base_paths:
+            if path == base_path or path.startswith(base_path.rstrip(os.sep) + os.sep):
+                relative = os.path.relpath(path, base_path)
+                break
+        else:
+            return False
+
+        parts = relative.split(os.sep)
+        dir_parts = parts if is_directory else parts[:-1]
+        for part in dir_parts:
+            if part in index.skip_dirs or (index.skip_hidden and part.startswith('.')):
+                return False
+
+        # Directories are listed (and files indexed) only above max_depth
+        if len(parts) > index.max_depth or (not is_directory and len(dir_parts) >= index.max_depth):
+            return False
+
+        return is_directory or index.accept_file(parts[-1])
+
+    def _run(self):
+        """Worker loop: debounced rescans plus periodic reconcile"""
+        while True:
+            due = []
+            with self._cond:
+                now = time.monotonic()
+                timeout = self.reconcile_seconds
+
+                for name, pending in list(self._pending.items()):
+                    ready_at = min(pending['last'] + self.debounce_seconds,
+                                   pending['first'] + self.max_delay_seconds)
+                    if ready_at <= now:
+                        due.append((name, None if pending['rescan'] else pending['files']))
+                        del self._pending[name]
+                    else:
+                        timeout = min(timeout, ready_at - now)
+
+                due_names = [name for name, _ in due]
+                for name in self._indexes:
+                    reconcile_at = self._last_scan.get(name, now) + self.reconcile_seconds
+                    if reconcile_at <= now and name not in due_names:
+                        due.append((name, None))
+                    else:
+                        timeout = min(timeout, max(0.0, reconcile_at - now))
+
+                if not due:
+                    self._cond.wait(timeout)
+                    continue
+
+            for name, files in due:
+                if files is None:
+                    self.rescan(name)
+                else:
+                    self.refresh_files(name, files)
+
+    def rescan(self, name):
+        """Rescan one index now and publish the new snapshot"""
+        index, base_paths = self._indexes[name]
+        with self._scan_locks[name]:
+            try:
+                files = index.scan(base_paths)
+            except Exception as e:
+                print(f"Error rescanning {name} index: {e}")
+                files = self._snapshots.get(name, [])
+            with self._cond:
+                self._snapshots[name] = files
+                self._versions[name] += 1
+                self._last_scan[name] = time.monotonic()
+
+        self._sync_watches()
+        self._publish(name, files)
+        return files
+
+    def refresh_files(self, name, file_paths):
+        """Update the entries of changed files in the current snapshot, without a rescan"""
+        index, _ = self._indexes[name]
+        with self._scan_locks[name]:
+            try:
+                updated = index.refresh_files(file_paths)
+            except Exception as e:
+                print(f"Error refreshing {name} index: {e}")
+                return self._snapshots.get(name, [])
+            with self._cond:
+                current = self._snapshots.get(name)
+                if current is None or not updated:
+                    return current
+                files = []
+                for info in current:
+                    path = info['path']
+                    if path in updated:
+                        info = updated.pop(path)
+                    if info is not None:
+                        files.append(info)
+                # Files that only now qualify (e.g. a log that got its first timestamped line)
+                files.extend(info for info in updated.values() if info is not None)
+                files.sort(key=lambda x: x['modified_timestamp'], reverse=True)
+                self._snapshots[name] = files
+                self._versions[name] += 1
+
+        self._publish(name, files)
+        return files
+
+    def _publish(self, name, files):
+        for callback in self._listeners[name]:
+            try:
+                callback(files)
+            except Exception as e:
+                print(f"Error in {name} index listener: {e}")
+
+    def request_reconcile(self, name=None):
+        """Rescan one (or every) index right away, e.g. from a refresh button"""
+        self.start()
+        names = [name] if name else list(self._indexes)
+        for index_name in names:
+            self.rescan(index_name)
+
+    def get_files(self, name):
+        """Return the current snapshot of an index, scanning once if it's empty"""
+        self.start()
+        files = self._snapshots.get(name)
+        if files is None:
+            files = self.rescan(name)
+        return files
+
+    def version(self, name):
+        """Monotonic counter bumped on every published snapshot"""
+        return self._versions.get(name, 0)
+
+# Shared watcher for the documentation and log indexes
+index_watcher = IndexWatcher()
+index_watcher.register('markdown', markdown_index, DEFAULT_MARKDOWN_PATHS)
+index_watcher.register('logs', log_index, DEFAULT_LOG_PATHS)
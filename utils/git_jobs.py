@@ -0,0 +1,224 @@
+import os
+import re
+import time
+import signal
+import sqlite3
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.repo_cache import repo_cache
+from utils.commit_history import commit_history
+
+GIT_JOBS_DB_PATH = "/srv/projects/shared/dashboard/data/git_jobs.db"
+DEFAULT_CONCURRENCY = 4
+REPO_TIMEOUT = 300
+MAX_OUTPUT_CHARS = 20000
+
+# Commands per job action; progress is written by git to stderr
+JOB_COMMANDS = {
+    'fetch': ['git', 'fetch', '--all', '--prune', '--progress'],
+    'pull': ['git', 'pull', '--progress'],  # Same semantics as the original Pull button (merges diverged branches)
+}
+
+# Progress lines are separated by \r (updates of the same line) or \n
+PROGRESS_SPLIT = re.compile(r'[\r\n]')
+
+class GitJobManager:
+    """Runs fetch/pull over many repositories concurrently.
+
+    Each job gets its own bounded thread pool; per-repository state
+    (status, last progress line, output) is kept in memory for the UI to
+    poll and written to SQLite when the repository finishes, so the job
+    history survives restarts.
+    """
+
+    def __init__(self, db_path=GIT_JOBS_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn = None
+        self._jobs = {}
+
+    def _connect(self):
+        """Open the database lazily and create the schema"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS jobs '
+                         '(job_id INTEGER PRIMARY KEY, action TEXT, concurrency INTEGER, started REAL, '
+                         'finished REAL, total INTEGER, succeeded INTEGER DEFAULT 0, failed INTEGER DEFAULT 0)')
+            conn.execute('CREATE TABLE IF NOT EXISTS job_repos '
+                         '(job_id INTEGER, repo TEXT, status TEXT, output TEXT, started REAL, finished REAL, '
+                         'PRIMARY KEY (job_id, repo))')
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    # Submitting
+
+    def submit(self, action, repo_paths, concurrency=DEFAULT_CONCURRENCY):
+        """Start a fetch or pull over a set of repositories; returns the job id"""
+        if action not in JOB_COMMANDS:
+            raise ValueError(f"Unknown git job action: {action}")
+        targets = list(dict.fromkeys(repo_paths))
+        concurrency = max(1, min(int(concurrency), len(targets) or 1))
+        started = time.time()
+
+        with self._lock:
+            conn = self._connect()
+            job_id = conn.execute('INSERT INTO jobs (action, concurrency, started, total) VALUES (?, ?, ?, ?)',
+                                  (action, concurrency, started, len(targets))).lastrowid
+            conn.commit()
+
+            job = {
+                'job_id': job_id,
+                'action': action,
+                'concurrency': concurrency,
+                'started': started,
+                'finished': None,
+                'repos': {
+                    repo: {'status': 'queued', 'progress': '', 'output': '', 'started': None, 'finished': None}
+                    for repo in targets
+                }
+            }
+            self._jobs[job_id] = job
+
+        threading.Thread(target=self._run_job, args=(job, targets), name=f'git-job-{job_id}', daemon=True).start()
+        return job_id
+
+    # Running
+
+    def _run_job(self, job, targets):
+        with ThreadPoolExecutor(max_workers=job['concurrency']) as executor:
+            for repo in targets:
+                executor.submit(self._run_repo, job, repo)
+
+        with self._lock:
+            job['finished'] = time.time()
+            succeeded = sum(1 for state in job['repos'].values() if state['status'] == 'success')
+            conn = self._connect()
+            conn.execute('UPDATE jobs SET finished = ?, succeeded = ?, failed = ? WHERE job_id = ?',
+                         (job['finished'], succeeded, len(job['repos']) - succeeded, job['job_id']))
+            conn.commit()
+
+    def _run_repo(self, job, repo):
+        """Run one git command, streaming its progress into the job state"""
+        state = job['repos'][repo]
+        state['status'] = 'running'
+        state['started'] = time.time()
+        output = []
+
+        try:
+            env = dict(os.environ, GIT_TERMINAL_PROMPT='0', LC_ALL='C')
+            # Own process group, so a timeout also kills helpers (ssh, credential helpers)
+            # that inherited the pipe and would otherwise keep the read below blocked
+            process = subprocess.Popen(JOB_COMMANDS[job['action']], cwd=repo, stdout=subprocess.PIPE,
+                                       stderr=subprocess.STDOUT, env=env, text=True, errors='replace',
+                                       bufsize=1, start_new_session=True)
+            timer = threading.Timer(REPO_TIMEOUT, _kill_process_group, args=(process,))
+            timer.start()
+            try:
+                pending = ''
+                while True:
+                    chunk = process.stdout.read(256)
+                    if not chunk:
+                        break
+                    pieces = PROGRESS_SPLIT.split(pending + chunk)
+                    pending = pieces.pop()
+                    for piece in pieces:
+                        if piece.strip():
+                            state['progress'] = piece.strip()
+                            # \r updates overwrite the same progress line; keep only real lines
+                            if not output or not _same_progress(output[-1], piece):
+                                output.append(piece.strip())
+                            else:
+                                output[-1] = piece.strip()
+                if pending.strip():
+                    output.append(pending.strip())
+                returncode = process.wait()
+            finally:
+                timer.cancel()
+
+            if returncode == 0:
+                state['status'] = 'success'
+            elif returncode < 0:
+                state['status'] = 'error'
+                output.append(f"Timeout após {REPO_TIMEOUT}s")
+            else:
+                state['status'] = 'error'
+        except Exception as e:
+            state['status'] = 'error'
+            output.append(str(e))
+
+        state['output'] = '\n'.join(output)[-MAX_OUTPUT_CHARS:]
+        state['finished'] = time.time()
+
+        if state['status'] == 'success':
+            # New refs: drop cached status and refresh the commit history
+            repo_cache.invalidate(repo)
+            if job['action'] == 'pull':
+                commit_history.schedule_update(repo)
+
+        with self._lock:
+            conn = self._connect()
+            conn.execute('INSERT OR REPLACE INTO job_repos VALUES (?, ?, ?, ?, ?, ?)',
+                         (job['job_id'], repo, state['status'], state['output'], state['started'], state['finished']))
+            conn.commit()
+
+    # Querying
+
+    def get_job(self, job_id):
+        """Live state of a job started by this process, or its persisted record"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                return {**job, 'repos': {repo: dict(state) for repo, state in job['repos'].items()}}
+
+            conn = self._connect()
+            row = conn.execute('SELECT action, concurrency, started, finished FROM jobs WHERE job_id = ?',
+                               (job_id,)).fetchone()
+            if row is None:
+                return None
+            repos = {
+                repo: {'status': status, 'progress': '', 'output': output, 'started': started, 'finished': finished}
+                for repo, status, output, started, finished in conn.execute(
+                    'SELECT repo, status, output, started, finished FROM job_repos WHERE job_id = ?', (job_id,))
+            }
+            return {'job_id': job_id, 'action': row[0], 'concurrency': row[1], 'started': row[2],
+                    'finished': row[3], 'repos': repos}
+
+    def is_running(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return bool(job) and job['finished'] is None
+
+    def active_jobs(self):
+        with self._lock:
+            return [job_id for job_id, job in self._jobs.items() if job['finished'] is None]
+
+    def history(self, limit=20):
+        """Most recent jobs, newest first"""
+        with self._lock:
+            rows = self._connect().execute(
+                'SELECT job_id, action, concurrency, started, finished, total, succeeded, failed '
+                'FROM jobs ORDER BY job_id DESC LIMIT ?', (limit,)
+            ).fetchall()
+        return [{
+            'job_id': job_id, 'action': action, 'concurrency': concurrency, 'started': started,
+            'finished': finished, 'total': total, 'succeeded': succeeded, 'failed': failed
+        } for job_id, action, concurrency, started, finished, total, succeeded, failed in rows]
+
+def _kill_process_group(process):
+    """Kill a job's git process together with every child it spawned"""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        pass
+
+def _same_progress(previous, current):
+    """Whether two progress lines are updates of the same phase ("Receiving objects:  40% ...")"""
+    return previous.split(':', 1)[0] == current.strip().split(':', 1)[0] and '%' in current
+
+# Shared job manager for the repositories page
+git_jobs = GitJobManager()
@@ -0,0 +1,370 @@
+import os
+import mmap
+import zlib
+import struct
+import datetime
+import threading
+
+OBJ_COMMIT, OBJ_TREE, OBJ_BLOB, OBJ_TAG, OBJ_OFS_DELTA, OBJ_REF_DELTA = 1, 2, 3, 4, 6, 7
+TYPE_NAMES = {OBJ_COMMIT: 'commit', OBJ_TREE: 'tree', OBJ_BLOB: 'blob', OBJ_TAG: 'tag'}
+
+class GitReaderError(Exception):
+    """Raised when the repository can't be read without the git binary"""
+
+def _apply_delta(base, delta):
+    """Apply a git pack delta to its base object"""
+    def read_size(position):
+        size = shift = 0
+        while True:
+            byte = delta[position]
+            position += 1
+            size |= (byte & 0x7f) << shift
+            shift += 7
+            if not byte & 0x80:
+                return size, position
+
+    _, position = read_size(0)
+    result_size, position = read_size(position)
+    result = bytearray()
+
+    while position < len(delta):
+        opcode = delta[position]
+        position += 1
+        if opcode & 0x80:
+            # Copy a range of the base object
+            offset = size = 0
+            for i in range(4):
+                if opcode & (1 << i):
+                    offset |= delta[position] << (8 * i)
+                    position += 1
+            for i in range(3):
+                if opcode & (1 << (4 + i)):
+                    size |= delta[position] << (8 * i)
+                    position += 1
+            result += base[offset:offset + (size or 0x10000)]
+        elif opcode:
+            # Insert literal bytes
+            result += delta[position:position + opcode]
+            position += opcode
+        else:
+            raise GitReaderError("Invalid delta opcode")
+
+    if len(result) != result_size:
+        raise GitReaderError("Delta result size mismatch")
+    return bytes(result)
+
+class _Pack:
+    """A pack file and its version 2 index, memory-mapped"""
+
+    def __init__(self, idx_path):
+        self.idx_path = idx_path
+        self.pack_path = idx_path[:-4] + '.pack'
+        with open(idx_path, 'rb') as f:
+            self._idx = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._idx[:4] != b'\xfftOc' or struct.unpack('>I', self._idx[4:8])[0] != 2:
+            raise GitReaderError(f"Unsupported pack index: {idx_path}")
+        self.count = struct.unpack('>I', self._idx[8 + 255 * 4:8 + 256 * 4])[0]
+        self._pack = None
+
+    def _sha_at(self, i):
+        start = 8 + 1024 + i * 20
+        return self._idx[start:start + 20]
+
+    def find(self, binsha):
+        """Return the pack offset of an object, or None"""
+        first = binsha[0]
+        low = struct.unpack('>I', self._idx[8 + (first - 1) * 4:8 + first * 4])[0] if first else 0
+        high = struct.unpack('>I', self._idx[8 + first * 4:8 + (first + 1) * 4])[0]
+        while low < high:
+            middle = (low + high) // 2
+            current = self._sha_at(middle)
+            if current < binsha:
+                low = middle + 1
+            elif current > binsha:
+                high = middle
+            else:
+                return self._offset_at(middle)
+        return None
+
+    def _offset_at(self, i):
+        offsets_start = 8 + 1024 + self.count * 24
+        offset = struct.unpack('>I', self._idx[offsets_start + i * 4:offsets_start + i * 4 + 4])[0]
+        if offset & 0x80000000:
+            large_start = offsets_start + self.count * 4 + (offset & 0x7fffffff) * 8
+            offset = struct.unpack('>Q', self._idx[large_start:large_start + 8])[0]
+        return offset
+
+    def read_at(self, offset, reader):
+        """Return (type, data) of the object stored at a pack offset"""
+        if self._pack is None:
+            with open(self.pack_path, 'rb') as f:
+                self._pack = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        pack = self._pack
+
+        byte = pack[offset]
+        position = offset + 1
+        obj_type = (byte >> 4) & 0x7
+        size = byte & 0x0f
+        shift = 4
+        while byte & 0x80:
+            byte = pack[position]
+            position += 1
+            size |= (byte & 0x7f) << shift
+            shift += 7
+
+        if obj_type == OBJ_OFS_DELTA:
+            byte = pack[position]
+            position += 1
+            base_distance = byte & 0x7f
+            while byte & 0x80:
+                byte = pack[position]
+                position += 1
+                base_distance = ((base_distance + 1) << 7) | (byte & 0x7f)
+            base_type, base = self.read_at(offset - base_distance, reader)
+            return base_type, _apply_delta(base, self._inflate(position, size))
+
+        if obj_type == OBJ_REF_DELTA:
+            base_sha = pack[position:position + 20].hex()
+            base_type, base = reader.read_object(base_sha)
+            return base_type, _apply_delta(base, self._inflate(position + 20, size))
+
+        return TYPE_NAMES[obj_type], self._inflate(position, size)
+
+    def _inflate(self, position, size):
+        decompressor = zlib.decompressobj()
+        data = b''
+        chunk = 4096
+        while len(data) < size:
+            data += decompressor.decompress(self._pack[position:position + chunk])
+            position += chunk
+            if decompressor.eof:
+                break
+        return data[:size]
+
+class GitReader:
+    """Read-only access to refs and commits of a repository, without spawning git.
+
+    Covers loose refs, packed-refs, loose objects and version 2 packs.
+    Anything else (alternates, missing objects, reftable...) raises
+    GitReaderError so callers can fall back to the git binary.
+    """
+
+    def __init__(self, repo_path):
+        self.repo_path = repo_path
+        self.git_dir = self._find_git_dir(repo_path)
+        common_dir_file = os.path.join(self.git_dir, 'commondir')
+        self.common_dir = self.git_dir
+        if os.path.isfile(common_dir_file):
+            with open(common_dir_file, 'r') as f:
+                self.common_dir = os.path.normpath(os.path.join(self.git_dir, f.read().strip()))
+        self._packs = None
+        self._packs_mtime = None
+
+    @staticmethod
+    def _find_git_dir(repo_path):
+        git_path = os.path.join(repo_path, '.git')
+        if os.path.isdir(git_path):
+            return git_path
+        if os.path.isfile(git_path):
+            # Worktrees and submodules: ".git" is a file pointing at the real directory
+            with open(git_path, 'r') as f:
+                content = f.read().strip()
+            if content.startswith('gitdir:'):
+                return os.path.normpath(os.path.join(repo_path, content[len('gitdir:'):].strip()))
+        raise GitReaderError(f"Not a git repository: {repo_path}")
+
+    # Refs
+
+    def head(self):
+        """Return ('ref', refname) for a branch checkout or ('sha', sha) when detached"""
+        try:
+            with open(os.path.join(self.git_dir, 'HEAD'), 'r') as f:
+                content = f.read().strip()
+        except OSError as e:
+            raise GitReaderError(str(e))
+        if content.startswith('ref:'):
+            return 'ref', content[4:].strip()
+        return 'sha', content
+
+    def current_branch(self):
+        """Current branch name, or None when HEAD is detached"""
+        kind, value = self.head()
+        if kind == 'ref' and value.startswith('refs/heads/'):
+            return value[len('refs/heads/'):]
+        return None
+
+    def _packed_refs(self):
+        refs = {}
+        try:
+            with open(os.path.join(self.common_dir, 'packed-refs'), 'r') as f:
+                for line in f:
+                    if not line or line[0] in '#^':
+                        continue
+                    parts = line.split()
+                    if len(parts) == 2:
+                        refs[parts[1]] = parts[0]
+        except OSError:
+            pass
+        return refs
+
+    def refs(self, prefix='refs/'):
+        """Map refname -> sha for every ref under a prefix (loose refs win over packed ones)"""
+        if os.path.exists(os.path.join(self.common_dir, 'reftable')):
+            raise GitReaderError("reftable repositories are not supported")
+
+        refs = {name: sha for name, sha in self._packed_refs().items() if name.startswith(prefix)}
+        refs_root = os.path.join(self.common_dir, prefix)
+        for root, _, files in os.walk(refs_root):
+            for file_name in files:
+                path = os.path.join(root, file_name)
+                name = os.path.relpath(path, self.common_dir).replace(os.sep, '/')
+                try:
+                    with open(path, 'r') as f:
+                        value = f.read().strip()
+                except OSError:
+                    continue
+                if len(value) == 40:
+                    refs[name] = value
+        return refs
+
+    def branches(self):
+        return sorted(name[len('refs/heads/'):] for name in self.refs('refs/heads/'))
+
+    def tags(self):
+        return sorted(name[len('refs/tags/'):] for name in self.refs('refs/tags/'))
+
+    def resolve(self, ref='HEAD'):
+        """Resolve HEAD or a refname to a commit sha"""
+        if ref == 'HEAD':
+            kind, value = self.head()
+            if kind == 'sha':
+                return value
+            ref = value
+        path = os.path.join(self.common_dir, ref)
+        try:
+            with open(path, 'r') as f:
+                value = f.read().strip()
+            if value.startswith('ref:'):
+                return self.resolve(value[4:].strip())
+            return value
+        except OSError:
+            sha = self._packed_refs().get(ref)
+            if sha is None:
+                raise GitReaderError(f"Unknown ref: {ref}")
+            return sha
+
+    # Objects
+
+    def _load_packs(self):
+        pack_dir = os.path.join(self.common_dir, 'objects', 'pack')
+        try:
+            mtime = os.stat(pack_dir).st_mtime_ns
+        except OSError:
+            self._packs = []
+            return self._packs
+        if self._packs is None or mtime != self._packs_mtime:
+            packs = []
+            for file_name in sorted(os.listdir(pack_dir)):
+                if file_name.endswith('.idx'):
+                    packs.append(_Pack(os.path.join(pack_dir, file_name)))
+            self._packs = packs
+            self._packs_mtime = mtime
+        return self._packs
+
+    def read_object(self, sha):
+        """Return (type, data) for an object id"""
+        loose_path = os.path.join(self.common_dir, 'objects', sha[:2], sha[2:])
+        try:
+            with open(loose_path, 'rb') as f:
+                raw = zlib.decompress(f.read())
+            header, _, data = raw.partition(b'\0')
+            return header.split(b' ')[0].decode(), data
+        except FileNotFoundError:
+            pass
+        except (OSError, zlib.error) as e:
+            raise GitReaderError(str(e))
+
+        binsha = bytes.fromhex(sha)
+        for pack in self._load_packs():
+            offset = pack.find(binsha)
+            if offset is not None:
+                return pack.read_at(offset, self)
+        raise GitReaderError(f"Object not found: {sha}")
+
+    def read_commit(self, sha):
+        """Parse a commit object into a dict"""
+        obj_type, data = self.read_object(sha)
+        if obj_type == 'tag':
+            # Annotated tags point at the commit
+            target = data.split(b'\n', 1)[0].split(b' ')[1].decode()
+            return self.read_commit(target)
+        if obj_type != 'commit':
+            raise GitReaderError(f"{sha} is a {obj_type}, not a commit")
+        return parse_commit(sha, data)
+
+    def last_commit(self):
+        return self.read_commit(self.resolve('HEAD'))
+
+def _parse_signature(value):
+    """'Name <email> 1700000000 +0200' -> (name, email, datetime)"""
+    name, _, rest = value.partition(' <')
+    email, _, rest = rest.partition('> ')
+    timestamp, _, offset = rest.partition(' ')
+    sign = -1 if offset.startswith('-') else 1
+    minutes = int(offset[1:3]) * 60 + int(offset[3:5]) if len(offset) == 5 else 0
+    tz = datetime.timezone(datetime.timedelta(minutes=sign * minutes))
+    return name, email, datetime.datetime.fromtimestamp(int(timestamp), tz)
+
+def parse_commit(sha, data):
+    """Parse raw commit data"""
+    header, _, message = data.partition(b'\n\n')
+    encoding = 'utf-8'
+    fields = {'parents': []}
+    for line in header.split(b'\n'):
+        if line.startswith(b' '):
+            # Continuation of a multi-line header (gpgsig, mergetag)
+            continue
+        key, _, value = line.partition(b' ')
+        if key == b'encoding':
+            encoding = value.decode('ascii', errors='ignore') or 'utf-8'
+        fields.setdefault(key.decode(), value)
+        if key == b'parent':
+            fields['parents'].append(value.decode())
+
+    def decode(value):
+        try:
+            return value.decode(encoding, errors='replace')
+        except LookupError:
+            return value.decode('utf-8', errors='replace')
+
+    author_name, author_email, author_date = _parse_signature(decode(fields.get('author', b'')))
+    committer_name, committer_email, committer_date = _parse_signature(decode(fields.get('committer', b'')))
+    message = decode(message)
+    # Like %s: the first paragraph joined into one line
+    subject = ' '.join(message.strip().split('\n\n', 1)[0].split('\n')) if message.strip() else ''
+
+    return {
+        'sha': sha,
+        'tree': decode(fields.get('tree', b'')),
+        'parents': fields['parents'],
+        'author': author_name,
+        'author_email': author_email,
+        'author_date': author_date,
+        'committer': committer_name,
+        'committer_email': committer_email,
+        'committer_date': committer_date,
+        'subject': subject,
+        'message': message
+    }
+
+_readers = {}
+_readers_lock = threading.Lock()
+
+def get_git_reader(repo_path):
+    """Shared reader per repository (keeps pack indexes mapped between calls)"""
+    with _readers_lock:
+        reader = _readers.get(repo_path)
+        if reader is None:
+            reader = GitReader(repo_path)
+            _readers[repo_path] = reader
+        return reader
@@ -3,6 +3,14 @@ import subprocess
 import glob
 import datetime
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.repo_cache import repo_cache, worktree_fingerprint
+from utils.git_reader import get_git_reader
+from utils.disk_usage import disk_usage
+from utils.commit_history import commit_history
+
+GIT_SCAN_WORKERS = min(16, (os.cpu_count() or 2) * 2)
 
 def scan_git_repositories(base_paths=None):
     """Scan for Git repositories in specified directories"""
@@ -10,6 +18,7 @@ def scan_git_repositories(base_paths=None):
         base_paths = ['/srv/projects']  # Only scan /srv/projects
     
     repositories = []
+    repo_paths = []
     
     for base_path in base_paths:
         base_path = os.path.expanduser(base_path)
@@ -36,35 +45,82 @@ def scan_git_repositories(base_paths=None):
                 dirs[:] = [d for d in dirs if not d.startswith('.') and 
                           d not in ['node_modules', '__pycache__', 'venv', '.env']]
             
-            # Process found repositories
-            for repo_path in git_dirs:
-                try:
-                    repo_info = get_repository_basic_info(repo_path)
-                    if repo_info:
-                        repositories.append(repo_info)
-                except Exception:
-                    continue
+            repo_paths.extend(git_dirs)
         
         except (PermissionError, OSError):
             continue
     
+    # Query the repositories concurrently (status included, so the page doesn't run git
+    # serially per card); unchanged ones come straight from the cache
+    with ThreadPoolExecutor(max_workers=GIT_SCAN_WORKERS) as executor:
+        for repo_info in executor.map(get_cached_scan_info, repo_paths):
+            if repo_info:
+                repositories.append(repo_info)
+    
+    repo_cache.prune(repo_paths)
+    repo_cache.save()
+    disk_usage.prune(repo_paths)
+    disk_usage.save()
+    
     # Sort by name
     repositories.sort(key=lambda x: x['name'].lower())
     
     return repositories
 
+def get_cached_basic_info(repo_path):
+    """Basic repository info, recomputed only when the repository changed"""
+    try:
+        return repo_cache.get(repo_path, 'basic', get_repository_basic_info)
+    except Exception:
+        return None
+
+def get_cached_scan_info(repo_path):
+    """Basic info plus the working tree status; is_clean and branch come from the status"""
+    repo_info = get_cached_basic_info(repo_path)
+    if not repo_info or 'error' in repo_info:
+        return repo_info
+    
+    try:
+        status = get_cached_repo_status(repo_path)
+    except Exception:
+        return repo_info
+    if 'error' in status:
+        return repo_info
+    
+    # Same worktree-keyed entry as the card's status, so list and card always agree
+    return dict(repo_info, is_clean=status['is_clean'], current_branch=status['current_branch'],
+                status=status)
+
+def get_cached_repo_info(repo_path):
+    """Detailed repository info, recomputed only when the repository changed"""
+    return repo_cache.get(repo_path, 'info', get_repo_info)
+
+def get_cached_repo_status(repo_path):
+    """Repository status, recomputed only when the repository or its working tree changed"""
+    return repo_cache.get(repo_path, 'status', get_repo_status,
+                          fingerprint=worktree_fingerprint(repo_path))
+
 def get_repository_basic_info(repo_path):
     """Get basic information about a Git repository"""
     try:
         if not is_git_repository(repo_path):
             return None
         
+        status = get_status_porcelain(repo_path)
+        usage = disk_usage.measure(repo_path, save=False)  # Saved once per scan
+        
         repo_info = {
             'name': os.path.basename(repo_path),
             'path': repo_path,
-            'size_mb': get_directory_size(repo_path) / (1024 * 1024),
-            'current_branch': get_current_branch(repo_path),
-            'is_clean': is_working_directory_clean(repo_path),
+            'size_mb': usage['total_bytes'] / (1024 * 1024),
+            'size_breakdown': {
+                'worktree_mb': usage['worktree_bytes'] / (1024 * 1024),
+                'git_mb': usage['git_bytes'] / (1024 * 1024),
+                'vendored_mb': usage['vendored_bytes'] / (1024 * 1024),
+                'partial': usage['partial']
+            },
+            'current_branch': status['branch'] if status else 'detached',
+            'is_clean': status['is_clean'] if status else False,
             'last_commit': get_last_commit_info(repo_path)
         }
         
@@ -84,7 +140,7 @@ def get_repo_info(repo_path):
             return {'error': 'Not a Git repository'}
         
         info = {
-            'basic': get_repository_basic_info(repo_path),
+            'basic': get_cached_basic_info(repo_path),
             'branches': get_branches(repo_path),
             'remotes': get_remotes(repo_path),
             'recent_commits': get_recent_commits(repo_path, limit=10),
@@ -103,30 +159,128 @@ def get_repo_status(repo_path):
         if not is_git_repository(repo_path):
             return {'error': 'Not a Git repository'}
         
-        # Get basic info
-        basic_info = get_repository_basic_info(repo_path)
+        # Get basic info (usually already cached by the scan)
+        basic_info = get_cached_basic_info(repo_path)
+        
+        # Branch, upstream, ahead/behind and file lists come from a single git status
+        status = get_status_porcelain(repo_path, untracked='all')
+        refs = get_ref_names(repo_path)
         
-        # Get detailed status
         status_info = {
-            'is_clean': is_working_directory_clean(repo_path),
-            'modified_files': get_modified_files(repo_path),
-            'untracked_files': get_untracked_files(repo_path),
-            'staged_files': get_staged_files(repo_path),
-            'ahead_behind': get_ahead_behind_info(repo_path),
+            'is_clean': status['is_clean'] if status else False,
+            'modified_files': status['modified_files'] if status else [],
+            'untracked_files': status['untracked_files'] if status else [],
+            'staged_files': status['staged_files'] if status else [],
+            'ahead_behind': status['ahead_behind'] if status else None,
             'commit_count': get_commit_count(repo_path),
-            'tag_count': get_tag_count(repo_path),
-            'branches': get_branches(repo_path)
+            'tag_count': len(refs['tags']),
+            'branches': refs['branches']
         }
         
         # Merge basic info with status
         if basic_info:
             status_info.update(basic_info)
         
+        # The fresh status wins over the (possibly older) cached basic info
+        if status:
+            status_info['current_branch'] = status['branch']
+            status_info['is_clean'] = status['is_clean']
+        
         return status_info
     
     except Exception as e:
         return {'error': str(e)}
 
+def parse_porcelain_v2(output):
+    """Parse `git status --porcelain=v2 --branch -z` output"""
+    status = {
+        'oid': None,
+        'branch': 'detached',
+        'upstream': None,
+        'ahead_behind': None,
+        'modified_files': [],
+        'staged_files': [],
+        'untracked_files': [],
+        'conflicted_files': []
+    }
+    
+    entries = output.split('\0')
+    i = 0
+    while i < len(entries):
+        entry = entries[i]
+        i += 1
+        if not entry:
+            continue
+        
+        if entry.startswith('# '):
+            parts = entry[2:].split(' ')
+            key = parts[0]
+            if key == 'branch.oid' and parts[1] != '(initial)':
+                status['oid'] = parts[1]
+            elif key == 'branch.head' and parts[1] != '(detached)':
+                status['branch'] = parts[1]
+            elif key == 'branch.upstream':
+                status['upstream'] = parts[1]
+            elif key == 'branch.ab':
+                status['ahead_behind'] = {
+                    'behind': int(parts[2].lstrip('-')),
+                    'ahead': int(parts[1].lstrip('+')),
+                    'upstream': status['upstream']
+                }
+        elif entry[0] == '1':
+            # 1 XY sub mH mI mW hH hI path
+            fields = entry.split(' ', 8)
+            _add_changed_file(status, fields[1], fields[8])
+        elif entry[0] == '2':
+            # 2 XY sub mH mI mW hH hI Xscore path, followed by the original path
+            fields = entry.split(' ', 9)
+            _add_changed_file(status, fields[1], fields[9])
+            i += 1
+        elif entry[0] == 'u':
+            # u XY sub m1 m2 m3 mW h1 h2 h3 path
+            fields = entry.split(' ', 10)
+            status['conflicted_files'].append(fields[10])
+            status['modified_files'].append(fields[10])
+        elif entry[0] == '?':
+            status['untracked_files'].append(entry[2:])
+    
+    status['is_clean'] = not (status['modified_files'] or status['staged_files'] or
+                              status['untracked_files'] or status['conflicted_files'])
+    return status
+
+def _add_changed_file(status, xy, path):
+    """X is the index (staged) state, Y the working tree state"""
+    if xy[0] != '.':
+        status['staged_files'].append(path)
+    if xy[1] != '.':
+        status['modified_files'].append(path)
+
+def get_status_porcelain(repo_path, untracked='normal'):
+    """Branch, upstream, ahead/behind and file lists from one `git status` call"""
+    result = run_git_command(repo_path, ['status', '--porcelain=v2', '--branch', '-z',
+                                         f'--untracked-files={untracked}'])
+    if result is None:
+        return None
+    return parse_porcelain_v2(result)
+
+def get_ref_names(repo_path):
+    """Local branch and tag names, read from the refs (git for-each-ref as fallback)"""
+    try:
+        reader = get_git_reader(repo_path)
+        return {'branches': reader.branches(), 'tags': reader.tags()}
+    except Exception:
+        pass
+    
+    result = run_git_command(repo_path, ['for-each-ref', '--format=%(refname)', 'refs/heads', 'refs/tags'])
+    
+    refs = {'branches': [], 'tags': []}
+    for refname in (result or '').split('\n'):
+        if refname.startswith('refs/heads/'):
+            refs['branches'].append(refname[len('refs/heads/'):])
+        elif refname.startswith('refs/tags/'):
+            refs['tags'].append(refname[len('refs/tags/'):])
+    return refs
+
 def is_git_repository(path):
     """Check if a directory is a Git repository"""
     return os.path.isdir(os.path.join(path, '.git'))
@@ -153,11 +307,22 @@ def run_git_command(repo_path, command, capture_output=True):
 
 def get_current_branch(repo_path):
     """Get the current branch name"""
+    try:
+        return get_git_reader(repo_path).current_branch() or 'detached'
+    except Exception:
+        pass
+    
     result = run_git_command(repo_path, ['branch', '--show-current'])
     return result if result else 'detached'
 
 def get_branches(repo_path, include_remote=False):
     """Get list of branches"""
+    if not include_remote:
+        try:
+            return get_git_reader(repo_path).branches()
+        except Exception:
+            pass
+    
     command = ['branch', '-a'] if include_remote else ['branch']
     result = run_git_command(repo_path, command)
     
@@ -218,6 +383,17 @@ def get_staged_files(repo_path):
 
 def get_last_commit_info(repo_path):
     """Get information about the last commit"""
+    try:
+        commit = get_git_reader(repo_path).last_commit()
+        return {
+            'hash': commit['sha'][:7],
+            'author': commit['author'],
+            'date': commit['author_date'].strftime('%Y-%m-%d'),
+            'message': commit['subject']
+        }
+    except Exception:
+        pass
+    
     result = run_git_command(repo_path, ['log', '-1', '--pretty=format:%h|%an|%ad|%s', '--date=short'])
     
     if not result:
@@ -234,8 +410,33 @@ def get_last_commit_info(repo_path):
     
     return None
 
+def get_cached_history(repo_path):
+    """commit_history when it covers HEAD; otherwise schedule an update and return None"""
+    try:
+        if commit_history.is_current(repo_path):
+            return commit_history
+        commit_history.schedule_update(repo_path)
+    except Exception:
+        pass
+    return None
+
+def format_relative_time(timestamp):
+    """Relative date in the style of git's %ar"""
+    seconds = max(0, int(datetime.datetime.now().timestamp() - timestamp))
+    for unit, size in (('year', 365 * 86400), ('month', 30 * 86400), ('week', 7 * 86400),
+                       ('day', 86400), ('hour', 3600), ('minute', 60)):
+        if seconds >= size * (2 if unit in ('year', 'month') else 1):
+            count = seconds // size
+            return f"{count} {unit}{'s' if count != 1 else ''} ago"
+    return f"{seconds} seconds ago"
+
 def get_recent_commits(repo_path, limit=10):
     """Get recent commit history"""
+    history = get_cached_history(repo_path)
+    if history:
+        return [f"{c['sha'][:7]} - {c['subject']} ({c['author']}, {format_relative_time(c['timestamp'])})"
+                for c in history.recent_commits(repo_path, limit)]
+    
     result = run_git_command(repo_path, ['log', f'-{limit}', '--pretty=format:%h - %s (%an, %ar)'])
     
     if not result:
@@ -245,6 +446,10 @@ def get_recent_commits(repo_path, limit=10):
 
 def get_commit_count(repo_path):
     """Get total number of commits"""
+    history = get_cached_history(repo_path)
+    if history:
+        return history.commit_count(repo_path)
+    
     result = run_git_command(repo_path, ['rev-list', '--count', 'HEAD'])
     
     try:
@@ -254,6 +459,11 @@ def get_commit_count(repo_path):
 
 def get_tag_count(repo_path):
     """Get number of tags"""
+    try:
+        return len(get_git_reader(repo_path).tags())
+    except Exception:
+        pass
+    
     result = run_git_command(repo_path, ['tag', '--list'])
     
     if not result:
@@ -263,6 +473,10 @@ def get_tag_count(repo_path):
 
 def get_contributors(repo_path):
     """Get list of contributors"""
+    history = get_cached_history(repo_path)
+    if history:
+        return history.contributors(repo_path)
+    
     result = run_git_command(repo_path, ['shortlog', '-sn'])
     
     if not result:
@@ -416,63 +630,8 @@ def detect_programming_languages(file_types):
 
 def get_directory_size(path):
     """Calculate total size of directory in bytes"""
-    total_size = 0
-    try:
-        for dirpath, dirnames, filenames in os.walk(path):
-            for filename in filenames:
-                filepath = os.path.join(dirpath, filename)
-                try:
-                    if os.path.exists(filepath):
-                        total_size += os.path.getsize(filepath)
-                except (OSError, FileNotFoundError):
-                    continue
-    except (PermissionError, OSError):
-        pass
-    
-    return total_size
-
-def clone_repository(repo_url, destination_path):
-    """Clone a Git repository"""
-    try:
-        result = subprocess.run(
-            ['git', 'clone', repo_url, destination_path],
-            capture_output=True,
-            text=True,
-            timeout=300  # 5 minutes timeout
-        )
-        
-        return {
-            'success': result.returncode == 0,
-            'output': result.stdout,
-            'error': result.stderr
-        }
-    
-    except subprocess.TimeoutExpired:
-        return {
-            'success': False,
-            'output': '',
-            'error': 'Clone operation timed out'
-        }
-    except Exception as e:
-        return {
-            'success': False,
-            'output': '',
-            'error': str(e)
-        }
-
-def pull_repository(repo_path):
-    """Pull latest changes from remote repository"""
-    try:
-        result = run_git_command(repo_path, ['pull'])
-        return {
-            'success': result is not None,
-            'output': result if result else 'No output'
-        }
-    except Exception as e:
-        return {
-            'success': False,
-            'error': str(e)
-        }
+    # Incremental scandir walk with cached per-directory subtotals
+    return disk_usage.measure(path)['total_bytes']
 
 def get_repository_health(repo_path):
     """Get repository health score and recommendations"""
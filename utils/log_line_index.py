@@ -0,0 +1,279 @@
+import os
+import re
+import json
+import hashlib
+import datetime
+import threading
+from bisect import bisect_left
+
+from utils.log_reader import _read_lines
+
+LINE_INDEX_DIR = "/srv/projects/shared/dashboard/data/log_line_index"
+INDEX_STEP = 1000
+INDEX_CHUNK_SIZE = 4 * 1024 * 1024
+READ_CHUNK_SIZE = 256 * 1024
+HEADER_BYTES = 256
+
+# Timestamps recognised at the start of a line (ISO 8601 / Python logging, syslog)
+ISO_TIMESTAMP = re.compile(rb'(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2}):(\d{2})')
+SYSLOG_TIMESTAMP = re.compile(rb'([A-Z][a-z]{2}) +(\d{1,2}) (\d{2}):(\d{2}):(\d{2})')
+MONTHS = {name.encode(): number for number, name in enumerate(
+    ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'), 1)}
+
+def parse_line_timestamp(line, default_year=None):
+    """Return the epoch timestamp at the start of a log line (bytes), or None"""
+    head = line[:64]
+    match = ISO_TIMESTAMP.search(head)
+    try:
+        if match:
+            return datetime.datetime(*(int(part) for part in match.groups())).timestamp()
+        match = SYSLOG_TIMESTAMP.search(head)
+        if match and match.group(1) in MONTHS:
+            day, hour, minute, second = (int(part) for part in match.groups()[1:])
+            year = default_year or datetime.datetime.now().year
+            return datetime.datetime(year, MONTHS[match.group(1)], day, hour, minute, second).timestamp()
+    except ValueError:
+        pass
+    return None
+
+class LogLineIndex:
+    """Sidecar index of line offsets for one log file.
+
+    Records the byte offset of every `step`th line plus the first and last
+    timestamp seen in each block of `step` lines, so a line number or a
+    time can be reached by seeking to a block and reading at most `step`
+    lines. The index is extended from where it stopped as the file grows,
+    persisted as JSON under LINE_INDEX_DIR and thrown away when the file
+    is rotated (new inode, different first bytes) or truncated.
+    """
+
+    VERSION = 2  # 2: block end is the last stamped line
+
+    def __init__(self, file_path, step=INDEX_STEP, index_dir=LINE_INDEX_DIR):
+        self.file_path = file_path
+        self.step = step
+        digest = hashlib.sha1(file_path.encode('utf-8', errors='ignore')).hexdigest()
+        self.index_path = os.path.join(index_dir, f"{digest}.json")
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._reset(None)
+
+    def _reset(self, inode):
+        self.inode = inode
+        self.size = 0          # Bytes indexed, always ending on a line boundary
+        self.lines = 0         # Complete lines indexed
+        self.offsets = []      # offsets[i] = byte offset of line i * step
+        self.blocks = []       # blocks[i] = [first_ts, last_ts] of lines in block i
+        self.header = self._digest(b'')
+        self._dirty = True
+
+    def _load(self):
+        self._loaded = True
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == self.VERSION and data.get('path') == self.file_path \
+                    and data.get('step') == self.step:
+                self.inode = data['inode']
+                self.header = data['header']
+                self.size = data['size']
+                self.lines = data['lines']
+                self.offsets = data['offsets']
+                self.blocks = data['blocks']
+                self._dirty = False
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def save(self):
+        """Persist the sidecar atomically if it changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+                tmp_path = f"{self.index_path}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({
+                        'version': self.VERSION, 'path': self.file_path, 'step': self.step,
+                        'inode': self.inode, 'header': self.header, 'size': self.size,
+                        'lines': self.lines, 'offsets': self.offsets, 'blocks': self.blocks
+                    }, f)
+                os.replace(tmp_path, self.index_path)
+                self._dirty = False
+            except OSError as e:
+                print(f"Error saving line index for {self.file_path}: {e}")
+
+    def update(self):
+        """Bring the index up to date with the file, extending it incrementally"""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+
+            with open(self.file_path, 'rb') as f:
+                stat = os.fstat(f.fileno())
+                header = f.read(HEADER_BYTES)
+                # Rotation can reuse an inode, so the first indexed bytes must still match too
+                if (stat.st_ino != self.inode or stat.st_size < self.size
+                        or self._digest(header) != self.header):
+                    self._reset(stat.st_ino)
+
+                if stat.st_size > self.size:
+                    self._extend(f, stat)
+                    self.header = self._digest(header)
+
+            self.save()
+            return self
+
+    def _digest(self, header):
+        """Digest of the first bytes covered by the index"""
+        return hashlib.sha1(header[:min(HEADER_BYTES, self.size)]).hexdigest()
+
+    def _extend(self, f, stat):
+        """Index the complete lines appended after self.size"""
+        default_year = datetime.datetime.fromtimestamp(stat.st_mtime).year
+        f.seek(self.size)
+        position = self.size
+        carry = b''
+
+        while True:
+            data = f.read(INDEX_CHUNK_SIZE)
+            if not data:
+                break
+            buffer = carry + data
+            buffer_offset = position - len(carry)
+            position += len(data)
+
+            line_start = 0
+            while True:
+                newline = buffer.find(b'\n', line_start)
+                if newline < 0:
+                    break
+                self._add_line(buffer, line_start, newline, buffer_offset, default_year)
+                line_start = newline + 1
+
+            carry = buffer[line_start:]
+            self.size = buffer_offset + line_start
+
+        self._dirty = True
+
+    def _add_line(self, buffer, start, end, buffer_offset, default_year):
+        """Account for one complete line (buffer[start:end])"""
+        if self.lines % self.step == 0:
+            self.offsets.append(buffer_offset + start)
+            self.blocks.append([None, None])
+
+        block = self.blocks[-1]
+        # The block ends at its last stamped line, which need not be its last line
+        # (traceback continuations carry no timestamp)
+        timestamp = parse_line_timestamp(buffer[start:end], default_year)
+        if timestamp is not None:
+            if block[0] is None:
+                block[0] = timestamp
+            block[1] = timestamp
+        self.lines += 1
+
+    # Random access
+
+    def _default_year(self):
+        """Year assumed for syslog timestamps, which carry none"""
+        try:
+            return datetime.datetime.fromtimestamp(os.path.getmtime(self.file_path)).year
+        except OSError:
+            return None
+
+    def line_count(self):
+        return self.lines
+
+    def time_span(self):
+        """(first, last) timestamps seen in the file, or (None, None)"""
+        with self._lock:
+            stamps = [ts for block in self.blocks for ts in block if ts is not None]
+        return (stamps[0], stamps[-1]) if stamps else (None, None)
+
+    def read_lines(self, start_line, count):
+        """Return up to `count` lines starting at a 0-based line number"""
+        with self._lock:
+            start_line = max(0, min(start_line, self.lines - 1))
+            if self.lines == 0 or count <= 0:
+                return []
+            block_number = start_line // self.step
+            offset = self.offsets[block_number]
+            skip = start_line - block_number * self.step
+
+        lines = []
+        with open(self.file_path, 'rb') as f:
+            while len(lines) < skip + count:
+                chunk, offset = _read_lines(f, offset, max_bytes=READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                lines.extend(chunk)
+        return lines[skip:skip + count]
+
+    def find_time(self, timestamp):
+        """Return the 0-based number of the first line stamped at or after `timestamp`"""
+        with self._lock:
+            if self.lines == 0:
+                return 0
+            # Blocks ending before the target can be skipped entirely
+            last_timestamps = [last_ts if last_ts is not None else float('-inf')
+                               for _, last_ts in self.blocks]
+            # The last block is still open, its last timestamp isn't known yet
+            last_timestamps[-1] = float('inf')
+            # Timestamps are only roughly sorted; make them monotonic for the bisect
+            for i in range(1, len(last_timestamps)):
+                last_timestamps[i] = max(last_timestamps[i], last_timestamps[i - 1])
+            block_number = bisect_left(last_timestamps, timestamp)
+            if block_number >= len(self.blocks):
+                return self.lines
+            offset = self.offsets[block_number]
+            block_lines = min(self.step, self.lines - block_number * self.step)
+
+        default_year = self._default_year()
+        with open(self.file_path, 'rb') as f:
+            f.seek(offset)
+            for line_in_block in range(block_lines):
+                line = f.readline()
+                if not line:
+                    break
+                line_ts = parse_line_timestamp(line, default_year)
+                if line_ts is not None and line_ts >= timestamp:
+                    return block_number * self.step + line_in_block
+        return min(self.lines, (block_number + 1) * self.step)
+
+    def read_time_range(self, start_ts, end_ts, max_lines=1000):
+        """Return (first_line_number, lines) stamped between start_ts and end_ts.
+
+        Lines without a timestamp (stack traces, continuations) are kept with
+        the timestamped line before them.
+        """
+        first_line = self.find_time(start_ts)
+        if first_line >= self.lines:
+            return first_line, []
+
+        lines = []
+        default_year = self._default_year()
+
+        batch_start = first_line
+        while len(lines) < max_lines and batch_start < self.lines:
+            batch = self.read_lines(batch_start, min(self.step, max_lines - len(lines)))
+            if not batch:
+                break
+            for line in batch:
+                line_ts = parse_line_timestamp(line.encode('utf-8', errors='ignore'), default_year)
+                if line_ts is not None and line_ts > end_ts:
+                    return first_line, lines
+                lines.append(line)
+            batch_start += len(batch)
+        return first_line, lines
+
+_line_indexes = {}
+_line_indexes_lock = threading.Lock()
+
+def get_line_index(file_path, step=INDEX_STEP):
+    """Return the shared, up-to-date line index of a log file"""
+    with _line_indexes_lock:
+        index = _line_indexes.get(file_path)
+        if index is None or index.step != step:
+            index = LogLineIndex(file_path, step=step)
+            _line_indexes[file_path] = index
+    return index.update()
@@ -0,0 +1,278 @@
+import os
+import re
+import time
+from collections import deque
+
+BLOCK_SIZE = 64 * 1024
+
+def _decode(data, encoding='utf-8'):
+    return data.decode(encoding, errors='ignore')
+
+def tail_lines(file_path, num_lines=100, block_size=BLOCK_SIZE, encoding='utf-8', end=None):
+    """Return the last `num_lines` lines of a file, reading backwards from EOF in blocks.
+
+    `end` caps the read at a byte offset instead of the current end of file.
+    """
+    if num_lines <= 0:
+        return []
+
+    with open(file_path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell() if end is None else min(end, f.tell())
+        blocks = []
+        newlines = 0
+
+        # A trailing newline terminates the last line, it doesn't start a new one
+        if position:
+            f.seek(position - 1)
+            if f.read(1) == b'\n':
+                newlines = -1
+
+        while position > 0 and newlines < num_lines:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            block = f.read(read_size)
+            blocks.append(block)
+            newlines += block.count(b'\n')
+
+    data = b''.join(reversed(blocks))
+    lines = data.splitlines(keepends=True)
+    return [_decode(line, encoding) for line in lines[-num_lines:]]
+
+def head_lines(file_path, num_lines=100, encoding='utf-8'):
+    """Return the first `num_lines` lines of a file"""
+    lines = []
+    with open(file_path, 'r', encoding=encoding, errors='ignore') as f:
+        for line in f:
+            if len(lines) >= num_lines:
+                break
+            lines.append(line)
+    return lines
+
+def _read_lines(f, offset, max_bytes=None, max_lines=None, encoding='utf-8'):
+    """Read complete lines from an open binary file; returns (lines, next_offset)"""
+    f.seek(offset)
+    data = f.read(max_bytes) if max_bytes else f.read()
+
+    end = data.rfind(b'\n')
+    if end < 0:
+        # A single line longer than max_bytes would otherwise block the reader forever
+        if max_bytes and len(data) >= max_bytes:
+            return [_decode(data, encoding)], offset + len(data)
+        return [], offset
+
+    raw_lines = data[:end + 1].splitlines(keepends=True)
+    if max_lines is not None and len(raw_lines) > max_lines:
+        raw_lines = raw_lines[:max_lines]
+
+    consumed = sum(len(line) for line in raw_lines)
+    return [_decode(line, encoding) for line in raw_lines], offset + consumed
+
+def read_from_offset(file_path, offset=0, max_bytes=None, max_lines=None, encoding='utf-8'):
+    """Read complete lines starting at a byte offset.
+
+    Returns (lines, next_offset). A trailing partial line (no newline yet) is
+    left unread so the next call picks it up once it is complete.
+    """
+    with open(file_path, 'rb') as f:
+        return _read_lines(f, offset, max_bytes, max_lines, encoding)
+
+class LogFollower:
+    """Follows a growing log file from a byte-offset cursor.
+
+    Each poll reads only the bytes appended since the previous one. A new
+    inode means the file was rotated and a size below the cursor means it
+    was truncated; either way reading restarts at the beginning of the
+    current file. New lines land in a bounded buffer for the UI.
+    """
+
+    def __init__(self, file_path, max_lines=1000, max_read_bytes=4 * 1024 * 1024, encoding='utf-8'):
+        self.file_path = file_path
+        self.max_read_bytes = max_read_bytes
+        self.encoding = encoding
+        self.buffer = deque(maxlen=max_lines)
+        self.offset = None
+        self.inode = None
+        self.rotations = 0
+        self.truncations = 0
+        self.skipped_bytes = 0
+        self.last_poll = None
+
+    def resize(self, max_lines):
+        """Change the buffer size, keeping the most recent lines"""
+        if max_lines != self.buffer.maxlen:
+            self.buffer = deque(self.buffer, maxlen=max_lines)
+
+    def start(self):
+        """Seed the buffer with the current tail and put the cursor after the last complete line"""
+        with open(self.file_path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            block_start = max(0, stat.st_size - BLOCK_SIZE)
+            f.seek(block_start)
+            last_newline = f.read(stat.st_size - block_start).rfind(b'\n')
+
+        self.inode = stat.st_ino
+        self.offset = block_start + last_newline + 1 if last_newline >= 0 else block_start
+        self.buffer.clear()
+        self.buffer.extend(tail_lines(self.file_path, self.buffer.maxlen,
+                                      encoding=self.encoding, end=self.offset))
+        self.last_poll = time.time()
+
+    def poll(self):
+        """Read appended lines into the buffer; returns the new lines"""
+        if self.offset is None:
+            self.start()
+            return []
+
+        self.last_poll = time.time()
+        try:
+            f = open(self.file_path, 'rb')
+        except OSError:
+            # Rotated away and not recreated yet
+            return []
+
+        with f:
+            stat = os.fstat(f.fileno())
+            if stat.st_ino != self.inode:
+                self.inode = stat.st_ino
+                self.offset = 0
+                self.rotations += 1
+            elif stat.st_size < self.offset:
+                self.offset = 0
+                self.truncations += 1
+
+            pending = stat.st_size - self.offset
+            if pending <= 0:
+                return []
+
+            # Too far behind: jump to the recent bytes, the buffer can't hold the rest anyway
+            if pending > self.max_read_bytes:
+                skip_to = stat.st_size - self.max_read_bytes
+                self.skipped_bytes += skip_to - self.offset
+                f.seek(skip_to)
+                f.readline()
+                self.offset = f.tell()
+
+            lines, self.offset = _read_lines(f, self.offset, self.max_read_bytes, encoding=self.encoding)
+
+        self.buffer.extend(lines)
+        return lines
+
+    def lines(self):
+        return list(self.buffer)
+
+# Log levels, in the priority used to classify a line that mentions several
+LOG_LEVELS = ('ERROR', 'WARN', 'INFO', 'DEBUG')
+LEVEL_PATTERNS = {level: re.compile(level.encode(), re.IGNORECASE) for level in LOG_LEVELS}
+SEARCH_CHUNK_SIZE = 4 * 1024 * 1024
+MAX_LINE_BYTES = 16 * 1024 * 1024
+
+def classify_level(line):
+    """Return the log level mentioned in a line, or None"""
+    upper = line.upper()
+    for level in LOG_LEVELS:
+        if level in upper:
+            return level
+    return None
+
+def scan_log(file_path, search_term=None, level=None, max_matches=1000, chunk_size=SEARCH_CHUNK_SIZE,
+             progress=None, encoding='utf-8'):
+    """Search a whole log file in one streaming pass.
+
+    The file is read in binary chunks cut at line boundaries and searched
+    with precompiled regexes, so only matching lines are ever decoded. The
+    search term is matched case-insensitively (ASCII case folding) and
+    `level` keeps only lines mentioning that level. `progress(done, total)`
+    is called after every chunk. Scanning stops after `max_matches`.
+
+    Returns a dict with the matches (byte offset, line number, text, level),
+    the bytes scanned, the file size and whether the scan stopped early.
+    """
+    search_re = re.compile(re.escape(search_term.encode(encoding)), re.IGNORECASE) if search_term else None
+    level_re = LEVEL_PATTERNS.get(level)
+    primary = search_re or level_re
+    secondary = level_re if search_re else None
+
+    matches = []
+    stopped_early = False
+
+    with open(file_path, 'rb') as f:
+        total = os.fstat(f.fileno()).st_size
+        chunk_offset = 0
+        line_number = 1
+        carry = b''
+
+        while primary is not None:
+            data = f.read(chunk_size)
+            buffer = carry + data
+            if not buffer:
+                break
+
+            cut = buffer.rfind(b'\n')
+            if data and cut < 0 and len(buffer) < MAX_LINE_BYTES:
+                carry = buffer
+                continue
+            if data and cut >= 0:
+                chunk, carry = buffer[:cut + 1], buffer[cut + 1:]
+            else:
+                chunk, carry = buffer, b''
+
+            counted = 0
+            position = 0
+            while True:
+                match = primary.search(chunk, position)
+                if match is None:
+                    break
+                line_start = chunk.rfind(b'\n', 0, match.start()) + 1
+                line_end = chunk.find(b'\n', match.end())
+                if line_end < 0:
+                    line_end = len(chunk)
+                position = line_end + 1
+
+                raw_line = chunk[line_start:line_end]
+                if secondary is not None and not secondary.search(raw_line):
+                    continue
+
+                line_number += chunk.count(b'\n', counted, line_start)
+                counted = line_start
+                line = _decode(raw_line, encoding).rstrip('\r')
+                matches.append({
+                    'offset': chunk_offset + line_start,
+                    'line_number': line_number,
+                    'line': line,
+                    'level': classify_level(line)
+                })
+                if len(matches) >= max_matches:
+                    stopped_early = True
+                    break
+
+            chunk_offset += len(chunk)
+            if stopped_early:
+                chunk_offset = matches[-1]['offset'] + len(raw_line) + 1
+                break
+            line_number += chunk.count(b'\n', counted)
+
+            if progress:
+                progress(min(chunk_offset, total), total)
+            if not data:
+                break
+
+    return {
+        'matches': matches,
+        'bytes_scanned': min(chunk_offset, total) if primary is not None else 0,
+        'total_bytes': total,
+        'stopped_early': stopped_early
+    }
+
+def read_around(file_path, offset, before=10, after=10, encoding='utf-8'):
+    """Return (lines, index) around the line starting at `offset`; lines[index] is that line"""
+    previous = tail_lines(file_path, before, encoding=encoding, end=offset) if before > 0 else []
+    following, _ = read_from_offset(file_path, offset, max_lines=after + 1, encoding=encoding,
+                                    max_bytes=(after + 1) * 64 * 1024)
+    if not following:
+        # Last line of the file without a trailing newline
+        with open(file_path, 'rb') as f:
+            f.seek(offset)
+            following = [_decode(f.read(64 * 1024), encoding)]
+    return previous + following, len(previous)
@@ -0,0 +1,209 @@
+import os
+import time
+import datetime
+import threading
+from array import array
+
+import psutil
+
+# Series kept in the ring buffers, in sampling order
+METRIC_SERIES = (
+    'cpu_percent',
+    'memory_percent',
+    'swap_percent',
+    'disk_percent',
+    'disk_read_bps',
+    'disk_write_bps',
+    'net_sent_bps',
+    'net_recv_bps',
+    'load_1',
+    'load_5',
+    'load_15',
+)
+
+class RingBuffer:
+    """Bounded, array-backed circular buffer of floats; storage grows on demand up to capacity"""
+
+    def __init__(self, capacity, typecode='d'):
+        self.capacity = capacity
+        self._data = array(typecode)
+        self._start = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, value):
+        """Append a value, overwriting the oldest one when full"""
+        if self._size < self.capacity:
+            # Not full yet: nothing has wrapped, so the new value goes at the end
+            self._data.append(value)
+            self._size += 1
+            return
+        self._data[self._start] = value
+        self._start = (self._start + 1) % self.capacity
+
+    def last(self, default=None):
+        """Return the newest value"""
+        if not self._size:
+            return default
+        return self._data[(self._start + self._size - 1) % self.capacity]
+
+    def to_list(self, count=None):
+        """Return the newest `count` values (all by default), oldest first"""
+        size = self._size if count is None else min(count, self._size)
+        first = (self._start + self._size - size) % self.capacity
+        end = first + size
+        if end <= self.capacity:
+            return self._data[first:end].tolist()
+        return self._data[first:].tolist() + self._data[:end - self.capacity].tolist()
+
+class MetricsCollector:
+    """Background sampler that feeds shared ring buffers with host metrics"""
+
+    def __init__(self, interval=2.0, capacity=1800):
+        self.interval = interval
+        self.capacity = capacity
+        self._timestamps = RingBuffer(capacity)
+        self._series = {name: RingBuffer(capacity) for name in METRIC_SERIES}
+        self._latest = {}
+        self._lock = threading.Lock()
+        # Serializes _sample() + _record(): both mutate the previous I/O counters
+        self._sample_lock = threading.Lock()
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._listeners = []
+        self._last_disk_io = None
+        self._last_net_io = None
+        self._last_sample_time = None
+
+    def start(self):
+        """Start the sampler thread (idempotent)"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='metrics-collector', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the sampler thread"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 1)
+
+    def is_running(self):
+        return bool(self._thread and self._thread.is_alive())
+
+    def add_listener(self, callback):
+        """Register a callback invoked with every new sample"""
+        self._listeners.append(callback)
+
+    def _run(self):
+        """Sampling loop"""
+        # Prime psutil's non-blocking counters so the first sample is meaningful
+        psutil.cpu_percent(interval=None)
+        psutil.cpu_percent(interval=None, percpu=True)
+        self._stop.wait(0.2)
+
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                with self._sample_lock:
+                    self._record(self._sample())
+            except Exception as e:
+                print(f"Error collecting metrics: {e}")
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def _sample(self):
+        """Collect a single sample without blocking"""
+        now = time.time()
+        elapsed = now - self._last_sample_time if self._last_sample_time else None
+
+        memory = psutil.virtual_memory()
+        swap = psutil.swap_memory()
+        disk = psutil.disk_usage('/')
+
+        sample = {
+            'timestamp': now,
+            'cpu_percent': psutil.cpu_percent(interval=None),
+            'cpu_per_core': psutil.cpu_percent(interval=None, percpu=True),
+            'memory': memory,
+            'swap': swap,
+            'disk': disk,
+            'memory_percent': memory.percent,
+            'swap_percent': swap.percent,
+            'disk_percent': (disk.used / disk.total) * 100 if disk.total else 0.0,
+            'disk_read_bps': 0.0,
+            'disk_write_bps': 0.0,
+            'net_sent_bps': 0.0,
+            'net_recv_bps': 0.0,
+        }
+
+        # Disk I/O rates
+        disk_io = psutil.disk_io_counters()
+        if disk_io and self._last_disk_io and elapsed:
+            sample['disk_read_bps'] = max(0, disk_io.read_bytes - self._last_disk_io.read_bytes) / elapsed
+            sample['disk_write_bps'] = max(0, disk_io.write_bytes - self._last_disk_io.write_bytes) / elapsed
+        self._last_disk_io = disk_io
+
+        # Network I/O rates
+        net_io = psutil.net_io_counters()
+        if net_io and self._last_net_io and elapsed:
+            sample['net_sent_bps'] = max(0, net_io.bytes_sent - self._last_net_io.bytes_sent) / elapsed
+            sample['net_recv_bps'] = max(0, net_io.bytes_recv - self._last_net_io.bytes_recv) / elapsed
+        self._last_net_io = net_io
+        sample['net_io'] = net_io
+
+        # Load average (Unix only)
+        try:
+            sample['load_1'], sample['load_5'], sample['load_15'] = os.getloadavg()
+        except (AttributeError, OSError):
+            sample['load_1'] = sample['load_5'] = sample['load_15'] = 0.0
+
+        self._last_sample_time = now
+        return sample
+
+    def _record(self, sample):
+        """Store a sample in the ring buffers"""
+        with self._lock:
+            self._timestamps.append(sample['timestamp'])
+            for name, buffer in self._series.items():
+                buffer.append(float(sample[name]))
+            self._latest = sample
+        self._ready.set()
+
+        for callback in self._listeners:
+            try:
+                callback(sample)
+            except Exception as e:
+                print(f"Error in metrics listener: {e}")
+
+    def latest(self, wait=2.0):
+        """Return the newest sample, starting the collector if needed"""
+        self.start()
+        if not self._ready.wait(wait):
+            # Sampler still warming up: take one inline sample instead of failing
+            with self._sample_lock:
+                if not self._ready.is_set():
+                    self._record(self._sample())
+        with self._lock:
+            return dict(self._latest)
+
+    def history(self, series=None, seconds=None):
+        """Return a snapshot of the buffered time series, oldest first"""
+        self.start()
+        names = series or METRIC_SERIES
+        with self._lock:
+            count = None
+            if seconds is not None:
+                count = min(len(self._timestamps), int(seconds / self.interval) + 1)
+            timestamps = self._timestamps.to_list(count)
+            data = {name: self._series[name].to_list(count) for name in names}
+
+        data['timestamps'] = [datetime.datetime.fromtimestamp(ts) for ts in timestamps]
+        return data
+
+# Shared collector instance
+metrics_collector = MetricsCollector()
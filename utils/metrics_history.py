@@ -0,0 +1,150 @@
+import os
+import json
+import time
+import sqlite3
+import datetime
+import threading
+
+from utils.metrics_collector import METRIC_SERIES, metrics_collector
+
+HISTORY_DB_PATH = "/srv/projects/shared/dashboard/data/metrics_history.db"
+CLAUDE_LIMITS_PATH = "/srv/projects/shared/dashboard/config/claude_limits.json"
+
+# (table, bucket size in seconds, source table, retention in seconds)
+ROLLUPS = (
+    ('metrics_1m', 60, 'metrics_raw', 7 * 86400),
+    ('metrics_15m', 900, 'metrics_1m', 30 * 86400),
+    ('metrics_1h', 3600, 'metrics_15m', 365 * 86400),
+)
+
+# Query ranges exposed to the charts: label -> seconds
+HISTORY_RANGES = {
+    '1h': 3600,
+    '24h': 86400,
+    '7d': 7 * 86400,
+    '30d': 30 * 86400,
+}
+
+def load_retention_hours(default=24):
+    """Read monitoring.history_retention_hours from claude_limits.json"""
+    try:
+        with open(CLAUDE_LIMITS_PATH, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        return float(config.get('monitoring', {}).get('history_retention_hours', default))
+    except (OSError, ValueError, TypeError):
+        return default
+
+class MetricsHistory:
+    """Append-only SQLite time-series store with 1m/15m/1h rollups"""
+
+    def __init__(self, db_path=HISTORY_DB_PATH, raw_retention_hours=None):
+        self.db_path = db_path
+        self.raw_retention = (raw_retention_hours or load_retention_hours()) * 3600
+        self._lock = threading.Lock()
+        self._conn = None
+        self._last_rollup_minute = None
+
+    def _connect(self):
+        """Open the database lazily and create the schema"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            columns = ', '.join(f'{name} REAL' for name in METRIC_SERIES)
+            conn.execute(f'CREATE TABLE IF NOT EXISTS metrics_raw '
+                         f'(ts REAL PRIMARY KEY, samples INTEGER DEFAULT 1, {columns})')
+            for table, _, _, _ in ROLLUPS:
+                conn.execute(f'CREATE TABLE IF NOT EXISTS {table} '
+                             f'(ts INTEGER PRIMARY KEY, samples INTEGER, {columns})')
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def record(self, sample):
+        """Append a collector sample and roll up completed buckets"""
+        placeholders = ', '.join('?' for _ in METRIC_SERIES)
+        values = [sample['timestamp']] + [float(sample[name]) for name in METRIC_SERIES]
+
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.execute(f'INSERT OR REPLACE INTO metrics_raw (ts, {", ".join(METRIC_SERIES)}) '
+                             f'VALUES (?, {placeholders})', values)
+
+                # Rollups and eviction only need to run once per minute
+                minute = int(sample['timestamp'] // 60)
+                if minute != self._last_rollup_minute:
+                    self._rollup(conn, sample['timestamp'])
+                    self._evict(conn, sample['timestamp'])
+                    self._last_rollup_minute = minute
+
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"Error recording metrics history: {e}")
+
+    def _rollup(self, conn, now):
+        """Aggregate completed buckets from each source into its rollup table"""
+        averages = ', '.join(f'SUM({name} * samples) / SUM(samples)' for name in METRIC_SERIES)
+
+        for table, size, source, _ in ROLLUPS:
+            last = conn.execute(f'SELECT MAX(ts) FROM {table}').fetchone()[0]
+            start = last + size if last is not None else 0
+            end = int(now // size) * size  # Only buckets that are already closed
+
+            if start >= end:
+                continue
+
+            conn.execute(
+                f'INSERT OR REPLACE INTO {table} (ts, samples, {", ".join(METRIC_SERIES)}) '
+                f'SELECT CAST(ts / {size} AS INTEGER) * {size} AS bucket, SUM(samples), {averages} '
+                f'FROM {source} WHERE ts >= ? AND ts < ? GROUP BY bucket',
+                (start, end)
+            )
+
+    def _evict(self, conn, now):
+        """Drop rows older than each table's retention"""
+        conn.execute('DELETE FROM metrics_raw WHERE ts < ?', (now - self.raw_retention,))
+        for table, _, _, retention in ROLLUPS:
+            conn.execute(f'DELETE FROM {table} WHERE ts < ?', (now - retention,))
+
+    def resolution_for(self, seconds):
+        """Pick the coarsest table that still yields a useful number of points"""
+        if seconds <= 3600:
+            return 'metrics_raw'
+        if seconds <= 86400:
+            return 'metrics_1m'
+        if seconds <= 7 * 86400:
+            return 'metrics_15m'
+        return 'metrics_1h'
+
+    def query(self, seconds, series=None):
+        """Return the last `seconds` of history at an automatic resolution"""
+        names = list(series or METRIC_SERIES)
+        table = self.resolution_for(seconds)
+        since = time.time() - seconds
+
+        data = {name: [] for name in names}
+        data['timestamps'] = []
+
+        with self._lock:
+            try:
+                rows = self._connect().execute(
+                    f'SELECT ts, {", ".join(names)} FROM {table} WHERE ts >= ? ORDER BY ts',
+                    (since,)
+                ).fetchall()
+            except sqlite3.Error as e:
+                print(f"Error querying metrics history: {e}")
+                rows = []
+
+        for row in rows:
+            data['timestamps'].append(datetime.datetime.fromtimestamp(row[0]))
+            for name, value in zip(names, row[1:]):
+                data[name].append(value)
+
+        data['resolution'] = table
+        return data
+
+# Shared history store, fed by the background collector
+metrics_history = MetricsHistory()
+metrics_collector.add_listener(metrics_history.record)
@@ -0,0 +1,181 @@
+import time
+import datetime
+import threading
+
+from utils.metrics_collector import RingBuffer
+from utils.metrics_history import load_retention_hours
+
+# Per-process series, stored as 4-byte floats to keep hundreds of sessions cheap
+PROCESS_SERIES = ('rss_mb', 'cpu_percent', 'num_threads', 'num_fds')
+HISTORY_INTERVAL = 30.0  # Seconds between recorded samples of the same process
+
+# Leak detection: fit RSS over this window and flag sustained growth
+LEAK_WINDOW_SECONDS = 30 * 60
+LEAK_MIN_SAMPLES = 10
+LEAK_MIN_RATE_MB_PER_HOUR = 50.0
+LEAK_MIN_FIT = 0.8  # R² of the linear fit; filters out noisy, non-monotonic usage
+LEAK_HORIZON_HOURS = 6.0  # Only flag processes projected to hit the threshold this soon
+
+class ProcessHistory:
+    """Compact in-memory time series per process, keyed by (pid, create_time).
+
+    Each process gets ring buffers bounded by the retention in
+    claude_limits.json (monitoring.history_retention_hours) at one sample
+    every `interval` seconds, which only grow as samples arrive, so
+    short-lived processes stay small. Samples arriving faster than the
+    interval are dropped, so the store can be fed from every monitor
+    snapshot. Series
+    of processes that exited are kept until their last sample falls out
+    of the retention window.
+    """
+
+    def __init__(self, interval=HISTORY_INTERVAL, retention_hours=None):
+        self.interval = interval
+        self.retention = (retention_hours or load_retention_hours()) * 3600
+        self.capacity = max(2, int(self.retention / interval) + 1)
+        self._lock = threading.Lock()
+        self._processes = {}
+
+    def record(self, processes, timestamp=None):
+        """Append one sample per process; processes are monitor dicts"""
+        now = timestamp or time.time()
+
+        with self._lock:
+            for proc in processes:
+                key = (proc['pid'], _epoch(proc['create_time']))
+                entry = self._processes.get(key)
+                if entry is None:
+                    entry = self._processes[key] = {
+                        'timestamps': RingBuffer(self.capacity),
+                        'series': {name: RingBuffer(self.capacity, 'f') for name in PROCESS_SERIES},
+                    }
+                elif now - entry['timestamps'].last(0) < self.interval:
+                    continue
+
+                entry['info'] = {
+                    'pid': proc['pid'],
+                    'create_time': key[1],
+                    'name': proc.get('name', ''),
+                    'username': proc.get('username', ''),
+                    'cmdline': proc.get('cmdline', ''),
+                }
+                entry['timestamps'].append(now)
+                entry['series']['rss_mb'].append(proc.get('memory_mb') or 0)
+                entry['series']['cpu_percent'].append(proc.get('cpu_percent') or 0)
+                entry['series']['num_threads'].append(proc.get('num_threads') or 0)
+                entry['series']['num_fds'].append(proc.get('num_fds') or 0)
+
+            # Forget processes whose newest sample is past the retention
+            expired = [key for key, entry in self._processes.items()
+                       if now - entry['timestamps'].last(0) > self.retention]
+            for key in expired:
+                del self._processes[key]
+
+    def sessions(self):
+        """Processes with recorded history, newest sample first"""
+        with self._lock:
+            sessions = [{
+                **entry['info'],
+                'samples': len(entry['timestamps']),
+                'first_seen': entry['timestamps'].to_list(1)[0] if len(entry['timestamps']) else None,
+                'last_seen': entry['timestamps'].last(),
+            } for entry in self._processes.values()]
+        return sorted(sessions, key=lambda s: s['last_seen'] or 0, reverse=True)
+
+    def history(self, pid, create_time, seconds=None):
+        """Recorded series of one process, oldest first (empty lists if unknown)"""
+        key = (pid, _epoch(create_time))
+        data = {name: [] for name in PROCESS_SERIES}
+        data['timestamps'] = []
+
+        with self._lock:
+            entry = self._processes.get(key)
+            if entry is None:
+                return data
+            count = None
+            if seconds is not None:
+                count = min(len(entry['timestamps']), int(seconds / self.interval) + 1)
+            timestamps = entry['timestamps'].to_list(count)
+            for name in PROCESS_SERIES:
+                data[name] = entry['series'][name].to_list(count)
+
+        data['timestamps'] = [datetime.datetime.fromtimestamp(ts) for ts in timestamps]
+        return data
+
+    def growth_rate(self, pid, create_time, window=LEAK_WINDOW_SECONDS):
+        """Least-squares RSS slope in MB/hour over the window, with its R² (None if too few samples)"""
+        key = (pid, _epoch(create_time))
+        with self._lock:
+            entry = self._processes.get(key)
+            if entry is None:
+                return None
+            count = min(len(entry['timestamps']), int(window / self.interval) + 1)
+            timestamps = entry['timestamps'].to_list(count)
+            values = entry['series']['rss_mb'].to_list(count)
+        return _linear_fit(timestamps, values)
+
+    def detect_leaks(self, threshold_mb, window=LEAK_WINDOW_SECONDS,
+                     min_rate=LEAK_MIN_RATE_MB_PER_HOUR, horizon_hours=LEAK_HORIZON_HOURS):
+        """Live processes whose RSS grows steadily toward threshold_mb"""
+        now = time.time()
+        with self._lock:
+            keys = [key for key, entry in self._processes.items()
+                    if now - entry['timestamps'].last(0) <= 2 * self.interval]
+
+        leaks = []
+        for pid, create_time in keys:
+            fit = self.growth_rate(pid, create_time, window)
+            if fit is None:
+                continue
+            rate, r_squared, current_mb = fit
+            if rate < min_rate or r_squared < LEAK_MIN_FIT:
+                continue
+
+            hours_to_threshold = max(0.0, (threshold_mb - current_mb) / rate)
+            if hours_to_threshold > horizon_hours:
+                continue
+
+            with self._lock:
+                info = dict(self._processes[(pid, create_time)]['info'])
+            leaks.append({
+                **info,
+                'rss_mb': round(current_mb, 2),
+                'growth_mb_per_hour': round(rate, 1),
+                'fit': round(r_squared, 3),
+                'hours_to_threshold': round(hours_to_threshold, 2),
+                'over_threshold': current_mb >= threshold_mb,
+            })
+
+        return sorted(leaks, key=lambda leak: leak['hours_to_threshold'])
+
+    def __len__(self):
+        return len(self._processes)
+
+def _epoch(create_time):
+    """Monitor dicts carry datetimes; keys use the epoch float from psutil"""
+    if isinstance(create_time, datetime.datetime):
+        return create_time.timestamp()
+    return float(create_time)
+
+def _linear_fit(timestamps, values):
+    """(slope per hour, R², last value) of a least-squares line, or None"""
+    n = len(values)
+    if n < LEAK_MIN_SAMPLES:
+        return None
+
+    origin = timestamps[0]
+    xs = [(ts - origin) / 3600 for ts in timestamps]
+    mean_x = sum(xs) / n
+    mean_y = sum(values) / n
+    sxx = sum((x - mean_x) ** 2 for x in xs)
+    syy = sum((y - mean_y) ** 2 for y in values)
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, values))
+    if sxx == 0:
+        return None
+
+    slope = sxy / sxx
+    r_squared = (sxy * sxy) / (sxx * syy) if syy else 0.0
+    return slope, r_squared, values[-1]
+
+# Shared per-process history, fed by the Claude monitor
+process_history = ProcessHistory()
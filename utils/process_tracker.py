@@ -0,0 +1,85 @@
+import time
+import threading
+
+import psutil
+
+PRUNE_INTERVAL = 30  # Seconds between sweeps for handles of exited processes
+
+class ProcessTracker:
+    """Keeps psutil.Process handles alive across ticks, keyed by (pid, create_time).
+
+    psutil computes cpu_percent(interval=None) as the delta of CPU times
+    since the previous call on the same Process object, so a handle that
+    is created fresh on every refresh always reports 0.0. Holding on to
+    the handles gives real per-process CPU without blocking intervals.
+    The create_time in the key keeps a reused pid from inheriting the
+    previous process's baseline.
+    """
+
+    def __init__(self, prune_interval=PRUNE_INTERVAL):
+        self.prune_interval = prune_interval
+        self._handles = {}
+        self._lock = threading.Lock()
+        self._last_prune = time.monotonic()
+
+    def handle(self, proc, create_time=None):
+        """Return the persistent handle for a process (a psutil.Process or a pid)"""
+        if not isinstance(proc, psutil.Process):
+            proc = psutil.Process(proc)
+        if create_time is None:
+            create_time = proc.create_time()
+        key = (proc.pid, create_time)
+
+        with self._lock:
+            entry = self._handles.get(key)
+            if entry is None:
+                entry = self._handles[key] = {'process': proc, 'primed': False}
+            entry['seen'] = time.monotonic()
+        return entry
+
+    def cpu_percent(self, proc, create_time=None):
+        """CPU% since the previous tick; the first sample is the lifetime average"""
+        entry = self.handle(proc, create_time)
+        process = entry['process']
+
+        if entry['primed']:
+            value = process.cpu_percent(interval=None)
+        else:
+            # First sight: set the baseline and fall back to the average since start
+            process.cpu_percent(interval=None)
+            entry['primed'] = True
+            times = process.cpu_times()
+            elapsed = time.time() - process.create_time()
+            value = (times.user + times.system) / elapsed * 100 if elapsed > 0 else 0.0
+
+        self._maybe_prune()
+        return round(value, 1)
+
+    def _maybe_prune(self):
+        if time.monotonic() - self._last_prune >= self.prune_interval:
+            self.prune()
+
+    def prune(self):
+        """Drop handles of processes that exited (or whose pid was reused)"""
+        with self._lock:
+            self._last_prune = time.monotonic()
+            entries = list(self._handles.items())
+
+        dead = []
+        for key, entry in entries:
+            try:
+                if not entry['process'].is_running():
+                    dead.append(key)
+            except psutil.Error:
+                dead.append(key)
+
+        with self._lock:
+            for key in dead:
+                self._handles.pop(key, None)
+        return len(dead)
+
+    def __len__(self):
+        return len(self._handles)
+
+# Shared tracker for per-process CPU sampling
+process_tracker = ProcessTracker()
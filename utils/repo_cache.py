@@ -0,0 +1,147 @@
+import os
+import json
+import time
+import threading
+
+from utils.disk_usage import VENDORED_DIRS
+
+REPO_CACHE_PATH = "/srv/projects/shared/dashboard/data/repo_cache.json"
+REPO_CACHE_MAX_AGE = 600  # Working tree edits don't touch .git, so entries still expire
+
+def repo_fingerprint(repo_path):
+    """mtimes that change whenever HEAD, the index or any ref moves"""
+    git_dir = os.path.join(repo_path, '.git')
+    fingerprint = []
+    for path in (repo_path, os.path.join(git_dir, 'HEAD'), os.path.join(git_dir, 'index'),
+                 os.path.join(git_dir, 'packed-refs'), os.path.join(git_dir, 'FETCH_HEAD')):
+        try:
+            fingerprint.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            fingerprint.append(0)
+
+    # Refs are updated through lock file + rename, which bumps the directory mtime
+    for root, dirs, _ in os.walk(os.path.join(git_dir, 'refs')):
+        dirs.sort()
+        try:
+            fingerprint.append(os.stat(root).st_mtime_ns)
+        except OSError:
+            continue
+    return fingerprint
+
+def worktree_fingerprint(repo_path):
+    """repo_fingerprint plus the file count and newest mtime of the working tree.
+
+    Catches edited, added and removed files, which don't touch .git, so
+    results that depend on the working tree (status, is_clean) can be
+    reused until something actually changed. .git and vendored
+    directories (normally ignored) are not walked.
+    """
+    count = 0
+    newest = 0
+    stack = [repo_path]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    # .git is covered by repo_fingerprint; git status itself touches it (index.lock)
+                    if entry.name == '.git':
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in VENDORED_DIRS:
+                                stack.append(entry.path)
+                        else:
+                            count += 1
+                        newest = max(newest, entry.stat(follow_symlinks=False).st_mtime_ns)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return repo_fingerprint(repo_path) + [count, newest]
+
+class RepoCache:
+    """Per-repository cache of git query results keyed on the repo fingerprint.
+
+    Each repository holds one entry per kind of query ('basic', 'status',
+    'info', ...). An entry is reused while the fingerprint is unchanged and
+    it is younger than `max_age`; the cache is persisted between restarts.
+    """
+
+    def __init__(self, cache_path=REPO_CACHE_PATH, max_age=REPO_CACHE_MAX_AGE):
+        self.cache_path = cache_path
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._entries = None
+        self._dirty = False
+
+    def _load(self):
+        if self._entries is not None:
+            return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def save(self):
+        """Persist the cache atomically if it changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+                tmp_path = f"{self.cache_path}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self._entries, f)
+                os.replace(tmp_path, self.cache_path)
+                self._dirty = False
+            except (OSError, TypeError, ValueError) as e:
+                print(f"Error saving repository cache: {e}")
+
+    def get(self, repo_path, kind, compute, fingerprint=None, max_age=None):
+        """Return compute(repo_path), reusing the cached value while the repo is unchanged"""
+        if max_age is None:
+            max_age = self.max_age
+        if fingerprint is None:
+            fingerprint = repo_fingerprint(repo_path)
+
+        with self._lock:
+            self._load()
+            entry = self._entries.get(repo_path, {}).get(kind)
+            if (entry and entry['fingerprint'] == fingerprint
+                    and time.time() - entry['time'] < max_age):
+                return entry['value']
+
+        value = compute(repo_path)
+
+        with self._lock:
+            self._entries.setdefault(repo_path, {})[kind] = {
+                'fingerprint': fingerprint,
+                'time': time.time(),
+                'value': value
+            }
+            self._dirty = True
+        return value
+
+    def invalidate(self, repo_path=None):
+        """Drop the entries of one repository, or of all of them"""
+        with self._lock:
+            self._load()
+            if repo_path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(repo_path, None)
+            self._dirty = True
+        self.save()
+
+    def prune(self, repo_paths):
+        """Forget repositories that are no longer found by the scan"""
+        keep = set(repo_paths)
+        with self._lock:
+            self._load()
+            for path in [p for p in self._entries if p not in keep]:
+                del self._entries[path]
+                self._dirty = True
+
+# Shared cache used by the repository scanner and the repositories page
+repo_cache = RepoCache()
@@ -0,0 +1,209 @@
+import os
+import re
+import sqlite3
+import threading
+
+from utils.file_watcher import index_watcher
+
+SEARCH_DB_PATH = "/srv/projects/shared/dashboard/data/search_index.db"
+
+# Each indexed line is stored with rowid = (doc_id << LINE_BITS) | line_number,
+# so a document's lines (and a match's neighbours) are a contiguous rowid range.
+LINE_BITS = 20
+MAX_LINES = (1 << LINE_BITS) - 1
+MAX_FILE_SIZE = 2 * 1024 * 1024  # Skip huge .txt dumps
+
+class SearchIndex:
+    """Persistent full-text index (SQLite FTS5) over the documentation files"""
+
+    def __init__(self, db_path=SEARCH_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn = None
+        self._pending_docs = None
+        self._sync_event = threading.Event()
+        self._syncing = False
+        self._thread = None
+
+    def _connect(self):
+        """Open the database lazily and create the schema"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS docs '
+                         '(doc_id INTEGER PRIMARY KEY, path TEXT UNIQUE, mtime REAL, size INTEGER, lines INTEGER)')
+            conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS lines_fts USING fts5"
+                         "(content, tokenize='unicode61 remove_diacritics 2')")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    # Indexing
+
+    def schedule_sync(self, docs):
+        """Queue an incremental sync with the given document list (non-blocking)"""
+        with self._lock:
+            self._pending_docs = docs
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='search-index', daemon=True)
+                self._thread.start()
+        self._sync_event.set()
+
+    def _run(self):
+        """Worker loop applying the latest queued document list"""
+        while True:
+            self._sync_event.wait()
+            self._sync_event.clear()
+            with self._lock:
+                docs, self._pending_docs = self._pending_docs, None
+            if docs is None:
+                continue
+            self._syncing = True
+            try:
+                self.sync(docs)
+            except Exception as e:
+                print(f"Error syncing search index: {e}")
+            finally:
+                self._syncing = False
+
+    def is_syncing(self):
+        return self._syncing or self._pending_docs is not None
+
+    def sync(self, docs):
+        """Reindex new or changed documents and drop the ones that disappeared"""
+        with self._lock:
+            conn = self._connect()
+            indexed = {path: (doc_id, mtime, size) for doc_id, path, mtime, size
+                       in conn.execute('SELECT doc_id, path, mtime, size FROM docs')}
+
+        current = set()
+        for doc in docs:
+            path = doc['path']
+            current.add(path)
+            known = indexed.get(path)
+            if known and known[1] == doc['modified_timestamp'] and known[2] == doc['size']:
+                continue
+            self._index_document(path, doc['modified_timestamp'], doc['size'], known[0] if known else None)
+
+        with self._lock:
+            for path, (doc_id, _, _) in indexed.items():
+                if path not in current:
+                    self._delete_lines(conn, doc_id)
+                    conn.execute('DELETE FROM docs WHERE doc_id = ?', (doc_id,))
+            conn.commit()
+
+    def _delete_lines(self, conn, doc_id):
+        conn.execute('DELETE FROM lines_fts WHERE rowid BETWEEN ? AND ?',
+                     (doc_id << LINE_BITS, (doc_id << LINE_BITS) | MAX_LINES))
+
+    def _index_document(self, path, mtime, size, doc_id=None):
+        """(Re)index the lines of one document"""
+        lines = []
+        if size <= MAX_FILE_SIZE:
+            try:
+                with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                    for line_number, line in enumerate(f, 1):
+                        if line_number > MAX_LINES:
+                            break
+                        if line.strip():
+                            lines.append((line_number, line.rstrip('\n')))
+            except OSError:
+                lines = []
+
+        with self._lock:
+            conn = self._connect()
+            if doc_id is None:
+                doc_id = conn.execute('INSERT INTO docs (path, mtime, size, lines) VALUES (?, ?, ?, ?)',
+                                      (path, mtime, size, len(lines))).lastrowid
+            else:
+                self._delete_lines(conn, doc_id)
+                conn.execute('UPDATE docs SET mtime = ?, size = ?, lines = ? WHERE doc_id = ?',
+                             (mtime, size, len(lines), doc_id))
+
+            conn.executemany('INSERT INTO lines_fts (rowid, content) VALUES (?, ?)',
+                             [((doc_id << LINE_BITS) | number, text) for number, text in lines])
+            conn.commit()
+
+    # Querying
+
+    @staticmethod
+    def build_query(search_term):
+        """Translate user input into an FTS5 query: "quoted" phrases, prefix-matched words"""
+        parts = []
+        for phrase, word in re.findall(r'"([^"]+)"|(\S+)', search_term):
+            if phrase:
+                tokens = re.findall(r'\w+', phrase)
+                if tokens:
+                    parts.append('"' + ' '.join(tokens) + '"')
+            else:
+                parts.extend(f'"{token}"*' for token in re.findall(r'\w+', word))
+        return ' AND '.join(parts)
+
+    def search(self, search_term, limit=50, per_doc=10, context_size=2):
+        """Ranked full-text search; returns matches grouped per document, best first
+
+        Returns None when the index can't be used (no FTS5 in this SQLite
+        build, locked or corrupt database), so callers can fall back to a
+        linear scan.
+        """
+        query = self.build_query(search_term)
+        if not query:
+            return []
+
+        with self._lock:
+            try:
+                conn = self._connect()
+                # Rank every matching document in SQL (a document's score is the sum of its
+                # line scores; FTS5's rank is bm25), then fetch lines only for the top documents
+                ranked = conn.execute(
+                    f"SELECT rowid >> {LINE_BITS} AS doc_id, SUM(-rank) AS score "
+                    "FROM lines_fts WHERE lines_fts MATCH ? GROUP BY doc_id ORDER BY score DESC LIMIT ?",
+                    (query, limit)
+                ).fetchall()
+                paths = dict(conn.execute(
+                    f"SELECT doc_id, path FROM docs WHERE doc_id IN ({', '.join('?' for _ in ranked)})",
+                    [doc_id for doc_id, _ in ranked]
+                ).fetchall()) if ranked else {}
+
+                results = []
+                for doc_id, score in ranked:
+                    if doc_id not in paths:
+                        continue
+                    first_rowid = doc_id << LINE_BITS
+                    matches = conn.execute(
+                        "SELECT rowid, content, snippet(lines_fts, 0, '**', '**', '…', 24) "
+                        "FROM lines_fts WHERE lines_fts MATCH ? AND rowid BETWEEN ? AND ? "
+                        "ORDER BY rank LIMIT ?",
+                        (query, first_rowid, first_rowid | MAX_LINES, per_doc)
+                    ).fetchall()
+                    for rowid, content, snippet in sorted(matches):
+                        results.append({
+                            'file': paths[doc_id],
+                            'line_number': rowid & MAX_LINES,
+                            'line_content': content.strip(),
+                            'snippet': snippet.strip(),
+                            'score': round(score, 3),
+                            'context': self._context(conn, rowid, context_size)
+                        })
+            except (sqlite3.Error, OSError) as e:
+                print(f"Error searching index: {e}")
+                return None
+
+        return results
+
+    def _context(self, conn, rowid, context_size):
+        """Rebuild the lines around a match from neighbouring rowids"""
+        line_number = rowid & MAX_LINES
+        rows = conn.execute('SELECT rowid, content FROM lines_fts WHERE rowid BETWEEN ? AND ? ORDER BY rowid',
+                            (rowid - min(context_size, line_number - 1), rowid + context_size)).fetchall()
+
+        context_lines = []
+        for other_rowid, content in rows:
+            prefix = ">>> " if other_rowid == rowid else "    "
+            context_lines.append(f"{prefix}{other_rowid & MAX_LINES}: {content.strip()}")
+        return "\n".join(context_lines)
+
+# Shared search index, kept in sync with the markdown index snapshots
+search_index = SearchIndex()
+index_watcher.add_listener('markdown', search_index.schedule_sync)
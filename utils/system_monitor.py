@@ -4,6 +4,7 @@ import socket
 import datetime
 import os
 import subprocess
+from utils.metrics_collector import metrics_collector
 
 def get_detailed_system_info():
     """Get comprehensive system information"""
@@ -41,6 +42,7 @@ def get_cpu_info():
     """Get detailed CPU information"""
     try:
         cpu_freq = psutil.cpu_freq()
+        sample = metrics_collector.latest()
         
         return {
             'physical_cores': psutil.cpu_count(logical=False),
@@ -49,8 +51,8 @@ def get_cpu_info():
             'current_frequency': cpu_freq.current if cpu_freq else 0,
             'max_frequency': cpu_freq.max if cpu_freq else 0,
             'min_frequency': cpu_freq.min if cpu_freq else 0,
-            'usage_percent': psutil.cpu_percent(interval=1),
-            'usage_per_core': psutil.cpu_percent(interval=1, percpu=True),
+            'usage_percent': sample['cpu_percent'],
+            'usage_per_core': sample['cpu_per_core'],
             'model': get_cpu_model(),
             'architecture': platform.machine(),
             'cache_info': get_cpu_cache_info()
@@ -341,48 +343,18 @@ def get_users_info():
         return {'error': str(e)}
 
 def monitor_system_realtime(duration=60, interval=1):
-    """Monitor system metrics in real-time"""
-    metrics_history = {
-        'timestamps': [],
-        'cpu_percent': [],
-        'memory_percent': [],
-        'disk_io': [],
-        'network_io': []
-    }
+    """Return the last `duration` seconds of system metrics from the collected history"""
+    from utils.metrics_history import metrics_history
     
-    start_time = datetime.datetime.now()
+    history = metrics_history.query(duration)
     
-    try:
-        while (datetime.datetime.now() - start_time).seconds < duration:
-            timestamp = datetime.datetime.now()
-            
-            # Collect metrics
-            cpu_percent = psutil.cpu_percent(interval=0.1)
-            memory_percent = psutil.virtual_memory().percent
-            
-            # Disk I/O
-            disk_io = psutil.disk_io_counters()
-            disk_io_rate = disk_io.read_bytes + disk_io.write_bytes if disk_io else 0
-            
-            # Network I/O
-            net_io = psutil.net_io_counters()
-            net_io_rate = net_io.bytes_sent + net_io.bytes_recv if net_io else 0
-            
-            # Store metrics
-            metrics_history['timestamps'].append(timestamp)
-            metrics_history['cpu_percent'].append(cpu_percent)
-            metrics_history['memory_percent'].append(memory_percent)
-            metrics_history['disk_io'].append(disk_io_rate)
-            metrics_history['network_io'].append(net_io_rate)
-            
-            # Wait for next interval
-            import time
-            time.sleep(interval)
-    
-    except KeyboardInterrupt:
-        pass
-    
-    return metrics_history
+    return {
+        'timestamps': history['timestamps'],
+        'cpu_percent': history['cpu_percent'],
+        'memory_percent': history['memory_percent'],
+        'disk_io': [r + w for r, w in zip(history['disk_read_bps'], history['disk_write_bps'])],
+        'network_io': [s + r for s, r in zip(history['net_sent_bps'], history['net_recv_bps'])]
+    }
 
 def get_system_health_score():
     """Calculate a system health score based on various metrics"""
@@ -390,7 +362,7 @@ def get_system_health_score():
         score = 100  # Start with perfect score
         
         # CPU usage penalty
-        cpu_percent = psutil.cpu_percent(interval=1)
+        cpu_percent = metrics_collector.latest()['cpu_percent']
         if cpu_percent > 90:
             score -= 30
         elif cpu_percent > 70:
@@ -464,7 +436,7 @@ def get_health_recommendations(score):
     
     if score < 90:
         # Check specific issues
-        cpu_percent = psutil.cpu_percent(interval=1)
+        cpu_percent = metrics_collector.latest()['cpu_percent']
         memory_percent = psutil.virtual_memory().percent
         
         if cpu_percent > 70:
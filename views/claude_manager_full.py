@@ -7,7 +7,7 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
+from datetime import datetime
 import time
 import sys
 import os
@@ -341,34 +341,79 @@ with tab2:
                 orphan_processes = len([p for p in processes if p['is_orphan']])
                 create_metric_card("Processos antigos (>2h)", str(old_processes), "schedule")
                 create_metric_card("Processos órfãos", str(orphan_processes), "warning")
-        
-        # Gráfico de linha temporal (simulado)
-        st.subheader("Uso de Recursos ao Longo do Tempo")
-        
-        # Para demonstração, criar dados simulados
-        import numpy as np
-        
-        time_points = pd.date_range(start=datetime.now() - timedelta(hours=2), end=datetime.now(), freq='10min')
-        memory_usage = np.random.normal(memory_stats.get('total_memory_mb', 500), 100, len(time_points))
-        memory_usage = np.maximum(memory_usage, 0)  # Não permitir valores negativos
+
+    # Histórico por processo (alimentado em segundo plano pelo monitor)
+    st.subheader("Uso de Recursos ao Longo do Tempo")
+    
+    leaks = claude_monitor.detect_memory_leaks()
+    if leaks:
+        st.warning(f"{len(leaks)} processo(s) com crescimento sustentado de memória")
+        leaks_df = pd.DataFrame(leaks)[['pid', 'username', 'rss_mb', 'growth_mb_per_hour', 'hours_to_threshold']]
+        leaks_df = leaks_df.rename(columns={
+            'pid': 'PID',
+            'username': 'Usuário',
+            'rss_mb': 'Mem Atual (MB)',
+            'growth_mb_per_hour': 'Crescimento (MB/h)',
+            'hours_to_threshold': 'Horas até o limite'
+        })
+        st.dataframe(leaks_df, use_container_width=True, hide_index=True)
+    
+    sessions = claude_monitor.get_history_sessions()
+    if not sessions:
+        st.info("Histórico ainda vazio - as amostras são coletadas em segundo plano")
+    else:
+        live_pids = {p['pid'] for p in processes}
+        session_labels = {
+            f"PID {s['pid']} - {s['username']} - {s['name']} "
+            f"({'ativo' if s['pid'] in live_pids else 'encerrado'}, {s['samples']} amostras)": s
+            for s in sessions
+        }
+        
+        hist_col1, hist_col2 = st.columns([3, 1])
+        with hist_col1:
+            selected_session = session_labels[st.selectbox("Sessão:", list(session_labels.keys()))]
+        with hist_col2:
+            history_range = st.selectbox("Período:", ["1h", "6h", "24h"], index=0)
+        
+        history = claude_monitor.get_process_history(
+            selected_session['pid'],
+            selected_session['create_time'],
+            {"1h": 3600, "6h": 6 * 3600, "24h": 24 * 3600}[history_range]
+        )
         
         fig_line = go.Figure()
         fig_line.add_trace(go.Scatter(
-            x=time_points,
-            y=memory_usage,
-            mode='lines+markers',
-            name='Uso de Memória (MB)',
+            x=history['timestamps'],
+            y=history['rss_mb'],
+            mode='lines',
+            name='Memória (MB)',
             line=dict(color='blue', width=2)
         ))
+        fig_line.add_trace(go.Scatter(
+            x=history['timestamps'],
+            y=history['cpu_percent'],
+            mode='lines',
+            name='CPU (%)',
+            yaxis='y2',
+            line=dict(color='orange', width=1)
+        ))
         
         fig_line.update_layout(
-            title="Histórico de Uso de Memória (últimas 2h)",
+            title=f"Histórico do PID {selected_session['pid']} (últimas {history_range})",
             xaxis_title="Tempo",
-            yaxis_title="Memória (MB)",
+            yaxis=dict(title="Memória (MB)"),
+            yaxis2=dict(title="CPU (%)", overlaying='y', side='right'),
             showlegend=True
         )
         
         st.plotly_chart(fig_line, use_container_width=True)
+        
+        fig_counts = go.Figure()
+        fig_counts.add_trace(go.Scatter(x=history['timestamps'], y=history['num_threads'], mode='lines', name='Threads'))
+        fig_counts.add_trace(go.Scatter(x=history['timestamps'], y=history['num_fds'], mode='lines', name='Descritores abertos'))
+        fig_counts.update_layout(title="Threads e descritores de arquivo", xaxis_title="Tempo", showlegend=True)
+        
+        st.plotly_chart(fig_counts, use_container_width=True)
 
 # TAB 3: CONFIG
 with tab3:
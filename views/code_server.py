@@ -5,6 +5,7 @@ import json
 import datetime
 from pathlib import Path
 from components.metrics import create_metric_card
+from utils.process_tracker import process_tracker
 
 def get_code_server_status():
     """Obtém status de todos os serviços code-server"""
@@ -33,7 +34,7 @@ def get_code_server_status():
                     try:
                         if 'code-server' in str(proc.info['cmdline']) and str(port) in str(proc.info['cmdline']):
                             memory_mb = proc.memory_info().rss / 1024 / 1024
-                            cpu_percent = proc.cpu_percent(interval=0.1)
+                            cpu_percent = process_tracker.cpu_percent(proc)
                             
                             status_info.append({
                                 'user': user,
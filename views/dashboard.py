@@ -3,7 +3,8 @@ import psutil
 import platform
 import datetime
 from components.metrics import create_metric_card, create_system_metrics
-from components.charts import create_cpu_chart, create_memory_chart, create_disk_chart
+from components.charts import create_cpu_chart, create_memory_chart, create_disk_chart, create_metrics_history_chart
+from utils.metrics_collector import metrics_collector
 
 def run():
     """Main dashboard view"""
@@ -33,20 +34,21 @@ def run():
     if st.sidebar.button(":material/refresh: Atualizar Dados"):
         st.rerun()
     
-    # System overview metrics
+    # System overview metrics (read from the background collector)
+    sample = metrics_collector.latest()
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        cpu_percent = psutil.cpu_percent(interval=1)
+        cpu_percent = sample['cpu_percent']
         create_metric_card("Uso de CPU", f"{cpu_percent}%", "desktop_windows")
     
     with col2:
-        memory = psutil.virtual_memory()
+        memory = sample['memory']
         create_metric_card("Memória", f"{memory.percent}%", "memory")
     
     with col3:
-        disk = psutil.disk_usage('/')
-        disk_percent = (disk.used / disk.total) * 100
+        disk = sample['disk']
+        disk_percent = sample['disk_percent']
         create_metric_card("Disco", f"{disk_percent:.1f}%", "storage")
     
     with col4:
@@ -67,6 +69,11 @@ def run():
         st.markdown("### <span class='material-icons' style='vertical-align: middle; margin-right: 0.5rem;'>analytics</span>Uso de Memória", unsafe_allow_html=True)
         create_memory_chart()
     
+    # Metrics history
+    st.markdown("## <span class='material-icons' style='vertical-align: middle; margin-right: 0.5rem;'>timeline</span>Histórico", unsafe_allow_html=True)
+    history_range = st.radio("Período", ["1h", "24h", "7d", "30d"], index=1, horizontal=True)
+    create_metrics_history_chart(history_range)
+    
     # Disk usage chart
     st.markdown("## <span class='material-icons' style='vertical-align: middle; margin-right: 0.5rem;'>storage</span>Uso de Disco", unsafe_allow_html=True)
     create_disk_chart()
@@ -88,7 +95,7 @@ def run():
     with info_col2:
         st.info(f"""
         **CPU Cores:** {psutil.cpu_count()} físicos, {psutil.cpu_count(logical=True)} lógicos
-        **Memória Total:** {psutil.virtual_memory().total // (1024**3)} GB
+        **Memória Total:** {memory.total // (1024**3)} GB
         **Disco Total:** {disk.total // (1024**3)} GB
         **Boot Time:** {boot_time.strftime('%Y-%m-%d %H:%M:%S')}
         """)
@@ -6,13 +6,14 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from utils.file_scanner import (
-    scan_markdown_files, 
     categorize_documents, 
     get_document_statistics,
     search_files_content,
     build_document_tree
 )
 from utils.agent_scanner import AgentScanner
+from utils.file_watcher import index_watcher
+from utils.search_index import search_index
 from components.markdown_viewer import render_markdown_file, create_toc
 from components.metrics import create_metric_card
 from collections import defaultdict
@@ -20,10 +21,10 @@ from collections import defaultdict
 # Initialize agent scanner
 agent_scanner = AgentScanner()
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
 def get_documentation_files():
     """Get all markdown files from the project directories"""
-    return scan_markdown_files()
+    # Kept up to date by the file watcher, no TTL rescans
+    return index_watcher.get_files('markdown')
 
 def render_tree_streamlit(docs):
     """Render tree using Streamlit native components"""
@@ -462,7 +463,7 @@ def run():
     
     with stat_cols[5]:
         if st.button(":material/refresh: Atualizar"):
-            st.cache_data.clear()
+            index_watcher.request_reconcile('markdown')
             st.rerun()
     
     st.markdown("---")
@@ -476,6 +477,11 @@ def run():
             placeholder="Digite para filtrar documentos...",
             help="Filtra documentos por nome, caminho ou tipo"
         )
+        content_search = st.checkbox(
+            "Buscar no conteúdo",
+            value=False,
+            help="Busca indexada no texto dos documentos. Use aspas para frases exatas."
+        )
     
     with col2:
         # Project filter
@@ -504,7 +510,23 @@ def run():
     if selected_ext != "Todas":
         filtered_docs = [d for d in filtered_docs if d.get('extension') == selected_ext]
     
-    if search_term:
+    content_results = []
+    if search_term and content_search:
+        # Ranked full-text search, keep documents in relevance order
+        allowed_paths = {d['path'] for d in filtered_docs}
+        indexed_results = search_index.search(search_term)
+        if indexed_results is None:
+            # Index unavailable (no FTS5, locked or corrupt database): plain scan instead
+            indexed_results = search_files_content(search_term, [d['path'] for d in filtered_docs])
+        content_results = [r for r in indexed_results if r['file'] in allowed_paths]
+        rank = {}
+        for result in content_results:
+            rank.setdefault(result['file'], len(rank))
+        filtered_docs = sorted(
+            [d for d in filtered_docs if d['path'] in rank],
+            key=lambda d: rank[d['path']]
+        )
+    elif search_term:
         filtered_docs = [
             d for d in filtered_docs 
             if search_term.lower() in d['name'].lower() or 
@@ -608,6 +630,30 @@ def run():
                     if 'selected_doc' in st.session_state:
                         del st.session_state.selected_doc
                     st.rerun()
+        elif content_results:
+            # Full-text search results
+            if search_index.is_syncing():
+                st.caption("Índice de busca sendo atualizado, resultados podem estar incompletos")
+            
+            docs_by_path = {d['path']: d for d in filtered_docs}
+            results_by_file = defaultdict(list)
+            for result in content_results:
+                results_by_file[result['file']].append(result)
+            
+            st.markdown(f"**{len(content_results)} ocorrências em {len(results_by_file)} documentos**")
+            for i, (file_path, file_results) in enumerate(results_by_file.items()):
+                doc = docs_by_path.get(file_path)
+                if doc is None:
+                    continue
+                with st.expander(f"{doc['name']} ({len(file_results)})", expanded=(i < 3)):
+                    st.caption(doc.get('relative_path', file_path))
+                    for result in file_results:
+                        st.markdown(f"`{result['line_number']}` {result.get('snippet', result['line_content'])}")
+                    if st.button("Abrir", key=f"search_open_{i}_{file_path.replace('/', '_').replace('.', '_')}"):
+                        st.session_state.selected_doc = doc
+                        st.session_state.selected_doc_path = doc['path']
+                        st.session_state.show_inline = True
+                        st.rerun()
         else:
             # No document selected
             st.info("""
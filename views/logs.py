@@ -2,14 +2,188 @@ import streamlit as st
 import os
 import glob
 import datetime
-from utils.file_scanner import scan_log_files
+import time
+from utils.file_watcher import index_watcher
+from utils.log_reader import (tail_lines, head_lines, LogFollower, LOG_LEVELS, classify_level,
+                              scan_log, read_around)
+from utils.log_line_index import get_line_index
 from components.markdown_viewer import render_log_content
 from components.metrics import create_metric_card
 
-@st.cache_data(ttl=60)  # Cache for 1 minute
+LIVE_REFRESH_SECONDS = 2
+READ_MODES = ["Últimas linhas", "Primeiras linhas", "Ir para linha", "Intervalo de horário"]
+
 def get_log_files():
     """Get all log files from common log directories"""
-    return scan_log_files()
+    # Kept up to date by the file watcher, no TTL rescans
+    return index_watcher.get_files('logs')
+
+def render_log_lines(display_lines, search_term=None, selected_level="Todos"):
+    """Filter and display log lines with level statistics"""
+    # Apply search filter
+    if search_term:
+        term = search_term.lower()
+        display_lines = [line for line in display_lines if term in line.lower()]
+    
+    # Apply log level filter
+    if selected_level != "Todos":
+        display_lines = [line for line in display_lines if selected_level in line.upper()]
+    
+    # Display log content with syntax highlighting
+    if display_lines:
+        # Create color-coded log display, classifying each line once
+        log_content = []
+        counts = dict.fromkeys(LOG_LEVELS, 0)
+        for line in display_lines:
+            line = line.strip()
+            level = classify_level(line)
+            if level:
+                counts[level] += 1
+                log_content.append(f"[{level}] {line}")
+            else:
+                log_content.append(line)
+        
+        st.code("\n".join(log_content) + "\n", language='log')
+        
+        # Show statistics
+        st.markdown("---")
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            create_metric_card("Erros", counts['ERROR'], "error")
+        
+        with col2:
+            create_metric_card("Avisos", counts['WARN'], "warning")
+        
+        with col3:
+            create_metric_card("Info", counts['INFO'], "info")
+        
+        with col4:
+            create_metric_card("Linhas", len(display_lines), "format_list_numbered")
+        
+    else:
+        st.info("Nenhuma linha encontrada com os filtros aplicados.")
+
+def search_log_file(log_path, search_term, selected_level, max_matches):
+    """Scan the whole file, reusing the last result while the file and filters are unchanged"""
+    stat = os.stat(log_path)
+    key = (log_path, stat.st_size, stat.st_mtime, search_term, selected_level, max_matches)
+    cached = st.session_state.get('log_search')
+    if cached and cached['key'] == key:
+        return cached['result']
+    
+    progress_bar = st.progress(0.0, text="Buscando no arquivo...")
+    
+    def report(done, total):
+        progress_bar.progress(done / total if total else 1.0,
+                              text=f"Buscando no arquivo... {done / (1024*1024):.0f} de {total / (1024*1024):.0f} MB")
+    
+    result = scan_log(log_path, search_term or None, None if selected_level == "Todos" else selected_level,
+                      max_matches=max_matches, progress=report)
+    progress_bar.empty()
+    
+    st.session_state['log_search'] = {'key': key, 'result': result}
+    return result
+
+def render_log_search(log_path, search_term, selected_level, max_matches):
+    """Display whole-file search results and the context around a chosen match"""
+    result = search_log_file(log_path, search_term, selected_level, max_matches)
+    matches = result['matches']
+    
+    if result['stopped_early']:
+        st.caption(f"Primeiras {len(matches)} ocorrências "
+                   f"({result['bytes_scanned'] / (1024*1024):.1f} de {result['total_bytes'] / (1024*1024):.1f} MB lidos)")
+    else:
+        st.caption(f"{len(matches)} ocorrências no arquivo inteiro")
+    
+    render_log_lines([f"{match['line_number']}: {match['line']}" for match in matches])
+    
+    if matches:
+        # Jump to a match using its byte offset
+        selected_match = st.selectbox(
+            "Ir para ocorrência",
+            range(len(matches)),
+            format_func=lambda i: f"Linha {matches[i]['line_number']}: {matches[i]['line'][:100]}"
+        )
+        match = matches[selected_match]
+        context, index = read_around(log_path, match['offset'])
+        first_line = match['line_number'] - index
+        st.code("".join(
+            f"{'>>> ' if i == index else '    '}{first_line + i}: {line.rstrip()}\n"
+            for i, line in enumerate(context)
+        ), language='log')
+
+def render_log_navigation(log_path, read_mode, show_lines):
+    """Jump to a line number or a time range using the sidecar line index"""
+    with st.spinner("Indexando arquivo de log..."):
+        line_index = get_line_index(log_path)
+    
+    total_lines = line_index.line_count()
+    if total_lines == 0:
+        st.info("Arquivo de log vazio.")
+        return
+    
+    if read_mode == "Ir para linha":
+        line_number = st.number_input(f"Linha (1 a {total_lines:,})", min_value=1, max_value=total_lines,
+                                      value=max(1, total_lines - show_lines + 1), step=show_lines)
+        first_line = line_number - 1
+        display_lines = line_index.read_lines(first_line, show_lines)
+    else:
+        # Default to the last five minutes covered by the index
+        _, last_ts = line_index.time_span()
+        if last_ts is None:
+            st.warning("Nenhum horário reconhecido neste arquivo de log.")
+            return
+        default_end = datetime.datetime.fromtimestamp(last_ts)
+        default_start = default_end - datetime.timedelta(minutes=5)
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            day = st.date_input("Data", value=default_start.date())
+        with col2:
+            start_time = st.time_input("De", value=default_start.time().replace(microsecond=0))
+        with col3:
+            end_time = st.time_input("Até", value=default_end.time().replace(microsecond=0))
+        
+        start_ts = datetime.datetime.combine(day, start_time).timestamp()
+        end_ts = datetime.datetime.combine(day, end_time).timestamp()
+        first_line, display_lines = line_index.read_time_range(start_ts, end_ts, max_lines=show_lines)
+    
+    if display_lines:
+        st.caption(f"Linhas {first_line + 1:,} a {first_line + len(display_lines):,} de {total_lines:,}")
+    render_log_lines(display_lines)
+
+def get_log_follower(log_path, max_lines):
+    """Return this session's follower for a log file, creating it on first use"""
+    followers = st.session_state.setdefault('log_followers', {})
+    follower = followers.get(log_path)
+    if follower is None:
+        follower = LogFollower(log_path, max_lines=max_lines)
+        followers[log_path] = follower
+    follower.resize(max_lines)
+    return follower
+
+def render_live_log(log_path, show_lines, search_term, selected_level):
+    """Poll the follower and display its buffer"""
+    follower = get_log_follower(log_path, show_lines)
+    try:
+        follower.poll()
+    except OSError as e:
+        st.error(f"Erro ao ler arquivo de log: {str(e)}")
+        return
+
+    status = f"Offset: {follower.offset:,} bytes · Atualizado às {datetime.datetime.fromtimestamp(follower.last_poll).strftime('%H:%M:%S')}"
+    if follower.rotations or follower.truncations:
+        status += f" · Rotações: {follower.rotations} · Truncamentos: {follower.truncations}"
+    st.caption(status)
+    render_log_lines(follower.lines(), search_term, selected_level)
+
+# Re-run only the live section on a timer instead of sleeping and rerunning the whole page
+_fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None)
+if _fragment:
+    render_live_log_fragment = _fragment(run_every=LIVE_REFRESH_SECONDS)(render_live_log)
+else:
+    render_live_log_fragment = None
 
 def run():
     """Log viewer and analyzer"""
@@ -89,7 +263,7 @@ def run():
     
     with col4:
         if st.button(":material/refresh: Atualizar"):
-            st.cache_data.clear()
+            index_watcher.request_reconcile('logs')
             st.rerun()
     
     st.markdown("---")
@@ -126,7 +300,7 @@ def run():
         show_lines = st.slider("Linhas a mostrar", 10, 1000, 100)
     
     with col2:
-        tail_mode = st.checkbox("Mostrar últimas linhas", value=True)
+        read_mode = st.selectbox("Posição", READ_MODES, index=0)
     
     with col3:
         follow_mode = st.checkbox("Seguir arquivo (live)", value=False)
@@ -142,68 +316,22 @@ def run():
             st.error("Arquivo de log não encontrado.")
             return
         
-        # Read log file
-        with open(log_path, 'r', encoding='utf-8', errors='ignore') as f:
-            if tail_mode:
-                # Read last N lines
-                lines = f.readlines()
-                display_lines = lines[-show_lines:] if len(lines) > show_lines else lines
+        if follow_mode:
+            # Only the bytes appended since the last refresh are read
+            if render_live_log_fragment:
+                render_live_log_fragment(log_path, show_lines, search_term, selected_level)
             else:
-                # Read first N lines
-                display_lines = []
-                for i, line in enumerate(f):
-                    if i >= show_lines:
-                        break
-                    display_lines.append(line)
-        
-        # Apply search filter
-        if search_term:
-            display_lines = [line for line in display_lines if search_term.lower() in line.lower()]
-        
-        # Apply log level filter
-        if selected_level != "Todos":
-            display_lines = [line for line in display_lines if selected_level in line.upper()]
-        
-        # Display log content with syntax highlighting
-        if display_lines:
-            # Create color-coded log display
-            log_content = ""
-            for line in display_lines:
-                line = line.strip()
-                if "ERROR" in line.upper():
-                    log_content += f"[ERROR] {line}\n"
-                elif "WARN" in line.upper():
-                    log_content += f"[WARN] {line}\n"
-                elif "INFO" in line.upper():
-                    log_content += f"[INFO] {line}\n"
-                elif "DEBUG" in line.upper():
-                    log_content += f"[DEBUG] {line}\n"
-                else:
-                    log_content += f"{line}\n"
-            
-            st.code(log_content, language='log')
-            
-            # Show statistics
-            st.markdown("---")
-            col1, col2, col3, col4 = st.columns(4)
-            
-            with col1:
-                error_count = sum(1 for line in display_lines if "ERROR" in line.upper())
-                create_metric_card("Erros", error_count, "error")
-            
-            with col2:
-                warn_count = sum(1 for line in display_lines if "WARN" in line.upper())
-                create_metric_card("Avisos", warn_count, "warning")
-            
-            with col3:
-                info_count = sum(1 for line in display_lines if "INFO" in line.upper())
-                create_metric_card("Info", info_count, "info")
-            
-            with col4:
-                create_metric_card("Linhas", len(display_lines), "format_list_numbered")
-            
+                render_live_log(log_path, show_lines, search_term, selected_level)
+        # Filters search the whole file in one streaming pass
+        elif search_term or selected_level != "Todos":
+            render_log_search(log_path, search_term, selected_level, show_lines)
+        # Random access through the per-file line index
+        elif read_mode in ("Ir para linha", "Intervalo de horário"):
+            render_log_navigation(log_path, read_mode, show_lines)
+        # Read log file (tail seeks back from EOF instead of reading the whole file)
         else:
-            st.info("Nenhuma linha encontrada com os filtros aplicados.")
+            display_lines = tail_lines(log_path, show_lines) if read_mode == "Últimas linhas" else head_lines(log_path, show_lines)
+            render_log_lines(display_lines)
     
     except Exception as e:
         st.error(f"Erro ao ler arquivo de log: {str(e)}")
@@ -224,6 +352,7 @@ def run():
     # Auto-refresh for follow mode
     if follow_mode:
         st.sidebar.markdown("**Modo Live Ativo**")
-        import time
-        time.sleep(5)
-        st.rerun()
\ No newline at end of file
+        if not render_live_log_fragment:
+            # Older Streamlit without fragments: rerun the page, the follower still reads only new bytes
+            time.sleep(LIVE_REFRESH_SECONDS)
+            st.rerun()
\ No newline at end of file
@@ -315,8 +315,7 @@ def run():
                             if success:
                                 st.success(f"{message}")
                                 # Sincronizar com MikroTiks
-                                sync_results = mikrotik.sync_routes(routes.get_active_routes())
-                                for device, (sync_success, sync_msg) in sync_results.items():
+                                for device, (sync_success, sync_msg) in mikrotik.iter_sync_routes(routes.get_active_routes()):
                                     if sync_success:
                                         st.info(f"{device}: {sync_msg}")
                                     else:
@@ -476,9 +475,8 @@ def run():
                 active_routes = routes.get_active_routes()
                 if active_routes:
                     with st.spinner("Sincronizando todos os dispositivos..."):
-                        sync_results = mikrotik.sync_routes(active_routes)
-                        
-                        for device, (success, message) in sync_results.items():
+                        # Resultados aparecem conforme cada dispositivo termina
+                        for device, (success, message) in mikrotik.iter_sync_routes(active_routes):
                             if success:
                                 st.markdown(f"<div style='color: green; background-color: #d4edda; padding: 0.5rem; border-radius: 0.25rem; border: 1px solid #c3e6cb;'><span class='material-icons' style='vertical-align: middle; margin-right: 0.5rem;'>check_circle</span>{device}: {message}</div>", unsafe_allow_html=True)
                             else:
@@ -2,13 +2,20 @@ import streamlit as st
 import os
 import subprocess
 import glob
-from utils.git_utils import scan_git_repositories, get_repo_info, get_repo_status
+import datetime
+from utils.git_utils import scan_git_repositories, get_cached_repo_info, get_cached_repo_status
+from utils.repo_cache import repo_cache
+from utils.commit_history import commit_history
+from utils.git_jobs import git_jobs, DEFAULT_CONCURRENCY
+from components.charts import create_custom_metric_chart
 from components.metrics import create_metric_card
 from collections import defaultdict
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
+JOB_REFRESH_SECONDS = 1
+
 def get_all_repositories():
     """Get all Git repositories"""
+    # Per-repo results are cached on disk, keyed on .git HEAD/index/refs mtimes
     return scan_git_repositories()
 
 def categorize_repositories(repos):
@@ -78,6 +85,135 @@ def organize_by_project(repos):
     
     return dict(projects)
 
+def format_repo_size(repo):
+    """Total size with the working tree / .git / dependencies split"""
+    text = f"{repo.get('size_mb', 0):.1f} MB"
+    breakdown = repo.get('size_breakdown')
+    if breakdown:
+        text += (f" (código {breakdown['worktree_mb']:.1f} MB · .git {breakdown['git_mb']:.1f} MB"
+                 f" · dependências {breakdown['vendored_mb']:.1f} MB)")
+        if breakdown['partial']:
+            text += " — estimativa parcial"
+    return text
+
+JOB_STATUS_LABELS = {
+    'queued': 'Na fila',
+    'running': 'Executando',
+    'success': 'Concluído',
+    'error': 'Erro'
+}
+
+def display_git_job(job_id):
+    """Per-repository progress and results of a fetch/pull job"""
+    job = git_jobs.get_job(job_id)
+    if not job:
+        return
+    
+    states = job['repos']
+    done = sum(1 for state in states.values() if state['status'] in ('success', 'error'))
+    failed = sum(1 for state in states.values() if state['status'] == 'error')
+    action_label = {'fetch': 'Fetch', 'pull': 'Pull', 'clone': 'Clone'}.get(job['action'], job['action'])
+    
+    st.progress(done / len(states) if states else 1.0,
+                text=f"{action_label} #{job_id}: {done}/{len(states)} concluídos" + (f", {failed} com erro" if failed else ""))
+    
+    for repo_path, state in sorted(states.items(), key=lambda item: item[0]):
+        line = f"**{os.path.basename(repo_path)}** — {JOB_STATUS_LABELS.get(state['status'], state['status'])}"
+        if state['status'] == 'running' and state['progress']:
+            line += f" · {state['progress']}"
+        if state['started'] and state['finished']:
+            line += f" · {state['finished'] - state['started']:.1f}s"
+        st.markdown(line)
+        if state['status'] == 'error' and state['output']:
+            st.code(state['output'][-2000:], language='bash')
+
+def display_running_git_job(job_id):
+    """Poll the job while it runs"""
+    display_git_job(job_id)
+    if _fragment and not git_jobs.is_running(job_id):
+        # Done: rerun the whole page so cards pick up the new state
+        st.rerun()
+
+# Refresh only the job panel while a job runs instead of rerunning the page
+_fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None)
+if _fragment:
+    display_running_git_job = _fragment(run_every=JOB_REFRESH_SECONDS)(display_running_git_job)
+
+def display_bulk_update(repos):
+    """Fetch or pull many repositories concurrently"""
+    with st.expander("Atualização em Lote (fetch / pull)", expanded=bool(git_jobs.active_jobs())):
+        col1, col2, col3 = st.columns([3, 1, 1])
+        
+        with col1:
+            all_repos = st.checkbox("Todos os repositórios", value=False)
+            repo_paths = [repo['path'] for repo in repos]
+            selected_paths = repo_paths if all_repos else st.multiselect(
+                "Repositórios",
+                repo_paths,
+                format_func=lambda path: os.path.relpath(path, '/srv/projects') if path.startswith('/srv/projects') else path
+            )
+        
+        with col2:
+            action = st.radio("Ação", ["fetch", "pull"], format_func=lambda a: a.capitalize())
+        
+        with col3:
+            concurrency = st.slider("Paralelismo", 1, 16, DEFAULT_CONCURRENCY)
+        
+        if st.button(":material/sync: Iniciar", disabled=not selected_paths):
+            st.session_state['git_job_id'] = git_jobs.submit(action, selected_paths, concurrency)
+        
+        job_id = st.session_state.get('git_job_id')
+        if job_id:
+            st.markdown("---")
+            if git_jobs.is_running(job_id):
+                display_running_git_job(job_id)
+                if not _fragment:
+                    st.button(":material/refresh: Atualizar progresso")
+            else:
+                display_git_job(job_id)
+        
+        history = git_jobs.history(limit=10)
+        if history:
+            st.markdown("**Histórico de Jobs**")
+            for entry in history:
+                started = datetime.datetime.fromtimestamp(entry['started']).strftime('%d/%m %H:%M')
+                duration = f"{entry['finished'] - entry['started']:.0f}s" if entry['finished'] else "em andamento"
+                st.text(f"#{entry['job_id']} {entry['action']} · {started} · {entry['total']} repos · "
+                        f"{entry['succeeded']} ok / {entry['failed']} erro · {duration}")
+
+def display_repository_activity(repo):
+    """Commits per week, top authors and churn from the commit history cache"""
+    if not commit_history.is_current(repo['path']):
+        commit_history.schedule_update(repo['path'])
+        st.caption("Indexando histórico de commits em segundo plano; os dados podem estar incompletos.")
+    
+    weekly = commit_history.commits_per_week(repo['path'], weeks=26)
+    if not any(week['commits'] for week in weekly):
+        st.info("Nenhum commit nas últimas 26 semanas")
+    else:
+        create_custom_metric_chart({
+            'Semana': [week['week'] for week in weekly],
+            'Commits': [week['commits'] for week in weekly]
+        }, chart_type="bar", title="Commits por Semana")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        authors = commit_history.top_authors(repo['path'], limit=10)
+        if authors:
+            create_custom_metric_chart({
+                'Autor': [author['name'] for author in authors],
+                'Commits': [author['commits'] for author in authors]
+            }, chart_type="bar", title="Principais Autores")
+    
+    with col2:
+        churn = commit_history.churn_by_path(repo['path'], limit=10, depth=2)
+        if churn:
+            create_custom_metric_chart({
+                'Caminho': [entry['path'] for entry in churn],
+                'Linhas alteradas': [entry['insertions'] + entry['deletions'] for entry in churn]
+            }, chart_type="bar", title="Churn por Caminho")
+
 def display_repository_card(repo, index):
     """Display a repository card with complete information"""
     with st.expander(f"**{repo['name']}**", expanded=False):
@@ -90,13 +226,14 @@ def display_repository_card(repo, index):
             **Nome:** {repo['name']}
             **Caminho:** {repo['path']}
             **Branch Atual:** {repo.get('current_branch', 'N/A')}
-            **Tamanho:** {repo.get('size_mb', 0):.1f} MB
+            **Tamanho:** {format_repo_size(repo)}
             """)
         
         with info_col2:
             # Get detailed repo status
             try:
-                status = get_repo_status(repo['path'])
+                # Filled in by the scan's thread pool; queried here only if it failed there
+                status = repo.get('status') or get_cached_repo_status(repo['path'])
                 
                 # Status indicators
                 status_text = "Limpo" if status.get('is_clean', False) else "Modificado"
@@ -116,7 +253,7 @@ def display_repository_card(repo, index):
         st.markdown("---")
         
         # Tabs for different info
-        tab1, tab2, tab3, tab4 = st.tabs(["Status", "Branches", "Commits", "Arquivos"])
+        tab1, tab2, tab3, tab4, tab5 = st.tabs(["Status", "Branches", "Commits", "Arquivos", "Atividade"])
         
         with tab1:
             try:
@@ -144,9 +281,13 @@ def display_repository_card(repo, index):
             except Exception as e:
                 st.error(f"Erro ao obter status detalhado: {str(e)}")
         
+        try:
+            info = get_cached_repo_info(repo['path'])
+        except Exception as e:
+            info = {'error': str(e)}
+        
         with tab2:
             try:
-                info = get_repo_info(repo['path'])
                 branches = info.get('branches', [])
                 
                 if branches:
@@ -162,7 +303,6 @@ def display_repository_card(repo, index):
         
         with tab3:
             try:
-                info = get_repo_info(repo['path'])
                 commits = info.get('recent_commits', [])
                 
                 if commits:
@@ -199,6 +339,11 @@ def display_repository_card(repo, index):
             except Exception as e:
                 st.error(f"Erro ao listar arquivos: {str(e)}")
         
+        with tab5:
+            # Charts are only built on demand; the cards of every repo render on page load
+            if st.checkbox("Carregar análise de atividade", key=f"activity_{index}_{repo['path']}"):
+                display_repository_activity(repo)
+        
         # Action buttons
         st.markdown("---")
         action_col1, action_col2, action_col3, action_col4 = st.columns(4)
@@ -225,27 +370,9 @@ def display_repository_card(repo, index):
         
         with action_col3:
             if st.button(f":material/cloud_download: Pull", key=f"pull_{index}_{repo['name']}"):
-                try:
-                    with st.spinner("Fazendo git pull..."):
-                        result = subprocess.run(
-                            ['git', 'pull'],
-                            cwd=repo['path'],
-                            capture_output=True,
-                            text=True,
-                            timeout=30
-                        )
-                        if result.returncode == 0:
-                            st.success("Pull realizado com sucesso!")
-                            if result.stdout:
-                                st.code(result.stdout, language='bash')
-                        else:
-                            st.error("Erro ao fazer pull")
-                            if result.stderr:
-                                st.code(result.stderr, language='bash')
-                except subprocess.TimeoutExpired:
-                    st.error("Timeout - operação demorou muito")
-                except Exception as e:
-                    st.error(f"Erro: {str(e)}")
+                # Runs in the background; progress shows up in "Atualização em Lote"
+                st.session_state['git_job_id'] = git_jobs.submit('pull', [repo['path']], concurrency=1)
+                st.success("Pull iniciado em segundo plano")
         
         with action_col4:
             if st.button(f":material/cloud: Remote", key=f"remote_{index}_{repo['name']}"):
@@ -300,6 +427,8 @@ def run():
     
     st.markdown("---")
     
+    display_bulk_update(repos)
+    
     # Search and filters
     col1, col2, col3 = st.columns([2, 1, 1])
     
@@ -430,5 +559,5 @@ def run():
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
         if st.button(":material/refresh: Atualizar Repositórios"):
-            st.cache_data.clear()
+            repo_cache.invalidate()
             st.rerun()
\ No newline at end of file
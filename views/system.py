@@ -6,6 +6,7 @@ import datetime
 import os
 from utils.system_monitor import get_detailed_system_info, get_network_info, get_process_info
 from components.metrics import create_metric_card
+from utils.metrics_collector import metrics_collector
 
 def run():
     """Detailed system information view"""
@@ -64,7 +65,7 @@ def run():
     
     with cpu_col2:
         # CPU usage per core
-        cpu_percents = psutil.cpu_percent(percpu=True, interval=1)
+        cpu_percents = metrics_collector.latest()['cpu_per_core']
         st.markdown("**Uso por Core:**")
         for i, percent in enumerate(cpu_percents):
             st.progress(percent/100, text=f"Core {i+1}: {percent}%")
@@ -9,6 +9,7 @@ import json
 # Importar componentes locais
 from components.mikrotik_vpn import MikroTikVPN
 from components.mikrotik_nat import MikroTikNAT
+from components.mikrotik_cache import mikrotik_cache
 from components.metrics import create_metric_card, create_alert_metric, create_status_metric
 
 # Configurar logging
@@ -521,6 +522,8 @@ def render_monitoring_tab():
         st.info(f"Última atualização: {last_refresh.strftime('%H:%M:%S')}")
         
         if st.button(":material/refresh: Atualizar Dados"):
+            # Forçar nova leitura do roteador em vez do cache compartilhado
+            mikrotik_cache.clear()
             st.session_state.last_refresh = datetime.now()
             st.rerun()
     